@@ -6,16 +6,21 @@ import logging
 from .editor.asc_editor import AscEditor
 from .editor.qsch_editor import QschEditor
 from .editor.spice_editor import SpiceCircuit, SpiceComponent, SpiceEditor
+from .raw.raw_dataset import RawDataset
 from .raw.raw_read import RawRead, SpiceReadException
-from .raw.raw_write import RawWrite, Trace
+from .raw.raw_write import RawWrite, RawWriter, Trace
+from .sim.async_sim_runner import AsyncSimRunner
 from .sim.sim_runner import SimRunner
 
 # Define public API to avoid unused import errors
 __all__ = [
     "AscEditor",
+    "AsyncSimRunner",
     "QschEditor",
+    "RawDataset",
     "RawRead",
     "RawWrite",
+    "RawWriter",
     "SimRunner",
     "SpiceCircuit",
     "SpiceComponent",
@@ -38,16 +43,20 @@ def all_loggers() -> list[str]:
     return [
         "kupicelib.AscEditor",
         "kupicelib.AscToQsch",
+        "kupicelib.AsyncSimRunner",
         "kupicelib.AsyReader",
         "kupicelib.BaseEditor",
         "kupicelib.BaseSchematic",
+        "kupicelib.ConcurrencyController",
         "kupicelib.LTSpiceSimulator",
         "kupicelib.LTSteps",
         "kupicelib.NGSpiceSimulator",
         "kupicelib.QschEditor",
         "kupicelib.qspice_log_reader",
         "kupicelib.QSpiceSimulator",
+        "kupicelib.RawDataset",
         "kupicelib.RawRead",
+        "kupicelib.ResultCache",
         "kupicelib.RunTask",
         "kupicelib.ServerSimRunner",
         "kupicelib.SimAnalysis",
@@ -30,6 +30,7 @@ from xmlrpc.client import Binary
 from xmlrpc.server import SimpleXMLRPCServer
 
 from kupicelib.client_server.srv_sim_runner import CompletedTaskInfo, ServerSimRunner
+from kupicelib.sim.concurrency_controller import ConcurrencyController
 from kupicelib.sim.simulator import Simulator
 
 _logger = logging.getLogger("kupicelib.SimServer")
@@ -58,6 +59,9 @@ class SimServer:
     :param timeout: The maximum time that a simulation can run. Default is None, which
         means that there is no timeout.
     :param port: The port where the server will listen for requests. Default is 9000
+    :param concurrency: Controller that adapts the number of parallel simulations to
+        the load of the machine. See SimRunner. Default is None, which keeps
+        parallel_sims fixed.
     """
 
     def __init__(
@@ -68,6 +72,7 @@ class SimServer:
         timeout: float = 300,
         port: int = 9000,
         host: str = "localhost",
+        concurrency: ConcurrencyController | None = None,
     ) -> None:
         self.output_folder: Path = Path(output_folder)
         self.simulation_manager: ServerSimRunner = ServerSimRunner(
@@ -76,6 +81,7 @@ class SimServer:
             verbose=False,
             output_folder=str(self.output_folder),
             simulator=simulator,
+            concurrency=concurrency,
         )
         self.server = SimpleXMLRPCServer(
             (host, port),
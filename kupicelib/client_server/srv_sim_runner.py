@@ -27,6 +27,7 @@ from pathlib import Path
 from typing import TypedDict
 
 from ..editor.base_editor import BaseEditor
+from ..sim.concurrency_controller import ConcurrencyController
 from ..sim.sim_runner import SimRunner
 from ..sim.simulator import Simulator
 
@@ -70,6 +71,7 @@ class ServerSimRunner(threading.Thread):
         verbose: bool = False,
         output_folder: str | None = None,
         simulator: type[Simulator] | Simulator | None = None,
+        concurrency: ConcurrencyController | None = None,
     ) -> None:
         super().__init__(name="SimManager")
         # SimRunner expects a float for timeout, so use 600.0 as default if None
@@ -81,6 +83,7 @@ class ServerSimRunner(threading.Thread):
             timeout=sim_timeout,
             verbose=verbose,
             output_folder=output_folder,
+            concurrency=concurrency,
         )
         self.completed_tasks: list[CompletedTaskInfo] = []
         self._stop = False
@@ -26,7 +26,7 @@ from typing import Any, cast
 
 import numpy as np
 from numpy import complex128, float32, float64, zeros
-from numpy.typing import NDArray
+from numpy.typing import ArrayLike, NDArray
 
 NumericArray = NDArray[np.generic]
 
@@ -109,32 +109,49 @@ class Axis(DataSet):
     ) -> None:
         super().__init__(name, whattype, datalen, numerical_type)
         self.step_info: list[dict[str, Any]] | None = None
-        self.step_offsets: list[int | None] = []
-
-    def _set_steps(self, step_info: list[dict[str, Any]]) -> None:
-        self.step_info = step_info
-
-        self.step_offsets = [None for _ in range(len(step_info))]
-
-        # Now going to calculate the point offset for each step
-        self.step_offsets[0] = 0
-        i = 1
-        k = 1
-        while i < len(self.data):
-            if self.data[i] == self.data[0]:
-                self.step_offsets[k] = i
-                k += 1
-            i += 1
-
-        if k != len(self.step_info):
+        # None until the steps are detected, see step_offsets
+        self._step_offsets: NDArray[np.int64] | None = np.zeros(0, dtype=np.int64)
+
+    @property
+    def step_offsets(self) -> NDArray[np.int64]:
+        """Index of the first point of each step. When the steps were set with
+        lazy=True, they are detected on the first access."""
+        if self._step_offsets is None:
+            self._step_offsets = self._find_step_offsets()
+        return self._step_offsets
+
+    @step_offsets.setter
+    def step_offsets(self, offsets: NDArray[np.int64]) -> None:
+        self._step_offsets = offsets
+
+    def _find_step_offsets(self) -> NDArray[np.int64]:
+        assert self.step_info is not None
+        # Each step starts where the axis goes back to its initial value
+        step_offsets = np.flatnonzero(self.data == self.data[0]).astype(np.int64)
+
+        if len(step_offsets) != len(self.step_info):
             raise SpiceReadException(
                 "The file a different number of steps than expected.\n"
-                f"Expecting {len(self.step_offsets)} got {k}"
+                f"Expecting {len(self.step_info)} got {len(step_offsets)}"
             )
+        return step_offsets
 
-    def set_steps(self, step_info: list[dict[str, Any]]) -> None:
-        """Public wrapper around the internal step assignment helper."""
-        self._set_steps(step_info)
+    def _set_steps(self, step_info: list[dict[str, Any]], lazy: bool = False) -> None:
+        self.step_info = step_info
+        self._step_offsets = None
+        if not lazy:
+            self._step_offsets = self._find_step_offsets()
+
+    def set_steps(self, step_info: list[dict[str, Any]], lazy: bool = False) -> None:
+        """Public wrapper around the internal step assignment helper.
+
+        :param step_info: The information of each step
+        :type step_info: list[dict[str, Any]]
+        :param lazy: Delays the detection of the steps until they are needed, so that
+            the axis data isn't read, defaults to False
+        :type lazy: bool, optional
+        """
+        self._set_steps(step_info, lazy)
 
     def step_offset(self, step: int) -> int:
         """In Stepped RAW files, several simulations runs are stored in the same RAW
@@ -155,8 +172,7 @@ class Axis(DataSet):
             if step >= len(self.step_offsets):
                 return len(self.data)
             else:
-                offset = self.step_offsets[step]
-                return 0 if offset is None else offset
+                return int(self.step_offsets[step])
 
     def get_wave(self, step: int = 0) -> np.ndarray:
         """Returns a vector containing the wave values. If numpy is installed, data is
@@ -241,17 +257,19 @@ class Axis(DataSet):
         timex: NumericArray = (
             self.get_time_axis(step) if self.name == "time" else self.get_wave(step)
         )
-        for i, x in enumerate(timex):
-            if x == t:
-                return i
-            elif x > t:
-                # Needs to interpolate the data
-                if i == 0:
-                    raise IndexError("Time position is lower than t0")
-                frac: float = (t - timex[i - 1]) / (timex[i] - timex[i - 1])
-                return i - 1 + frac
-        # Handle case where t is greater than all values in timex
-        raise IndexError(f"Value {t} is greater than the maximum value in the axis")
+        if np.iscomplexobj(timex):  # AC analysis frequencies are stored as complex
+            timex = timex.real
+            t = np.real(t)
+        i = int(np.searchsorted(timex, t, side="left"))
+        if i == len(timex):
+            raise IndexError(f"Value {t} is greater than the maximum value in the axis")
+        if timex[i] == t:
+            return i
+        # Needs to interpolate the data
+        if i == 0:
+            raise IndexError("Time position is lower than t0")
+        frac: float = float((t - timex[i - 1]) / (timex[i] - timex[i - 1]))
+        return i - 1 + frac
 
     def get_len(self, step: int = 0) -> int:
         """Returns the length of the axis.
@@ -294,6 +312,9 @@ class TraceRead(DataSet):
     ) -> None:
         super().__init__(name, whattype, datalen, numerical_type)
         self.axis: Axis | None = axis
+        # Min/max pyramids used by get_wave_decimated(), per step
+        self._pyramids: dict[int, MinMaxPyramid] = {}
+        self._pyramids_source: NumericArray | None = None
 
     def get_point(self, n: int, step: int = 0) -> float | complex:
         """Implementation of the [] operator.
@@ -380,6 +401,100 @@ class TraceRead(DataSet):
         else:
             return self.get_point(int(pos), step)
 
+    def get_points_at(self, t: ArrayLike, step: int = 0) -> NumericArray:
+        """Vectorized version of get_point_at(). Gets the trace values at all the points
+        of the axis given in /t/, using a linear interpolation between the two adjacent
+        points when they don't exist on the axis. Complex traces are interpolated on
+        both the real and imaginary parts.
+
+        :param t: points in the axis where to find the values. Must be within the axis
+            range.
+        :type t: numpy.array or list of floats
+        :param step: step index
+        :type step: int
+        :return: The trace values at the requested points
+        :rtype: numpy.array
+        :raises IndexError: When a point is outside the axis range
+        """
+        assert self.axis is not None
+        timex = self.axis.get_wave(step)
+        if np.iscomplexobj(timex):  # AC analysis frequencies are stored as complex
+            timex = timex.real
+        points = np.real(np.asarray(t))
+        if points.size and (points.min() < timex[0] or points.max() > timex[-1]):
+            raise IndexError(
+                f"Points must be between {timex[0]} and {timex[-1]}. "
+                f"Received [{points.min()}, {points.max()}]"
+            )
+        return np.interp(points, timex, self.get_wave(step))
+
+    def get_wave_decimated(
+        self,
+        step: int = 0,
+        max_points: int = 4000,
+        method: str = "minmax",
+        x_range: tuple[float, float] | None = None,
+    ) -> tuple[NumericArray, NumericArray]:
+        """Returns a reduced version of the trace, for plotting. At most about
+        `max_points` points are returned, all of them points of the trace.
+
+        The 'minmax' method keeps the minimum and the maximum of each interval of the
+        trace, so that the envelope of the trace is preserved. It uses a pyramid of the
+        minimum and maximum positions that is computed on the first call, and kept for
+        each step. After that, the cost of a call only depends on `max_points`, so
+        zooming in is fast regardless of the trace length.
+
+        The 'lttb' method (Largest-Triangle-Three-Buckets) keeps the points that
+        preserve the shape of the trace best. It processes all the points of the range
+        on each call.
+
+        Complex traces are reduced using their magnitude.
+
+        :param step: step index
+        :type step: int
+        :param max_points: maximum number of points to return
+        :type max_points: int
+        :param method: 'minmax' or 'lttb'
+        :type method: str
+        :param x_range: optional (start, end) range of the axis to return. Default is
+            the whole trace.
+        :type x_range: tuple[float, float]
+        :return: The axis values and the trace values of the selected points
+        :rtype: tuple[numpy.array, numpy.array]
+        :raises ValueError: If the method is not known, or if max_points is less than 3
+        """
+        if method not in ("minmax", "lttb"):
+            raise ValueError(f"Unknown decimation method '{method}'")
+        if max_points < 3:
+            raise ValueError(f"max_points must be at least 3, got {max_points}")
+        wave = self.get_wave(step)
+        if self.axis is None:
+            x: NumericArray = np.arange(len(wave), dtype=np.float64)
+        else:
+            # Axis.get_wave() would make a copy of the whole time axis
+            x = self.axis.data[self.axis.step_offset(step): self.axis.step_offset(step + 1)]
+        x_real = x.real if np.iscomplexobj(x) else x
+        start, end = 0, len(wave)
+        if x_range is not None:
+            start = int(np.searchsorted(x_real, x_range[0], side="left"))
+            end = int(np.searchsorted(x_real, x_range[1], side="right"))
+        if end - start <= max_points:
+            index: NDArray[np.int64] | slice = slice(start, end)
+        elif method == "lttb":
+            key = np.abs(wave[start:end]) if np.iscomplexobj(wave) else wave[start:end]
+            index = start + _lttb(x_real[start:end], key, max_points)
+        else:
+            if self._pyramids_source is not self.data:
+                self._pyramids = {}
+                self._pyramids_source = self.data
+            if step not in self._pyramids:
+                self._pyramids[step] = MinMaxPyramid(wave)
+            index = self._pyramids[step].select(start, end, max_points // 2)
+        if self.axis is not None and self.axis.name == "time":
+            # LTSpice sometimes writes negative time values. See Axis.get_wave()
+            return np.abs(x[index]), wave[index]
+        return x[index], wave[index]
+
     def get_len(self, step: int = 0) -> int:
         """Returns the length of the axis.
 
@@ -389,7 +504,7 @@ class TraceRead(DataSet):
         :rtype: int
         """
         assert self.axis is not None
-        return self.axis.step_offset(step + 1)
+        return self.axis.get_len(step)
 
     def __len__(self) -> int:
         """..
@@ -402,6 +517,107 @@ class TraceRead(DataSet):
         return len(self.data)
 
 
+class MinMaxPyramid:
+    """Multi-resolution index of the minimums and maximums of a wave, used to reduce
+    large traces for plotting. Level 0 stores, for each block of `BLOCK` points, the
+    positions of its minimum and its maximum. Each level above joins two blocks of the
+    level below, until a single block remains.
+
+    :param wave: The wave to index. Complex waves are indexed by their magnitude.
+    :type wave: numpy.array
+    """
+
+    BLOCK = 64
+
+    def __init__(self, wave: NumericArray) -> None:
+        self.key = np.abs(wave) if np.iscomplexobj(wave) else wave
+        self.levels: list[tuple[NDArray[np.int64], NDArray[np.int64]]] = []
+        n_blocks = len(self.key) // self.BLOCK
+        if n_blocks == 0:
+            return
+        blocks = self.key[: n_blocks * self.BLOCK].reshape(n_blocks, self.BLOCK)
+        first = np.arange(n_blocks, dtype=np.int64) * self.BLOCK
+        imin, imax = first + blocks.argmin(axis=1), first + blocks.argmax(axis=1)
+        self.levels.append((imin, imax))
+        while len(imin) > 1:
+            n_pairs = len(imin) // 2
+            a, b = imin[: 2 * n_pairs: 2], imin[1: 2 * n_pairs: 2]
+            imin = np.where(self.key[a] <= self.key[b], a, b)
+            a, b = imax[: 2 * n_pairs: 2], imax[1: 2 * n_pairs: 2]
+            imax = np.where(self.key[a] >= self.key[b], a, b)
+            self.levels.append((imin, imax))
+
+    def _minmax(self, start: int, end: int, size: int) -> NDArray[np.int64]:
+        """Positions of the min and max of each `size` points of [start, end), computed
+        directly from the wave."""
+        n_blocks = -(-(end - start) // size)
+        padded = np.full(n_blocks * size, np.nan)
+        padded[: end - start] = self.key[start:end]
+        blocks = padded.reshape(n_blocks, size)
+        first = start + np.arange(n_blocks, dtype=np.int64) * size
+        return np.concatenate(
+            (first + np.nanargmin(blocks, axis=1), first + np.nanargmax(blocks, axis=1))
+        )
+
+    def select(self, start: int, end: int, n_buckets: int) -> NDArray[np.int64]:
+        """Returns the positions of the minimums and maximums of about `n_buckets`
+        intervals of [start, end), in increasing order. The first and last points are
+        always included.
+
+        :param start: first position
+        :type start: int
+        :param end: position after the last one
+        :type end: int
+        :param n_buckets: number of intervals
+        :type n_buckets: int
+        :return: positions in the wave
+        :rtype: numpy.array
+        """
+        n_buckets = max(n_buckets, 1)
+        bucket = -(-(end - start) // n_buckets)
+        # The level with the smallest blocks that are at least the bucket size
+        level = max(0, int(np.ceil(np.log2(bucket / self.BLOCK))))
+        if bucket < self.BLOCK or level >= len(self.levels):
+            index = self._minmax(start, end, bucket)
+        else:
+            size = self.BLOCK << level
+            first, last = -(-start // size), end // size
+            if last <= first:  # No whole block in the range
+                index = self._minmax(start, end, size)
+            else:
+                imin, imax = self.levels[level]
+                parts = [imin[first:last], imax[first:last]]
+                # The partial blocks at the edges of the range
+                if first * size > start:
+                    parts.append(self._minmax(start, first * size, size))
+                if last * size < end:
+                    parts.append(self._minmax(last * size, end, size))
+                index = np.concatenate(parts)
+        return np.unique(np.concatenate((index, [start, end - 1])))
+
+
+def _lttb(x: NDArray[Any], y: NDArray[Any], n_out: int) -> NDArray[np.int64]:
+    """Largest-Triangle-Three-Buckets downsampling. Returns the positions of the
+    `n_out` points selected, the first and the last point included."""
+    n = len(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    index = np.zeros(n_out, dtype=np.int64)
+    index[-1] = n - 1
+    selected = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third point of the triangle
+        next_hi = edges[i + 2] if i + 2 < n_out - 1 else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs(
+            (x[selected] - avg_x) * (y[lo:hi] - y[selected])
+            - (x[selected] - x[lo:hi]) * (avg_y - y[selected])
+        )
+        selected = lo + int(area.argmax())
+        index[i + 1] = selected
+    return index
+
+
 class DummyTrace:
     """Dummy Trace for bypassing traces while reading."""
 
@@ -429,3 +645,117 @@ class SpiceReadException(Exception):
     """Custom class for exception handling."""
 
     ...
+
+
+class StepIndex:
+    """Column-wise store of the step information of a RAW file, used to resolve the
+    step queries of RawRead.get_steps(). Each stepped parameter is kept as a NumPy
+    array with one value per step. Hash tables (for equality) and sorted indexes (for
+    ranges) are built on the first query that needs them.
+
+    Queries are given as keyword arguments. The parameter name can be followed by an
+    operator, separated by a double underscore:
+
+    * ``V5=1.2`` or ``V5__eq=1.2``: equal to
+    * ``V5__ne=1.2``: different from
+    * ``V5__gt=1.0``, ``V5__ge=1.0``, ``V5__lt=1.0``, ``V5__le=1.0``: ranges
+    * ``V5__in=[1.0, 1.2]``: equal to any of the values
+    * ``V5__approx=1.2`` or ``V5__approx=(1.2, 1e-3)``: equal within a tolerance. The
+      default tolerances are the ones of numpy.isclose(). When a tuple is given, the
+      second element is the absolute tolerance.
+
+    Steps where the parameter doesn't exist never match. The parameters whose values
+    are all integers are kept as int64, the other numeric ones as float64.
+
+    :param steps: The step information, one dictionary per step
+    :type steps: list[dict[str, Any]]
+    """
+
+    OPERATORS = ("eq", "ne", "gt", "ge", "lt", "le", "in", "approx")
+
+    def __init__(self, steps: list[dict[str, Any]]) -> None:
+        self.n_steps: int = len(steps)
+        self.columns: dict[str, NDArray[Any]] = {}
+        self.defined: dict[str, NDArray[np.bool_]] = {}
+        for key in dict.fromkeys(key for step in steps for key in step):
+            values = [step.get(key) for step in steps]
+            self.defined[key] = np.array([value is not None for value in values], dtype=bool)
+            if all(isinstance(value, int) for value in values):
+                self.columns[key] = np.array(values, dtype=np.int64)
+            elif all(isinstance(value, int | float) for value in values):
+                self.columns[key] = np.array(values, dtype=np.float64)
+            else:
+                column = np.empty(self.n_steps, dtype=object)
+                column[:] = values
+                self.columns[key] = column
+        self._hashes: dict[str, dict[Any, NDArray[np.int64]]] = {}
+        self._sorted: dict[str, tuple[NDArray[Any], NDArray[np.int64]]] = {}
+
+    def _hash(self, key: str) -> dict[Any, NDArray[np.int64]]:
+        if key not in self._hashes:
+            positions: dict[Any, list[int]] = {}
+            for i, value in enumerate(self.columns[key].tolist()):
+                if self.defined[key][i]:
+                    positions.setdefault(value, []).append(i)
+            self._hashes[key] = {
+                value: np.array(steps, dtype=np.int64) for value, steps in positions.items()
+            }
+        return self._hashes[key]
+
+    def _sorted_index(self, key: str) -> tuple[NDArray[Any], NDArray[np.int64]]:
+        if key not in self._sorted:
+            order = np.argsort(self.columns[key], kind="stable").astype(np.int64)
+            self._sorted[key] = (self.columns[key][order], order)
+        return self._sorted[key]
+
+    def _match(self, key: str, operator: str, expected: Any) -> NDArray[np.bool_]:
+        column = self.columns[key]
+        mask = np.zeros(self.n_steps, dtype=bool)
+        if operator in ("eq", "in"):
+            values = expected if operator == "in" else [expected]
+            try:
+                table = self._hash(key)
+                for value in values:
+                    mask[table.get(value, np.zeros(0, dtype=np.int64))] = True
+            except TypeError:  # Unhashable values
+                for value in values:
+                    mask |= column == value
+        elif operator == "ne":
+            mask = ~self._match(key, "eq", expected)
+        elif operator == "approx":
+            if column.dtype == object:
+                raise TypeError(f"Parameter '{key}' is not numeric")
+            if isinstance(expected, tuple):
+                value, atol = expected
+                mask = np.isclose(column, value, rtol=0, atol=atol)
+            else:
+                mask = np.isclose(column, expected)
+        elif column.dtype != object:
+            values, order = self._sorted_index(key)
+            if operator in ("gt", "le"):
+                split = np.searchsorted(values, expected, side="right")
+            else:
+                split = np.searchsorted(values, expected, side="left")
+            mask[order[split:] if operator in ("gt", "ge") else order[:split]] = True
+        else:
+            raise TypeError(f"Parameter '{key}' is not numeric")
+        return mask & self.defined[key]
+
+    def query(self, **kwargs: Any) -> NDArray[np.int64]:
+        """Returns the indexes of the steps that match all the conditions given.
+
+        :key kwargs: conditions, as described in the class documentation
+        :return: The indexes of the matching steps, in increasing order
+        :rtype: numpy.array
+        """
+        mask = np.ones(self.n_steps, dtype=bool)
+        for condition, expected in kwargs.items():
+            key, operator = condition, "eq"
+            if condition not in self.columns:
+                name, _, suffix = condition.rpartition("__")
+                if name and suffix in self.OPERATORS:
+                    key, operator = name, suffix
+            if key not in self.columns:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self._match(key, operator, expected)
+        return np.flatnonzero(mask)
@@ -17,12 +17,13 @@
 # Created:     17-01-2017
 # Licence:     refer to the LICENSE file
 # -------------------------------------------------------------------------------
-"""Helper script to read the raw file and output to a CSV, Excel or Clipboard.
+"""Helper script to read the raw file and output to a CSV, Excel, Parquet or Clipboard.
 
 Usage:     raw_convert.py [options] <rawfile> <trace_list>
 
 Options:     -h --help               Show this screen     -v --version            Show
-version     -o --output=<file>      Output file name. Valid extensions are .csv, .xlsx
+version     -o --output=<file>      Output file name. Valid extensions are .csv, .xlsx,
+.parquet
 -c --clipboard          Output to clipboard     -s --separator=<sep>    Separator for
 CSV output [default: \t]
 
@@ -51,7 +52,8 @@ def main() -> None:
         "--output",
         dest="output",
         default=None,
-        help="Output file name.\n" "Use .csv for CSV output, .xlsx for Excel output",
+        help="Output file name.\n"
+        "Use .csv for CSV output, .xlsx for Excel output, .parquet for Parquet output",
         metavar="FILE",
     )
     parser.add_option(
@@ -95,7 +97,7 @@ def main() -> None:
 
     # Read the raw file
     if traces != "*":
-        raw_data = RawRead(rawfile, "*", header_only=True, verbose=False)
+        raw_data = RawRead(rawfile, "*", headeronly=True, verbose=False)
         raw_traces = raw_data.get_trace_names()
         found_traces: list[str] = []
         for trace in traces:
@@ -135,7 +137,7 @@ def main() -> None:
 
     # Output the file
     if options.output is None:
-        data: dict[str, list[Any]] = raw_data.export()
+        data: dict[str, Any] = raw_data.export()
 
         text = options.separator.join(data.keys()) + "\n"
         first_key = next(iter(data))
@@ -160,8 +162,14 @@ def main() -> None:
             print("Writing Excel file...", end="")
             raw_data.to_excel(options.output, index=False)
             print("Done")
+        elif options.output.endswith(".parquet"):
+            print("Writing Parquet file...", end="")
+            raw_data.to_parquet(options.output)
+            print("Done")
         else:
-            print("Error: Unknown output format. Valid formats are '.csv' and '.xlsx'")
+            print(
+                "Error: Unknown output format. Valid formats are '.csv', '.xlsx' and '.parquet'"
+            )
             parser.print_help()
             exit(1)
     exit(0)
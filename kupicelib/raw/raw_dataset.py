@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+# -------------------------------------------------------------------------------
+#
+#  ███████╗██████╗ ██╗ ██████╗███████╗██╗     ██╗██████╗
+#  ██╔════╝██╔══██╗██║██╔════╝██╔════╝██║     ██║██╔══██╗
+#  ███████╗██████╔╝██║██║     █████╗  ██║     ██║██████╔╝
+#  ╚════██║██╔═══╝ ██║██║     ██╔══╝  ██║     ██║██╔══██╗
+#  ███████║██║     ██║╚██████╗███████╗███████╗██║██████╔╝
+#  ╚══════╝╚═╝     ╚═╝ ╚═════╝╚══════╝╚══════╝╚═╝╚═════╝
+#
+# Name:        raw_dataset.py
+# Purpose:     View of the RAW files of several simulation runs as a single dataset
+#
+# Licence:     refer to the LICENSE file
+# -------------------------------------------------------------------------------
+"""Presents the RAW files produced by several simulation runs, for example by SimRunner,
+as a single dataset. Example: ::
+
+    from kupicelib.raw.raw_dataset import RawDataset
+
+    dataset = RawDataset("./temp/sweep_*.raw")
+    for run in range(len(dataset)):
+        print(run, dataset.get_wave("V(out)", run).max())
+    stats = dataset.stats("V(out)")  # Point by point statistics across the runs
+"""
+
+from __future__ import annotations
+
+import glob
+import logging
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from ..log.logfile_data import ValueType
+from .raw_read import RawRead
+
+if TYPE_CHECKING:
+    from ..sim.run_task import RunTask
+
+_logger = logging.getLogger("kupicelib.RawDataset")
+
+
+class RawDataset:
+    """A set of RAW files, one per simulation run, seen as a single dataset where each
+    run is indexed by its position in the set.
+
+    All the headers are read when the dataset is created, and the traces of all files
+    must have the same names and types. The data is only read when it is requested,
+    through memory mapped RawRead instances. At most `max_open_files` files are kept
+    open at the same time: the least recently used is closed when another one needs to
+    be opened. Note that an array returned by get_wave() keeps its file mapped as long
+    as it is referenced.
+
+    :param source: A glob pattern, a RAW file, or a list of RAW files or of RunTask
+        instances (as returned by SimRunner). The files matched by a glob pattern are
+        sorted by name.
+    :type source: str | Path | Iterable[str | Path | RunTask]
+    :param max_open_files: Maximum number of RAW files kept open, defaults to 64
+    :type max_open_files: int, optional
+    :param dialect: The simulator used, see RawRead. Default is auto detection.
+    :type dialect: str | None, optional
+    :raises ValueError: If there are no files, or the traces of the files don't match
+    """
+
+    def __init__(
+        self,
+        source: str | Path | Iterable[str | Path | RunTask],
+        max_open_files: int = 64,
+        dialect: str | None = None,
+    ) -> None:
+        self.files: list[Path] = self._resolve_files(source)
+        if not self.files:
+            raise ValueError(f"No RAW files found in {source!r}")
+        self.max_open_files = max_open_files
+        self.dialect = dialect
+        self._headers = [
+            RawRead(filename, headeronly=True, dialect=dialect) for filename in self.files
+        ]
+        self._open: OrderedDict[int, RawRead] = OrderedDict()
+
+        first = self._headers[0]
+        signature = self._signature(first)
+        for filename, header in zip(self.files, self._headers, strict=True):
+            if self._signature(header) != signature:
+                raise ValueError(
+                    f"The traces of '{filename}' don't match the ones of '{self.files[0]}'"
+                )
+        self.trace_names: list[str] = [var.name for var in first._variables]
+        _logger.info(f"Dataset with {len(self.files)} runs of {len(self.trace_names)} traces")
+
+    @staticmethod
+    def _resolve_files(source: str | Path | Iterable[str | Path | RunTask]) -> list[Path]:
+        if isinstance(source, str) and glob.has_magic(source):
+            return [Path(filename) for filename in sorted(glob.glob(source))]
+        if isinstance(source, str | Path):
+            return [Path(source)]
+        files: list[Path] = []
+        for item in source:
+            if isinstance(item, str | Path):
+                files.append(Path(item))
+            elif item.raw_file is not None:
+                files.append(item.raw_file)
+            else:
+                _logger.warning(f"Run {item.runno} has no RAW file. It was skipped.")
+        return files
+
+    @staticmethod
+    def _signature(header: RawRead) -> list[tuple[str, str, str]]:
+        return [
+            (var.name.casefold(), var.whattype, var.numerical_type)
+            for var in header._variables
+        ]
+
+    def __len__(self) -> int:
+        """Number of runs of the dataset."""
+        return len(self.files)
+
+    def get_trace_names(self) -> list[str]:
+        """Returns the names of the traces, which are the same for all runs.
+
+        :return: trace names
+        :rtype: list[str]
+        """
+        return list(self.trace_names)
+
+    def get_steps(self, run: int) -> list[int]:
+        """Returns the steps of a run. See RawRead.get_steps().
+
+        :param run: Index of the run
+        :type run: int
+        :return: The steps of the run
+        :rtype: list[int]
+        """
+        return self.get_raw(run).get_steps()
+
+    def get_raw(self, run: int) -> RawRead:
+        """Returns the memory mapped RawRead of a run, opening it if needed. The file
+        that wasn't used for the longest time is closed if there are too many files
+        open.
+
+        :param run: Index of the run
+        :type run: int
+        :return: The RawRead instance of the run
+        :rtype: RawRead
+        """
+        if run in self._open:
+            self._open.move_to_end(run)
+            return self._open[run]
+        raw = RawRead(self.files[run], mmap=True, dialect=self.dialect)
+        self._open[run] = raw
+        while len(self._open) > self.max_open_files:
+            self._open.popitem(last=False)
+        return raw
+
+    def get_axis(self, run: int, step: int = 0) -> NDArray[Any]:
+        """Returns the axis of a run.
+
+        :param run: Index of the run
+        :type run: int
+        :param step: Step of the run, defaults to 0
+        :type step: int, optional
+        :return: The axis values
+        :rtype: numpy.array
+        """
+        return np.asarray(self.get_raw(run).get_axis(step))
+
+    def get_wave(self, trace: str, run: int, step: int = 0) -> NDArray[Any]:
+        """Returns the values of a trace on a run.
+
+        :param trace: Name of the trace
+        :type trace: str
+        :param run: Index of the run
+        :type run: int
+        :param step: Step of the run, defaults to 0
+        :type step: int, optional
+        :return: The trace values
+        :rtype: numpy.array
+        """
+        return self.get_raw(run).get_wave(trace, step)
+
+    def stack(
+        self,
+        trace: str,
+        step: int = 0,
+        axis: ArrayLike | None = None,
+        runs: Iterable[int] | None = None,
+    ) -> NDArray[Any]:
+        """Returns the values of a trace on all runs as a 2D array, with one row per run.
+
+        If the runs don't have the same number of points, for example on transient
+        simulations, a common axis needs to be given. The traces are then linearly
+        interpolated on that axis.
+
+        :param trace: Name of the trace
+        :type trace: str
+        :param step: Step of each run, defaults to 0
+        :type step: int, optional
+        :param axis: Axis values on which to interpolate the traces. Default is to use
+            the values of the runs as they are.
+        :type axis: ArrayLike, optional
+        :param runs: Runs to use. Default is all runs.
+        :type runs: Iterable[int], optional
+        :raises ValueError: If no axis is given and the runs have different lengths
+        :return: The trace values, one row per run
+        :rtype: numpy.array
+        """
+        runs = range(len(self)) if runs is None else list(runs)
+        if axis is None:
+            waves = [self.get_wave(trace, run, step) for run in runs]
+            if len({len(wave) for wave in waves}) > 1:
+                raise ValueError(
+                    "The runs have a different number of points. Use the axis argument "
+                    "to interpolate them on a common axis."
+                )
+            return np.stack(waves)
+        new_axis = np.asarray(axis)
+        return np.stack(
+            [
+                np.interp(
+                    new_axis,
+                    self.get_axis(run, step).real,
+                    self.get_wave(trace, run, step),
+                )
+                for run in runs
+            ]
+        )
+
+    def stats(
+        self,
+        trace: str,
+        step: int = 0,
+        axis: ArrayLike | None = None,
+        runs: Iterable[int] | None = None,
+    ) -> dict[str, NDArray[Any]]:
+        """Computes statistics of a trace across the runs, point by point. See stack()
+        for the arguments.
+
+        :return: A dictionary with the 'min', 'max', 'mean' and 'std' arrays
+        :rtype: dict[str, numpy.array]
+        """
+        data = self.stack(trace, step, axis, runs)
+        return {
+            "min": data.min(axis=0),
+            "max": data.max(axis=0),
+            "mean": data.mean(axis=0),
+            "std": data.std(axis=0),
+        }
+
+    def iter_steps(
+        self, traces: str | list[str] | tuple[str, ...] | None = None
+    ) -> Iterator[tuple[int, int, dict[str, ValueType], dict[str, NDArray[Any]]]]:
+        """Reads all the steps of all the runs, one at a time. See RawRead.iter_steps().
+        The files aren't memory mapped, only the data of one step is in memory at a time.
+
+        :param traces: Name or list of names of the traces to read. Default is all
+            traces.
+        :type traces: str | list[str] | tuple[str, ...], optional
+        :return: Iterator on tuples with the run index, the step index, the step
+            parameters and a dictionary with the trace data of that step.
+        :rtype: Iterator[tuple[int, int, dict[str, ValueType], dict[str, NDArray]]]
+        """
+        for run, header in enumerate(self._headers):
+            for step, params, waves in header.iter_steps(traces):
+                yield run, step, params, waves
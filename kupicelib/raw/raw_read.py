@@ -190,26 +190,31 @@ plt.show()  # Creates the matplotlib's interactive window with the plots.
 
 from __future__ import annotations
 
+import ast
+import json
 import logging
 import os
 import re
 from collections import OrderedDict
-from collections.abc import Callable
+from collections.abc import Container, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import pairwise
 from pathlib import Path
-from struct import unpack
-from typing import TYPE_CHECKING, Any, BinaryIO
+from types import CodeType
+from typing import TYPE_CHECKING, Any, BinaryIO, cast
 
 import numpy as np
-from numpy import float32, float64, frombuffer
 from numpy.typing import NDArray
 
-from kupicelib.log.logfile_data import ValueType, try_convert_value
+from kupicelib.log.logfile_data import LTComplex, ValueType, try_convert_value
 
 from ..utils.detect_encoding import EncodingDetectError, detect_encoding
-from .raw_classes import Axis, DummyTrace, SpiceReadException, TraceRead
+from .raw_classes import Axis, DataSet, DummyTrace, SpiceReadException, StepIndex, TraceRead
 
 if TYPE_CHECKING:
     from pandas import DataFrame
+    from pyarrow import Table
 
 __author__ = "Nuno Canto Brum <nuno.brum@gmail.com>"
 __copyright__ = "Copyright 2022, Fribourg Switzerland"
@@ -218,104 +223,196 @@ _logger = logging.getLogger("kupicelib.RawRead")
 
 TraceType = Axis | TraceRead
 
-ScanFunction = Callable[[BinaryIO], float | complex | None]
-
-
-def read_float64(f: BinaryIO) -> float:
-    """Reads a 64-bit float value, normally associated with the plot X axis. The
-    codification is done as follows:
-
-    =====  === === === ===   === === === === bit#   7   6   5   4     3   2   1   0
-    =====  === === === ===   === === === === Byte7  SGM SGE E9  E8    E7  E6  E5  E4
-    Byte6  E3  E2  E1  E0    M51 M50 M49 M48 Byte5  M47 M46 M45 M44   M43 M42 M41 M40
-    Byte4  M39 M38 M37 M36   M35 M34 M33 M32 Byte3  M31 M30 M29 M28   M27 M26 M25 M24
-    Byte2  M23 M22 M21 M20   M19 M18 M17 M16 Byte1  M15 M14 M13 M12   M11 M10 M9  M8
-    Byte0  M7  M6  M5  M4    M3  M2  M1  M0 =====  === === === ===   === === === ===
-
-    Legend:
-
-    SGM - Signal of Mantissa: 0 - Positive 1 - Negative
-
-    SGE - Signal of Exponent: 0 - Positive 1 - Negative
-
-    E[9:0] - Exponent
-
-    M[51:0] - Mantissa.
-
-    :param f: data stream to convert to float value
-    :type f: file
-    :returns: double precision float
-    :rtype: float
+NUMPY_DTYPES: dict[str, np.dtype[Any]] = {
+    "real": np.dtype("<f4"),
+    "double": np.dtype("<f8"),
+    "complex": np.dtype("<c16"),
+}
+"""Little-endian NumPy types of the values stored in binary RAW files, indexed by the
+numerical type of the trace."""
+
+
+def point_dtype(
+    traces: Sequence[DataSet | DummyTrace],
+    selected: Container[int] | None = None,
+) -> np.dtype[Any]:
+    """Builds the structured type of one point of a Normal access binary RAW file. There
+    is one field per trace, named 'f<index>', in the order the traces are stored in the
+    file. Traces not selected don't get a field, they are only accounted as padding, so
+    they are never decoded.
+
+    :param traces: All the traces of the RAW file, including the ones not to be read
+    :type traces: list[DataSet | DummyTrace]
+    :param selected: Indexes of the traces to decode. By default, all the traces that
+        aren't a DummyTrace.
+    :type selected: Container[int], optional
+    :return: The structured type of a point (one record per point)
+    :rtype: numpy.dtype
     """
-    s: bytes = f.read(8)
-    return unpack("d", s)[0]
-
+    names: list[str] = []
+    formats: list[np.dtype[Any]] = []
+    offsets: list[int] = []
+    offset = 0
+    for i, trace in enumerate(traces):
+        dtype = NUMPY_DTYPES[trace.numerical_type]
+        if (not isinstance(trace, DummyTrace)) if selected is None else (i in selected):
+            names.append(f"f{i}")
+            formats.append(dtype)
+            offsets.append(offset)
+        offset += dtype.itemsize
+    return np.dtype(
+        {"names": names, "formats": formats, "offsets": offsets, "itemsize": offset}
+    )
 
-def read_complex(f: BinaryIO) -> complex:
-    """Used to convert a 16 byte stream into a complex data point. Usually used for the
-    .AC simulations. The encoding is the same as for the set_pointB8() but two values
-    are encoded. First one is the real part and the second is the complex part.
 
-    :param f: data stream
-    :type f: file
-    :return: complex value
-    :rtype: complex
+def read_raw_header(
+    raw_file: BinaryIO, chunk_size: int = 65536
+) -> tuple[str, list[str], int]:
+    """Reads the header of a RAW file, that is, all the lines up to and including the
+    'Binary:' or 'Values:' line. The file is read in chunks and the end of the header
+    is searched directly in the encoded bytes, so that only the header is decoded, in a
+    single pass. On return the file is positioned at the start of the data section.
+
+    :param raw_file: RAW file opened in binary mode, positioned at its beginning
+    :type raw_file: BinaryIO
+    :param chunk_size: Number of bytes read at a time, defaults to 65536
+    :type chunk_size: int, optional
+    :raises RuntimeError: If the encoding is not recognized or the data section is not
+        found
+    :return: The encoding of the file, the header lines (without line terminators) and
+        the position in the file where the data section starts.
+    :rtype: tuple[str, list[str], int]
     """
-    s: bytes = f.read(16)
-    re, im = unpack("dd", s)
-    return complex(re, im)
-
-
-def read_float32(f: BinaryIO) -> float:
-    """Reads a 32bit float (single precision) from a stream. This is how most real
-    values are stored in the RAW file. This codification uses 4 bytes as follows:
-
-    =====  === === === ===   === === === === bit#   7   6   5   4     3   2   1   0
-    =====  === === === ===   === === === === Byte3  SGM SGE E6  E5    E4  E3  E2  E1
-    Byte2  E0  M22 M21 M20   M19 M18 M17 M16 Byte1  M15 M14 M13 M12   M11 M10 M9  M8
-    Byte0  M7  M6  M5  M4    M3  M2  M1  M0 =====  === === === ===   === === === ===
-
-    Legend:
-
-    SGM - Signal of Mantissa: 0 - Positive 1 - Negative
+    buffer = bytearray(raw_file.read(6))
+    if buffer.decode(encoding="utf_8", errors="replace") == "Title:":
+        encoding = "utf_8"
+    elif buffer.decode(encoding="utf_16_le", errors="replace") == "Tit":
+        encoding = "utf_16_le"
+    else:
+        raise RuntimeError("Unrecognized encoding")
+    newline = "\n".encode(encoding)
+    sz_enc = len(newline)
+    markers = ["\nBinary:".encode(encoding), "\nValues:".encode(encoding)]
+    carriage_return = "\r".encode(encoding)
+    search_start = 0
+    while True:
+        for marker in markers:
+            pos = buffer.find(marker, search_start)
+            while pos >= 0:
+                eol = buffer.find(newline, pos + len(marker))
+                if eol < 0:
+                    break  # The line isn't complete yet. Need to read more.
+                tail = buffer[pos + len(marker): eol]
+                if pos % sz_enc == 0 and tail in (b"", carriage_return):
+                    raw_file.seek(eol + sz_enc)
+                    header = buffer[:eol].decode(encoding=encoding, errors="replace")
+                    lines = [line.rstrip("\r") for line in header.split("\n")]
+                    return encoding, lines, eol + sz_enc
+                pos = buffer.find(marker, pos + 1)
+        chunk = raw_file.read(chunk_size)
+        if not chunk:
+            raise RuntimeError("Invalid RAW file. No 'Binary:' or 'Values:' section found")
+        # The markers can be split between chunks, so the search restarts a bit behind
+        search_start = max(0, len(buffer) - len(markers[0]) - 2 * sz_enc)
+        buffer += chunk
 
-    SGE - Signal of Exponent: 0 - Positive 1 - Negative
 
-    E[6:0] - Exponent
+def namify(spice_ref: str) -> str:
+    """Translate from V(0,n01) to V__n01__ and I(R1) to I__R1__"""
+    matchobj = re.match(r"(V|I|P)\((\w+)\)", spice_ref)
+    if matchobj:
+        return f"{matchobj.group(1)}__{matchobj.group(2)}__"
+    else:
+        raise NotImplementedError(f'Unrecognized alias type for alias : "{spice_ref}"')
 
-    M[22:0] - Mantissa.
 
-    :param f: data stream to read from
-    :type f: file
-    :returns: float value
-    :rtype: float
-    """
-    s: bytes = f.read(4)
-    return unpack("f", s)[0]
+def pythonize(name: str) -> str | None:
+    """Returns the identifier used for a trace in the alias formulas: V(n01) becomes
+    V__n01__ (see namify()) and names that are already valid identifiers, such as
+    Frequency, are kept. Returns None for names that can't be referenced."""
+    if re.fullmatch(r"(V|I|P)\((\w+)\)", name):
+        return namify(name)
+    return name if name.isidentifier() else None
 
 
-def consume4bytes(f: BinaryIO) -> None:
-    """Used to advance the file pointer 4 bytes."""
-    f.read(4)
+ALIAS_CONSTANTS: dict[str, float] = {
+    "pi": 3.1415926536,
+    "e": 2.7182818285,
+}
+"""Constants that can be used in the alias formulas."""
 
 
-def consume8bytes(f: BinaryIO) -> None:
-    """Used to advance the file pointer 8 bytes."""
-    f.read(8)
+@dataclass
+class CompiledAlias:
+    """A QSPICE alias, with its formula translated to Python and compiled."""
 
+    alias: str
+    formula: str  # The formula, in Python syntax
+    code: CodeType  # The compiled formula
+    references: list[str]  # The identifiers used in the formula
 
-def consume16bytes(f: BinaryIO) -> None:
-    """Used to advance the file pointer 16 bytes."""
-    f.read(16)
 
+def compile_alias(alias: str, formula: str) -> CompiledAlias:
+    """Translates the formula of an alias to Python and compiles it. Constants like mho
+    are removed, V(ref1,ref2) is replaced by (V__ref1__-V__ref2__) and I(ref1) by
+    I__ref1__. The identifiers used are collected, so that only those need to be
+    provided for evaluating the formula.
 
-def namify(spice_ref: str) -> str:
-    """Translate from V(0,n01) to V__n01__ and I(R1) to I__R1__"""
-    matchobj = re.match(r"(V|I|P)\((\w+)\)", spice_ref)
-    if matchobj:
-        return f"{matchobj.group(1)}__{matchobj.group(2)}__"
-    else:
-        raise NotImplementedError(f'Unrecognized alias type for alias : "{spice_ref}"')
+    :param alias: Name of the alias
+    :type alias: str
+    :param formula: Formula of the alias, as written in the RAW file
+    :type formula: str
+    :return: The compiled alias
+    :rtype: CompiledAlias
+    """
+    # converting V(ref1, ref2) to (V(ref1)-V(ref2))
+    formula = re.sub(r"V\((\w+),0\)", r"V(\1)", formula)
+    formula = re.sub(r"V\(0,(\w+)\)", r"(-V(\1))", formula)
+    formula = re.sub(r"V\((\w+),(\w+)\)", r"(V(\1)-V(\2))", formula)
+    # converting V(ref1) to V__ref1__ and I(ref1) to I__ref1__
+    formula = re.sub(r"(V|I|P)\((\w+)\)", r"\1__\2__", formula)
+
+    # removing the mho or other constants ex:  (0.0001mho*V(0,n01)) ->
+    # (0.0001*V(0,n01))
+    formula = re.sub(r"(\d+)((mho)|(ohm))", r"\1", formula)
+    try:
+        tree = ast.parse(formula, mode="eval")
+    except SyntaxError as err:
+        raise RuntimeError(f'Invalid formula "{formula}" for alias "{alias}"') from err
+    references = sorted({node.id for node in ast.walk(tree) if isinstance(node, ast.Name)})
+    return CompiledAlias(alias, formula, compile(tree, f"<alias {alias}>", "eval"), references)
+
+
+def _to_json(value: Any) -> Any:
+    """Converts a header value into a JSON value, for the cache of RawRead. The complex
+    values are tagged, so that _from_json() restores them with the same type.
+
+    :raises TypeError: If the value can't be stored in JSON
+    """
+    if value is None or isinstance(value, int | float | str):
+        return value
+    if isinstance(value, LTComplex):
+        return {"__ltcomplex__": value.strvalue}
+    if isinstance(value, complex):
+        return {"__complex__": [value.real, value.imag]}
+    if isinstance(value, list | tuple):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    raise TypeError(f"Can't store a value of type {type(value).__name__} in the cache")
+
+
+def _from_json(value: Any) -> Any:
+    """Reverts _to_json()."""
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    if isinstance(value, dict):
+        if list(value) == ["__ltcomplex__"]:
+            return LTComplex(value["__ltcomplex__"])
+        if list(value) == ["__complex__"]:
+            return complex(*value["__complex__"])
+        return {key: _from_json(item) for key, item in value.items()}
+    return value
 
 
 class RawRead:
@@ -336,6 +433,28 @@ class RawRead:
     :type dialect: str
     :key headeronly: Used to only load the header information and skip the trace data
         entirely. Use `headeronly=True`.
+    :key mmap: Memory maps the binary section of the file instead of reading it. Only
+        the header is parsed when the object is created, and the trace data is only
+        loaded from disk when it is accessed. On Normal access files the traces are
+        strided views on the mapped data, on Fast Access files they are contiguous
+        slices. The trace data is read-only and the file is kept open as long as the
+        traces are alive. On stepped files, the steps are located on the first access
+        to a step. Use `mmap=True`.
+    :key cache: Keeps a columnar copy of the parsed data next to the RAW file, in a
+        directory with the same name plus '.cache' (see `cache_path()`). The first
+        time, the RAW file is parsed normally and the cache is written. Afterwards, if
+        the RAW file didn't change (same size and modification time) and the cache
+        holds the requested traces, the data is loaded from the cache, including the
+        step information, without parsing neither the RAW file nor the .log file. When
+        combined with `mmap=True`, the cached traces are memory mapped. Use
+        `cache=True`.
+    :key workers: Number of threads used to read the binary data. On Normal access
+        files the points are split in ranges, on Fast Access files the traces are
+        shared among the threads. Each thread reads its part directly into the trace
+        arrays. Only the decode of the binary section is parallel: the conversions
+        done when a wave is accessed (like the absolute value of the time axis) and the
+        evaluation of the aliases still run on the calling thread. Useful for huge
+        files on machines with many cores. Default is 1.
     """
 
     header_lines = (
@@ -374,6 +493,9 @@ class RawRead:
 
         This is either set on init, or detected
         """
+        self._compiled_aliases: dict[str, CompiledAlias] = {}
+        self._alias_traces: dict[str, TraceRead] = {}
+        self._step_index: StepIndex | None = None
 
         options: dict[str, object] = dict(kwargs)
         self.verbose = bool(options.get("verbose", True))
@@ -389,20 +511,18 @@ class RawRead:
             raw_filename_path
         ).st_size  # Get the file size in order to know the data size
         header_only = bool(options.get("headeronly", False))
+        memory_map = bool(options.get("mmap", False))
+        workers = int(cast(int | str, options.get("workers", 1)))
+        use_cache = bool(options.get("cache", False)) and not header_only
+        if use_cache and self._load_cache(raw_filename_path, traces_to_read, dialect, memory_map):
+            if self.verbose:
+                _logger.info(f"Loaded '{raw_filename_path}' from its cache")
+            return
 
         with open(raw_filename_path, "rb") as raw_file:
 
-            ch = raw_file.read(6)
-            if ch.decode(encoding="utf_8") == "Title:":
-                self.encoding = "utf_8"
-                sz_enc = 1
-                line = "Title:"
-            elif ch.decode(encoding="utf_16_le") == "Tit":
-                self.encoding = "utf_16_le"
-                sz_enc = 2
-                line = "Tit"
-            else:
-                raise RuntimeError("Unrecognized encoding")
+            self.encoding, header, binary_start = read_raw_header(raw_file)
+            self.raw_type = header[-1]
             if self.verbose:
                 _logger.debug(f"Reading the file with encoding: '{self.encoding}'")
             # Storing the filename as part of the dictionary
@@ -410,23 +530,6 @@ class RawRead:
                 Filename=str(raw_filename_path)
             )
             self.backannotations: list[str] = []  # Storing backannotations
-            header: list[str] = []
-            binary_start = 6
-            while True:
-                ch_str = raw_file.read(sz_enc).decode(
-                    encoding=self.encoding, errors="replace"
-                )
-                binary_start += sz_enc
-                if ch_str == "\n":
-                    if self.encoding == "utf_8":  # must remove the \r
-                        line = line.rstrip("\r")
-                    header.append(line)
-                    if line in ("Binary:", "Values:"):
-                        self.raw_type = line
-                        break
-                    line = ""
-                else:
-                    line += ch_str
             # QSpice defines aliases for some of the traces that can be computed from
             # other traces.
             self.aliases: dict[str, str] = ({})
@@ -518,26 +621,26 @@ class RawRead:
                         )
                     autodetected_dialect = "xyce"
 
-        if (
-            dialect
-            and autodetected_dialect is not None
-            and dialect != autodetected_dialect
-        ):
-            _logger.warning(
-                "Dialect specified as %s, but the file seems to be from %s. "
-                "Trying to read it anyway.",
-                dialect,
-                autodetected_dialect,
-            )
-        if not dialect:
-            # no dialect given. Take the autodetected version
-            dialect = autodetected_dialect
-
-            # Do I have something?
-            if not dialect:
-                raise RuntimeError(
-                    "RAW file dialect is not specified and could not be auto detected."
+            if (
+                dialect
+                and autodetected_dialect is not None
+                and dialect != autodetected_dialect
+            ):
+                _logger.warning(
+                    "Dialect specified as %s, but the file seems to be from %s. "
+                    "Trying to read it anyway.",
+                    dialect,
+                    autodetected_dialect,
                 )
+            if not dialect:
+                # no dialect given. Take the autodetected version
+                dialect = autodetected_dialect
+
+                # Do I have something?
+                if not dialect:
+                    raise RuntimeError(
+                        "RAW file dialect is not specified and could not be auto detected."
+                    )
 
             # and tell the outside world
             self.dialect = dialect
@@ -615,6 +718,14 @@ class RawRead:
                 self._traces.append(trace)
                 ivar += 1
 
+            # Layout of the binary section, kept for reading the file step by step
+            self._has_axis = has_axis
+            self._data_start = binary_start
+            self._variables = [
+                DummyTrace(trace.name, trace.whattype, self.nPoints, trace.numerical_type)
+                for trace in self._traces
+            ]
+
             if traces_to_read is None or len(self._traces) == 0:
                 # The read is stopped here if there is nothing to read.
                 return
@@ -638,30 +749,13 @@ class RawRead:
                 self.block_size = (raw_file_size - binary_start) // self.nPoints
                 self.data_size = self.block_size // len(self._traces)
 
-                scan_functions: list[ScanFunction] = []
                 calc_block_size = 0
                 for trace in self._traces:
-                    if trace.numerical_type == "double":
-                        calc_block_size += 8
-                        fun: ScanFunction = (
-                            consume8bytes if isinstance(trace, DummyTrace) else read_float64
-                        )
-                    elif trace.numerical_type == "complex":
-                        calc_block_size += 16
-                        fun = (
-                            consume16bytes if isinstance(trace, DummyTrace) else read_complex
-                        )
-                    elif trace.numerical_type == "real":  # data size is only 4 bytes
-                        calc_block_size += 4
-                        fun = (
-                            consume4bytes if isinstance(trace, DummyTrace) else read_float32
-                        )
-
-                    else:
+                    if trace.numerical_type not in NUMPY_DTYPES:
                         raise RuntimeError(
                             f"Invalid data type {trace.numerical_type} for trace {trace.name}"
                         )
-                    scan_functions.append(fun)
+                    calc_block_size += NUMPY_DTYPES[trace.numerical_type].itemsize
 
                 if check_raw_size and calc_block_size != self.block_size:
                     raise RuntimeError(
@@ -673,80 +767,101 @@ class RawRead:
                     if self.verbose:
                         _logger.debug("Binary RAW file with Fast access")
                     # Fast access means that the traces are grouped together.
-                    for var in self._traces:
-                        if isinstance(var, DummyTrace):
-                            # TODO: replace this by a seek
-                            raw_file.read(self.nPoints * self.data_size)
-                            continue
-
-                        if var.numerical_type == "double":
-                            s = raw_file.read(self.nPoints * 8)
-                            var.data = frombuffer(s, dtype=float64)
-                        elif var.numerical_type == "complex":
-                            s = raw_file.read(self.nPoints * 16)
-                            var.data = frombuffer(s, dtype=complex)
-                        elif var.numerical_type == "real":
-                            s = raw_file.read(self.nPoints * 4)
-                            var.data = frombuffer(s, dtype=float32)
-                        else:
-                            raise RuntimeError(
-                                f"Invalid data type {var.numerical_type} for trace {var.name}"
-                            )
+                    if memory_map:
+                        # Each trace is a contiguous slice of the mapped data section
+                        data_section = np.memmap(
+                            raw_filename_path, dtype=np.uint8, mode="r", offset=binary_start
+                        )
+                        offset = 0
+                        for var in self._traces:
+                            dtype = NUMPY_DTYPES[var.numerical_type]
+                            size = self.nPoints * dtype.itemsize
+                            if not isinstance(var, DummyTrace):
+                                var.data = data_section[offset: offset + size].view(dtype)
+                            offset += size
+                    elif workers > 1:
+                        self._read_binary_in_parallel(raw_filename_path, binary_start, workers)
+                    else:
+                        for var in self._traces:
+                            dtype = NUMPY_DTYPES[var.numerical_type]
+                            if isinstance(var, DummyTrace):
+                                # Traces not requested are skipped without reading them
+                                raw_file.seek(self.nPoints * dtype.itemsize, os.SEEK_CUR)
+                                continue
+                            var.data = np.fromfile(raw_file, dtype=dtype, count=self.nPoints)
+                            if len(var.data) != self.nPoints:
+                                raise RuntimeError(
+                                    "Invalid data: end of file encountered too early"
+                                )
                 else:
                     if self.verbose:
                         _logger.debug("Binary RAW file with Normal access")
                     # This is the default save after a simulation where the traces are
-                    # scattered
-                    for point in range(self.nPoints):
+                    # scattered. The whole block is decoded in one go as an array of
+                    # records, and each trace gets a (strided) view on its own field.
+                    if workers > 1 and not memory_map:
+                        self._read_binary_in_parallel(raw_filename_path, binary_start, workers)
+                    else:
+                        if memory_map:
+                            block = np.memmap(
+                                raw_filename_path,
+                                dtype=point_dtype(self._traces),
+                                mode="r",
+                                offset=binary_start,
+                                shape=(self.nPoints,),
+                            )
+                        else:
+                            block = np.fromfile(
+                                raw_file, dtype=point_dtype(self._traces), count=self.nPoints
+                            )
+                        if len(block) != self.nPoints:
+                            raise RuntimeError(
+                                "Invalid data: end of file encountered too early"
+                            )
                         for i, var in enumerate(self._traces):
-                            numeric_value: float | complex | None = scan_functions[i](raw_file)
-                            if (
-                                numeric_value is not None
-                                and not isinstance(var, DummyTrace)
-                            ):
-                                var.data[point] = numeric_value
+                            if not isinstance(var, DummyTrace):
+                                var.data = block[f"f{i}"]
 
             elif self.raw_type == "Values:":
                 if self.verbose:
                     _logger.debug("ASCII RAW File")
-                # Will start the reading of ASCII Values
-                for point in range(self.nPoints):
-                    line_nr = 0
-                    while line_nr < len(self._traces):
-                        line = raw_file.readline().decode(
-                            encoding=self.encoding, errors="ignore"
-                        )
-                        if len(line) == 0:
-                            raise RuntimeError(
-                                "Invalid data: end of file encountered too early"
-                            )
-                        if len(line.strip()) == 0:
-                            continue  # skip empty lines
-                        if line_nr == 0:
-                            s_point = line.split("\t", 1)[0]
-
-                            if point != int(s_point):
-                                raise RuntimeError(
-                                    "Invalid data: point is not in sequence "
-                                    f"({point} != {int(s_point)})"
-                                )
-                            value = line[len(s_point): -1]
+                if memory_map:
+                    _logger.warning("ASCII RAW files can't be memory mapped. Reading it all.")
+                # Will start the reading of ASCII Values. Each point is written as its
+                # index followed by the values of all traces, complex values as 're,im'.
+                # The whole section is parsed at once into a (points x values) table.
+                values_per_trace = [
+                    2 if var.numerical_type == "complex" else 1 for var in self._traces
+                ]
+                values_per_point = 1 + sum(values_per_trace)
+                count = self.nPoints * values_per_point
+                text = raw_file.read().decode(encoding=self.encoding, errors="ignore")
+                # Some Xyce files have a text section after the data, which is left
+                # unsplit at the end of the token list.
+                tokens = text.replace(",", " ").split(maxsplit=count)[:count]
+                if len(tokens) != count:
+                    raise RuntimeError("Invalid data: end of file encountered too early")
+                try:
+                    values = np.array(tokens, dtype=np.float64)
+                except ValueError as err:
+                    raise RuntimeError(f"Invalid data: {err}") from err
+                values = values.reshape(self.nPoints, values_per_point)
+                point_numbers = values[:, 0]
+                out_of_sequence = np.flatnonzero(point_numbers != np.arange(self.nPoints))
+                if len(out_of_sequence):
+                    point = int(out_of_sequence[0])
+                    raise RuntimeError(
+                        "Invalid data: point is not in sequence "
+                        f"({point} != {int(point_numbers[point])})"
+                    )
+                column = 1
+                for var, n_values in zip(self._traces, values_per_trace, strict=True):
+                    if not isinstance(var, DummyTrace):
+                        if n_values == 2:
+                            var.data = values[:, column] + 1j * values[:, column + 1]
                         else:
-                            value = line[:-1]
-
-                        var = self._traces[line_nr]
-                        if not isinstance(var, DummyTrace):
-                            if var.numerical_type == "complex":
-                                v = value.split(",")
-                                if len(v) != 2:
-                                    raise RuntimeError(
-                                        "Invalid data for trace "
-                                        f"{var.name}: {value} is not a complex value"
-                                    )
-                                var.data[point] = complex(float(v[0]), float(v[1]))
-                            else:
-                                var.data[point] = float(value)
-                        line_nr += 1
+                            var.data = values[:, column].astype(var.data.dtype)
+                    column += n_values
             else:
                 raise SpiceReadException(f'Unsupported RAW File. "{self.raw_type}"')
 
@@ -772,18 +887,82 @@ class RawRead:
                     f"{err!s}\nError in auto-detecting steps in '{raw_filename_path}'"
                 )
                 if has_axis and self.axis is not None:
-                    number_of_steps = 0
-                    for v in self.axis.data:
-                        if v == self.axis.data[0]:
-                            number_of_steps += 1
+                    number_of_steps = int(
+                        np.count_nonzero(self.axis.data == self.axis.data[0])
+                    )
                 else:
                     number_of_steps = self.nPoints
                 self.steps = [{"run": i + 1} for i in range(number_of_steps)]
 
             if self.steps is not None and has_axis and self.axis is not None:
                 # Individual access to the Trace Classes, this information is stored in
-                # the Axis
-                self.axis.set_steps(self.steps)
+                # the Axis. A memory mapped axis is only scanned when a step is accessed.
+                self.axis.set_steps(self.steps, lazy=memory_map)
+
+        if use_cache and traces_to_read is not None:
+            try:
+                self._save_cache(raw_filename_path, traces_to_read == "*")
+            except (OSError, TypeError) as err:
+                _logger.warning(f"Unable to write the cache of '{raw_filename_path}': {err!s}")
+
+    def _read_binary_in_parallel(self, filename: Path, data_start: int, workers: int) -> None:
+        """Reads the binary section of the RAW file using a pool of threads, each one with
+        its own file handle, directly into preallocated arrays. On Fast Access files each
+        task reads one trace, on Normal access files each task decodes a range of points.
+        NumPy and the file reads release the GIL, so the tasks run concurrently. The data
+        is stored as found in the file, the conversions are left to the wave accessors.
+
+        :param filename: The RAW file
+        :type filename: Path
+        :param data_start: Position in the file where the binary section starts
+        :type data_start: int
+        :param workers: Number of threads
+        :type workers: int
+        """
+        selected = [
+            (i, var) for i, var in enumerate(self._traces) if not isinstance(var, DummyTrace)
+        ]
+        for _, var in selected:
+            var.data = np.empty(self.nPoints, dtype=NUMPY_DTYPES[var.numerical_type])
+
+        def read_trace(offset: int, data: NDArray[Any]) -> None:
+            with open(filename, "rb") as f:
+                f.seek(offset)
+                if f.readinto(memoryview(data).cast("B")) != data.nbytes:
+                    raise RuntimeError("Invalid data: end of file encountered too early")
+
+        point = point_dtype(self._traces)
+
+        def read_points(start: int, stop: int) -> None:
+            with open(filename, "rb") as f:
+                f.seek(data_start + start * point.itemsize)
+                block = np.fromfile(f, dtype=point, count=stop - start)
+            if len(block) != stop - start:
+                raise RuntimeError("Invalid data: end of file encountered too early")
+            for i, var in selected:
+                var.data[start:stop] = block[f"f{i}"]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            if "fastaccess" in self.flags:
+                sizes = [
+                    self.nPoints * NUMPY_DTYPES[var.numerical_type].itemsize
+                    for var in self._traces
+                ]
+                offsets = np.cumsum([0, *sizes[:-1]])
+                futures = [
+                    executor.submit(read_trace, data_start + int(offsets[i]), var.data)
+                    for i, var in selected
+                ]
+            else:
+                # A few chunks per worker, to balance the load
+                bounds = np.linspace(0, self.nPoints, min(self.nPoints, 4 * workers) + 1)
+                bounds = bounds.astype(np.int64)
+                futures = [
+                    executor.submit(read_points, int(start), int(stop))
+                    for start, stop in pairwise(bounds)
+                ]
+            for future in futures:
+                future.result()  # Raises the exceptions of the tasks
 
     def get_raw_property(
         self, property_name: str | None = None
@@ -823,51 +1002,77 @@ class RawRead:
         # parsing the aliases needs to be done before implementing this.
         return [trace.name for trace in self._traces] + list(self.aliases.keys())
 
-    def _compute_alias(self, alias: str) -> TraceRead:
-        """Constants like mho need to be replaced and  V(ref1,ref2) need to be replaced
-        by (V(ref1)-V(ref2)) and after that the aliases can be computed, using the
-        eval() function."""
-        formula = self.aliases[alias]
-        # converting V(ref1, ref2) to (V(ref1)-V(ref2))
-        formula = re.sub(r"V\((\w+),0\)", r"V(\1)", formula)
-        formula = re.sub(r"V\(0,(\w+)\)", r"(-V(\1))", formula)
-        formula = re.sub(r"V\((\w+),(\w+)\)", r"(V(\1)-V(\2))", formula)
-        # converting V(ref1) to V__ref1__ and I(ref1) to I__ref1__
-        formula = re.sub(r"(V|I|P)\((\w+)\)", r"\1__\2__", formula)
-
-        # removing the mho or other constants ex:  (0.0001mho*V(0,n01)) ->
-        # (0.0001*V(0,n01))
-        formula = re.sub(r"(\d+)((mho)|(ohm))", r"\1", formula)
+    def _alias_operand(self, name: str, alias: str, resolving: list[str]) -> object:
+        """Returns the value of an identifier used in the formula of an alias. It can
+        be a trace, another alias, a .param or one of the constants pi and e.
+        `resolving` holds the aliases being computed, to detect circular references."""
+        for trace in self._traces:
+            if not isinstance(trace, DummyTrace) and pythonize(trace.name) == name:
+                return trace.data
+        for other in self.aliases:
+            if other != alias and pythonize(other) == name:
+                if other in resolving:
+                    cycle = " -> ".join([*resolving[resolving.index(other):], other])
+                    raise ValueError(f"Circular reference between aliases: {cycle}")
+                return self._compute_alias(other, resolving).data
+        if name in self.spice_params:
+            return float(self.spice_params[name])
+        if name in ALIAS_CONSTANTS:
+            return ALIAS_CONSTANTS[name]
+        raise RuntimeError(
+            f'Error computing alias "{alias}": "{name}" is not a trace, a parameter nor a '
+            "constant. Maybe the trace wasn't read."
+        )
+
+    def _compute_alias(self, alias: str, resolving: list[str] | None = None) -> TraceRead:
+        """Computes the alias, using its compiled formula (see compile_alias()). Only the
+        traces that are referenced in the formula are looked up. The result is cached,
+        so each alias is only computed once.
+
+        :raises ValueError: If the alias refers to itself through other aliases
+        """
+        if alias in self._alias_traces:
+            return self._alias_traces[alias]
+        if alias not in self._compiled_aliases:
+            self._compiled_aliases[alias] = compile_alias(alias, self.aliases[alias])
+        compiled = self._compiled_aliases[alias]
+        resolving = [*(resolving or []), alias]
+        local_vars = {
+            name: self._alias_operand(name, alias, resolving) for name in compiled.references
+        }
+        try:
+            computed = np.asarray(eval(compiled.code, local_vars))
+        except Exception as err:
+            raise RuntimeError(
+                f'Error computing alias "{alias}" with formula "{compiled.formula}"'
+            ) from err
         if alias.startswith("I("):
             whattype = "current"
         elif alias.startswith("V("):
             whattype = "voltage"
         else:
-            raise NotImplementedError(f'Unrecognized alias type for alias : "{alias}"')
-        trace = TraceRead(alias, whattype, self.nPoints, self.axis, "double")
-        local_vars: dict[str, object] = {
-            "pi": 3.1415926536,
-            "e": 2.7182818285,
-        }  # This is the dictionary that will be used to compute the alias
-        local_vars.update(
-            {name: float(value) for name, value in self.spice_params.items()}
+            whattype = "param"
+        trace = TraceRead(
+            alias,
+            whattype,
+            0,
+            self.axis if self._has_axis else None,
+            "complex" if np.iscomplexobj(computed) else "double",
         )
-        local_vars.update(
-            {
-                namify(trace.name): trace.data
-                for trace in self._traces
-                if not isinstance(trace, DummyTrace)
-            }
-        )
-        try:
-            computed = eval(formula, local_vars)
-        except Exception as err:
-            raise RuntimeError(
-                f'Error computing alias "{alias}" with formula "{formula}"'
-            ) from err
-        trace.data = np.asarray(computed)
+        trace.data = computed
+        self._alias_traces[alias] = trace
         return trace
 
+    def materialize_aliases(self) -> dict[str, TraceRead]:
+        """Computes all the aliases at once. The computed aliases are cached, so that
+        later calls to get_trace(), get_wave() or the export functions don't compute them
+        again.
+
+        :return: The computed aliases, indexed by their names
+        :rtype: dict[str, TraceRead]
+        """
+        return {alias: self._compute_alias(alias) for alias in self.aliases}
+
     def get_trace(self, trace_ref: str | int) -> TraceType:
         """Retrieves the trace with the requested name (trace_ref).
 
@@ -1049,10 +1254,177 @@ class RawRead:
                 "Unsupported simulator. Only LTspice and QSPICE are supported."
             )
 
+    CACHE_VERSION = 2
+    """Version of the cache layout. Caches written with other versions are ignored."""
+
+    @staticmethod
+    def cache_path(raw_filename: str | Path) -> Path:
+        """Returns the directory where the cache of a RAW file is stored. It sits next to
+        the RAW file and has the same name, with '.cache' appended.
+
+        :param raw_filename: The RAW file
+        :type raw_filename: str | Path
+        :return: The cache directory
+        :rtype: Path
+        """
+        raw_filename = Path(raw_filename)
+        return raw_filename.with_name(raw_filename.name + ".cache")
+
+    def _save_cache(self, raw_filename: Path, all_traces: bool) -> None:
+        """Writes the loaded traces into the cache directory, one .npy file per trace,
+        along with a meta.json file containing everything else that is needed to rebuild
+        this object. The meta.json is written last, so that an interrupted write never
+        leaves a valid cache behind."""
+        cache_dir = self.cache_path(raw_filename)
+        cache_dir.mkdir(exist_ok=True)
+        meta_file = cache_dir / "meta.json"
+        meta_file.unlink(missing_ok=True)
+        names = [var.name for var in self._variables]
+        traces = []
+        for trace in self._traces:
+            if isinstance(trace, DummyTrace):
+                continue
+            index = names.index(trace.name)
+            np.save(cache_dir / f"trace_{index}.npy", np.asarray(trace.data))
+            traces.append(index)
+        stat = os.stat(raw_filename)
+        meta = {
+            "version": self.CACHE_VERSION,
+            "source_size": stat.st_size,
+            "source_mtime": stat.st_mtime_ns,
+            "all_traces": all_traces,
+            "traces": traces,
+            "variables": [
+                [var.name, var.whattype, var.numerical_type] for var in self._variables
+            ],
+            "dialect": self.dialect,
+            "encoding": self.encoding,
+            "raw_type": self.raw_type,
+            "raw_params": _to_json(self.raw_params),
+            "backannotations": _to_json(self.backannotations),
+            "aliases": _to_json(self.aliases),
+            "spice_params": _to_json(self.spice_params),
+            "has_axis": self._has_axis,
+            "data_start": self._data_start,
+            "block_size": getattr(self, "block_size", None),
+            "data_size": getattr(self, "data_size", None),
+            "steps": _to_json(self.steps),
+            "step_offsets": (
+                self.axis.step_offsets.tolist()
+                if self.axis is not None and self.axis.step_info is not None
+                else None
+            ),
+        }
+        with open(meta_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def _load_cache(
+        self,
+        raw_filename: Path,
+        traces_to_read: str | list[str] | tuple[str, ...] | None,
+        dialect: str | None,
+        memory_map: bool,
+    ) -> bool:
+        """Rebuilds this object from the cache of the RAW file, if there is one that is
+        up-to-date and contains the requested traces.
+
+        :return: True if the object was loaded from the cache, False otherwise
+        :rtype: bool
+        """
+        meta_file = self.cache_path(raw_filename) / "meta.json"
+        try:
+            with open(meta_file, encoding="utf-8") as f:
+                meta = json.load(f)
+            stat = os.stat(raw_filename)
+        except (OSError, ValueError):
+            return False
+        if (
+            meta.get("version") != self.CACHE_VERSION
+            or meta["source_size"] != stat.st_size
+            or meta["source_mtime"] != stat.st_mtime_ns
+            or (dialect and dialect.lower() != meta["dialect"])
+            or traces_to_read is None
+        ):
+            return False
+        variables = meta["variables"]
+        names = [name for name, _, _ in variables]
+        if traces_to_read == "*":
+            if not meta["all_traces"]:
+                return False
+            to_read = set(meta["traces"])
+        else:
+            wanted = [traces_to_read] if isinstance(traces_to_read, str) else traces_to_read
+            to_read = {0} | {names.index(name) for name in wanted if name in names}
+            if not to_read.issubset(meta["traces"]):
+                return False
+
+        try:
+            arrays = {
+                index: np.load(
+                    self.cache_path(raw_filename) / f"trace_{index}.npy",
+                    mmap_mode="r" if memory_map else None,
+                )
+                for index in sorted(to_read)
+            }
+        except (OSError, ValueError):
+            return False
+
+        self.dialect = meta["dialect"]
+        self.encoding = meta["encoding"]
+        self.raw_type = meta["raw_type"]
+        self.raw_params = OrderedDict(_from_json(meta["raw_params"]))
+        self.raw_params["Filename"] = str(raw_filename)
+        self.backannotations = _from_json(meta["backannotations"])
+        self.aliases = _from_json(meta["aliases"])
+        self.spice_params = _from_json(meta["spice_params"])
+        self.nPoints = int(self.raw_params["No. Points"])
+        self.nVariables = int(self.raw_params["No. Variables"])
+        self.flags = self.raw_params["Flags"].split()
+        self._has_axis = meta["has_axis"]
+        self._data_start = meta["data_start"]
+        if meta["block_size"] is not None:
+            self.block_size = meta["block_size"]
+            self.data_size = meta["data_size"]
+        self._variables = [
+            DummyTrace(name, whattype, self.nPoints, numerical_type)
+            for name, whattype, numerical_type in variables
+        ]
+        self.steps = _from_json(meta["steps"])
+        self._traces = []
+        self.axis = None
+        for index, data in arrays.items():
+            name, whattype, numerical_type = variables[index]
+            if index == 0:
+                self.axis = Axis(name, whattype, 0, numerical_type)
+                trace: Axis | TraceRead = self.axis
+            else:
+                trace = TraceRead(
+                    name, whattype, 0, self.axis if self._has_axis else None, numerical_type
+                )
+            trace.data = data
+            self._traces.append(trace)
+        if self.axis is not None and meta["step_offsets"] is not None:
+            self.axis.step_info = self.steps
+            self.axis.step_offsets = np.array(meta["step_offsets"], dtype=np.int64)
+        return True
+
     def __getitem__(self, item: str | int) -> TraceType:
         """Helper function to access traces by using the [ ] operator."""
         return self.get_trace(item)
 
+    @property
+    def step_index(self) -> StepIndex:
+        """Column-wise index of the step information. It is built on first use and
+        rebuilt whenever the number of steps changes.
+
+        :return: The step index
+        :rtype: StepIndex
+        """
+        steps = self.steps or []
+        if self._step_index is None or self._step_index.n_steps != len(steps):
+            self._step_index = StepIndex(cast(list[dict[str, Any]], steps))
+        return self._step_index
+
     def get_steps(self, **kwargs: object) -> list[int]:
         """Returns the steps that correspond to the query set in the `**kwargs`
         parameters. Example: ::
@@ -1065,6 +1437,10 @@ class RawRead:
         correspondence between step numbers and .STEP information is stored on the .log
         file.
 
+        Ranges and tolerances can be queried by adding an operator to the parameter
+        name, for example ``raw_read.get_steps(V5__gt=1.0, TEMP__approx=(25, 0.1))``.
+        See StepIndex for the list of operators.
+
         :key kwargs: key-value arguments in which the key correspond to a stepped
             parameter or source name, and the value is the stepped value.
         :return: The steps that match the query
@@ -1074,27 +1450,169 @@ class RawRead:
             return [0]
 
         if kwargs:
-            matching_steps: list[int] = []
-            for idx, step_dict in enumerate(self.steps):
-                for key, expected_value in kwargs.items():
-                    actual_value = step_dict.get(key, None)
-                    if actual_value is None or expected_value != actual_value:
-                        break
-                else:
-                    matching_steps.append(idx)
-            return matching_steps
+            return cast(list[int], self.step_index.query(**kwargs).tolist())
 
         return list(range(len(self.steps)))
 
+    def iter_steps(
+        self, traces: str | list[str] | tuple[str, ...] | None = None
+    ) -> Iterator[tuple[int, dict[str, ValueType], dict[str, NDArray[Any]]]]:
+        """Reads the RAW file one step at a time. Only the byte range of the step being
+        yielded is read from disk, so the memory used is the one of a single step,
+        regardless of how the RAW file was opened. Even a `RawRead` created with
+        `headeronly=True` can be used. Example: ::
+
+            raw = RawRead("montecarlo.raw", headeronly=True)
+            for step, params, waves in raw.iter_steps(["V(out)"]):
+                print(step, params, waves["V(out)"].max())
+
+        The step boundaries are found using only the axis trace. The first trace (the
+        axis) is always included in the yielded traces.
+
+        :param traces: Name or list of names of the traces to read. Default is all
+            traces.
+        :type traces: str | list[str] | tuple[str, ...], optional
+        :raises SpiceReadException: If the RAW file isn't a binary file
+        :raises IndexError: If a trace doesn't exist in the RAW file
+        :raises RuntimeError: If the RAW file ends before the last step is complete
+        :return: Iterator on tuples with the step index, the step parameters and a
+            dictionary with the trace data of that step.
+        :rtype: Iterator[tuple[int, dict[str, ValueType], dict[str, NDArray]]]
+        """
+        if self.raw_type != "Binary:":
+            raise SpiceReadException("Steps can only be streamed from binary RAW files")
+        filename = Path(self.raw_params["Filename"])
+        names = [var.name.casefold() for var in self._variables]
+        if traces is None:
+            selected = list(range(len(self._variables)))
+        else:
+            selected = [0]
+            for trace_ref in [traces] if isinstance(traces, str) else traces:
+                if trace_ref.casefold() not in names:
+                    raise IndexError(f'{self} doesn\'t contain trace "{trace_ref}"')
+                index = names.index(trace_ref.casefold())
+                if index not in selected:
+                    selected.append(index)
+
+        fastaccess = "fastaccess" in self.flags
+        if not self._has_axis:
+            # Operating Point and Transfer Function: each point is a step
+            starts = np.arange(self.nPoints)
+        elif "stepped" in self.flags:
+            axis_dtype = NUMPY_DTYPES[self._variables[0].numerical_type]
+            # Only the points present on disk are mapped, so that a truncated file is
+            # reported when its last step is read, and not by the memory map.
+            data_size = filename.stat().st_size - self._data_start
+            if fastaccess:
+                axis_data = np.memmap(
+                    filename,
+                    dtype=axis_dtype,
+                    mode="r",
+                    offset=self._data_start,
+                    shape=(min(self.nPoints, data_size // axis_dtype.itemsize),),
+                )
+            else:
+                axis_point = point_dtype(self._variables, [0])
+                axis_data = np.memmap(
+                    filename,
+                    dtype=axis_point,
+                    mode="r",
+                    offset=self._data_start,
+                    shape=(min(self.nPoints, data_size // axis_point.itemsize),),
+                )["f0"]
+            starts = np.flatnonzero(axis_data == axis_data[0])
+            del axis_data
+        else:
+            starts = np.zeros(1, dtype=np.int64)
+        ends = np.append(starts[1:], self.nPoints)
+
+        if "stepped" in self.flags:
+            if self.steps is None:
+                try:
+                    self._load_step_information(filename)
+                except SpiceReadException as err:
+                    _logger.warning(f"{err!s}\nError in auto-detecting steps in '{filename}'")
+            if self.steps is not None and len(self.steps) == len(starts):
+                step_info = self.steps
+            else:
+                step_info = [{"run": i + 1} for i in range(len(starts))]
+        else:
+            step_info = [{} for _ in range(len(starts))]
+
+        point = point_dtype(self._variables, selected)
+        with open(filename, "rb") as raw_file:
+            for step, (start, end) in enumerate(zip(starts, ends, strict=True)):
+                count = int(end - start)
+                waves: dict[str, NDArray[Any]] = {}
+                if fastaccess:
+                    offset = self._data_start
+                    for i, var in enumerate(self._variables):
+                        dtype = NUMPY_DTYPES[var.numerical_type]
+                        if i in selected:
+                            raw_file.seek(offset + int(start) * dtype.itemsize)
+                            waves[var.name] = np.fromfile(raw_file, dtype=dtype, count=count)
+                            if len(waves[var.name]) != count:
+                                raise RuntimeError(
+                                    "Invalid data: end of file encountered too early"
+                                )
+                        offset += self.nPoints * dtype.itemsize
+                else:
+                    raw_file.seek(self._data_start + int(start) * point.itemsize)
+                    block = np.fromfile(raw_file, dtype=point, count=count)
+                    if len(block) != count:
+                        raise RuntimeError("Invalid data: end of file encountered too early")
+                    for i in selected:
+                        waves[self._variables[i].name] = block[f"f{i}"]
+                if self._variables[0].name == "time":
+                    # LTSpice sometimes writes negative time values. See Axis.get_wave()
+                    waves["time"] = np.abs(waves["time"])
+                yield step, step_info[step], waves
+
+    def _steps_to_read(self, step: int | list[int], **kwargs: object) -> list[int]:
+        """Converts the step argument of the export functions into a list of steps."""
+        if isinstance(step, list):
+            return step  # If a list of steps is given, use it
+        elif step == -1:
+            return self.get_steps(**kwargs)  # If no step is given, read all steps
+        else:
+            return [step]  # If a single step is given, pass it as a list
+
+    def _one_point_per_step(self) -> bool:
+        """True for the stepped Operating Point and Transfer Function files, which have
+        no axis and where each point is a step."""
+        return not self._has_axis and self.steps is not None and len(self.steps) == self.nPoints
+
+    def _step_ranges(self, steps: Sequence[int]) -> list[tuple[int, int]]:
+        """Returns the [start, end) point ranges of the given steps, merging the steps
+        that follow each other on the file."""
+        ranges: list[tuple[int, int]] = []
+        for step in steps:
+            if self._one_point_per_step():
+                start, end = step, step + 1
+            elif self.axis is None or not self._has_axis:
+                return [(0, self.nPoints)]
+            else:
+                start, end = self.axis.step_offset(step), self.axis.step_offset(step + 1)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
     def export(
         self,
         columns: list[str] | None = None,
         step: int | list[int] = -1,
         **kwargs: object,
-    ) -> dict[str, list[object]]:
-        """Returns a native python class structure with the requested trace data and
-        steps. It consists of an ordered dictionary where the columns are the keys and
-        the values are lists with the data.
+    ) -> dict[str, NDArray[Any]]:
+        """Returns a dictionary with the requested trace data and steps. The columns are
+        the keys and the values are numpy arrays with the data of all the requested
+        steps, one after the other. The stepped parameters are added as extra columns,
+        with the parameter value repeated along each step.
+
+        When the requested steps are contiguous in the RAW file, the trace columns are
+        views of the data read from the file, otherwise the step slices are
+        concatenated.
 
         This function is used by the export functions.
 
@@ -1102,10 +1620,10 @@ class RawRead:
         :type step: int
         :param columns: List of traces to use as columns. Default is all traces
         :type columns: list
-        :param kwargs: Additional arguments to pass to the pandas.DataFrame constructor
+        :param kwargs: Step query, in the format used by get_steps()
         :type kwargs:``**dict``
-        :return: A pandas DataFrame
-        :rtype: pandas.DataFrame
+        :return: A dictionary with the columns
+        :rtype: dict[str, numpy.array]
         """
         if columns is None:
             columns = self.get_trace_names()  # if no columns are given, use all traces
@@ -1115,41 +1633,40 @@ class RawRead:
             ):  # If axis is not in the list, add it
                 columns.insert(0, self.axis.name)
 
-        if isinstance(step, list):
-            steps_to_read = step  # If a list of steps is given, use it
-        elif step == -1:
-            steps_to_read = self.get_steps(
-                **kwargs
-            )  # If no step is given, read all steps
-        else:
-            steps_to_read = [step]  # If a single step is given, pass it as a list
-
-        step_columns: list[str] = []
-        if self.steps:
-            for key in self.steps[0]:
-                step_columns.append(key)
-
-        data: OrderedDict[str, list[object]] = OrderedDict()
-        # Create the headers with the column names and empty lists
+        steps_to_read = self._steps_to_read(step, **kwargs)
+        ranges = self._step_ranges(steps_to_read)
+        data: dict[str, NDArray[Any]] = {}
         for col in columns:
-            data[col] = []
-        for col in step_columns:
-            data[col] = []
-        # Read the data
-        for step in steps_to_read:
-            for col in columns:
-                data[col] += list(self.get_wave(col, step))
-            if self.steps is not None:
-                for col in step_columns:
-                    data[col] += [self.steps[step][col]] * len(
-                        self.get_wave(columns[0], step)
-                    )
+            trace = self.get_trace(col)
+            slices = [trace.data[start:end] for start, end in ranges]
+            if not slices:  # No step was selected
+                data[col] = np.empty(0, dtype=trace.data.dtype)
+            elif len(slices) == 1:
+                data[col] = slices[0]
+            else:
+                data[col] = np.concatenate(slices)
+            if col == "time":
+                # LTSpice sometimes writes negative time values. See Axis.get_wave()
+                data[col] = np.abs(data[col])
+        if self.steps:
+            lengths = self._step_lengths(steps_to_read)
+            for key, values in self.step_index.columns.items():
+                data[key] = np.repeat(values[steps_to_read], lengths)
         return data
 
+    def _step_lengths(self, steps: Sequence[int]) -> NDArray[np.int64]:
+        """Returns the number of points of each of the given steps."""
+        if self._one_point_per_step():
+            return np.ones(len(steps), dtype=np.int64)
+        if self.axis is None or not self._has_axis:
+            return np.full(len(steps), self.nPoints, dtype=np.int64)
+        return np.array([self.axis.get_len(step) for step in steps], dtype=np.int64)
+
     def to_dataframe(
         self,
         columns: list[str] | None = None,
         step: int | list[int] = -1,
+        multi_index: bool = False,
         **kwargs: object,
     ) -> DataFrame:
         """Returns a pandas DataFrame with the requested data.
@@ -1158,6 +1675,9 @@ class RawRead:
         :type step: int
         :param columns: List of traces to use as columns. Default is all traces
         :type columns: list
+        :param multi_index: If True, the DataFrame is indexed by a ("step", "point")
+            MultiIndex, where point is the index of the point within the step.
+        :type multi_index: bool
         :param kwargs: Additional arguments to pass to the pandas.DataFrame constructor
         :type kwargs:``**dict``
         :return: A pandas DataFrame
@@ -1171,6 +1691,14 @@ class RawRead:
                 "Use 'pip install pandas' to install it."
             ) from err
         data = self.export(columns=columns, step=step, **kwargs)
+        if multi_index:
+            steps = self._steps_to_read(step, **kwargs)
+            lengths = self._step_lengths(steps)
+            ends = np.cumsum(lengths)
+            points = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - lengths, lengths)
+            kwargs["index"] = pd.MultiIndex.from_arrays(
+                [np.repeat(steps, lengths), points], names=["step", "point"]
+            )
         return pd.DataFrame(data, **kwargs)
 
     def to_csv(
@@ -1240,3 +1768,107 @@ class RawRead:
                 "The 'pandas' module is required to use this function.\n"
                 "Use 'pip install pandas' to install it."
             ) from err
+
+    def to_arrow(
+        self,
+        columns: list[str] | None = None,
+        step: int | list[int] = -1,
+        **kwargs: object,
+    ) -> Table:
+        """Returns a pyarrow Table with the requested data. There is one column per
+        trace, followed by one column per stepped parameter. Complex traces are stored
+        as structs with 'real' and 'imag' fields. The plot name, the flags and the type
+        of each trace are kept in the schema metadata, under the 'kupicelib' key, so that
+        the data can be converted back into a RAW file with RawWrite.from_parquet().
+
+        :param columns: List of traces to use as columns. Default is all traces
+        :type columns: list
+        :param step: Step number to retrieve. If not given, it will return all steps
+        :type step: Union[int, List[int]], optional
+        :param kwargs: Step query, in the format used by get_steps()
+        :type kwargs:``**dict``
+        :return: A pyarrow Table
+        :rtype: pyarrow.Table
+        :raises ImportError: when the 'pyarrow' module is not installed
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as err:
+            raise ImportError(
+                "The 'pyarrow' module is required to use this function.\n"
+                "Use 'pip install pyarrow' to install it."
+            ) from err
+        data = self.export(columns=columns, step=step, **kwargs)
+        step_columns = list(self.step_index.columns) if self.steps else []
+        arrays = []
+        traces: dict[str, tuple[str, str]] = {}
+        for name, values in data.items():
+            if name in step_columns:
+                if values.dtype == object:
+                    values = values.astype(str)
+            else:
+                trace = self.get_trace(name)
+                traces[name] = (trace.whattype, trace.numerical_type)
+            if np.iscomplexobj(values):
+                arrays.append(
+                    pa.StructArray.from_arrays(
+                        [pa.array(values.real), pa.array(values.imag)], ["real", "imag"]
+                    )
+                )
+            else:
+                arrays.append(pa.array(values))
+        metadata = {
+            "plotname": self.raw_params["Plotname"],
+            "flags": self.raw_params["Flags"],
+            "traces": traces,
+            "step_columns": step_columns,
+        }
+        return pa.Table.from_arrays(
+            arrays, names=list(data), metadata={"kupicelib": json.dumps(metadata)}
+        )
+
+    def to_parquet(
+        self,
+        filename: str | Path,
+        columns: list[str] | None = None,
+        step: int | list[int] = -1,
+        **kwargs: Any,
+    ) -> None:
+        """Saves the data to a Parquet file. See to_arrow() for the file layout. Each
+        step is written in its own row group, so that readers can skip the steps they
+        don't need by reading only the corresponding row groups or by filtering on the
+        step parameter columns.
+
+        :param filename: Name of the file to save the data to
+        :type filename: Union[str, Path]
+        :param columns: List of traces to use as columns. Default is None, meaning all
+            traces
+        :type columns: list, optional
+        :param step: Step number to retrieve, defaults to -1
+        :type step: Union[int, List[int]], optional
+        :param kwargs: Additional arguments to pass to the pyarrow.parquet.ParquetWriter
+            class, for example, compression.
+        :type kwargs:``**dict``
+        :raises ImportError: when the 'pyarrow' module is not installed
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ImportError(
+                "The 'pyarrow' module is required to use this function.\n"
+                "Use 'pip install pyarrow' to install it."
+            ) from err
+        writer = None
+        try:
+            for step_to_write in self._steps_to_read(step):
+                table = self.to_arrow(columns=columns, step=[step_to_write])
+                if writer is None:
+                    writer = pq.ParquetWriter(filename, table.schema, **kwargs)
+                writer.write_table(table, row_group_size=max(table.num_rows, 1))
+            if writer is None:  # No step was selected, the file only has the schema
+                table = self.to_arrow(columns=columns, step=[])
+                writer = pq.ParquetWriter(filename, table.schema, **kwargs)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
@@ -22,15 +22,40 @@
 
 It can be used to combine RAW files generated by different Simulation Runs
 """
-from collections.abc import Callable, Sequence
+import json
+from collections.abc import Callable, Mapping, Sequence
 from pathlib import Path
 from time import strftime
-from typing import Protocol, cast
-
-from numpy import array, float32, ndarray, zeros
-
+from typing import Any, BinaryIO, Protocol, cast
+
+from numpy import (
+    absolute,
+    array,
+    array_equal,
+    asarray,
+    clip,
+    concatenate,
+    count_nonzero,
+    diff,
+    divide,
+    empty,
+    float32,
+    floor,
+    iscomplexobj,
+    minimum,
+    ndarray,
+    searchsorted,
+    stack,
+    union1d,
+    zeros,
+)
+
+from ..log.logfile_data import ValueType
 from .raw_classes import Axis, DataSet, TraceRead
-from .raw_read import RawRead
+from .raw_read import RawRead, point_dtype
+
+# Width of the 'No. Points' value in the header, so that it can be overwritten in place
+_POINTS_WIDTH = 12
 
 
 class _SupportsToBytes(Protocol):
@@ -40,8 +65,8 @@ class _SupportsToBytes(Protocol):
 class Trace(DataSet):
     """Helper class representing a trace in a RAW file.
 
-    This class extends DataSet and represents a single trace or signal in a RAW file. It
-    doesn't support STEPPED data as it's designed for write operations.
+    This class extends DataSet and represents a single trace or signal in a RAW file. The
+    data of STEPPED files is stored one step after the other, see from_steps().
 
     Args:     name (str): Name of the trace being created     data
     (Union[Sequence[Union[float, complex]], ndarray]): Data points for the trace
@@ -93,12 +118,37 @@ class Trace(DataSet):
         else:
             self.data[:] = data[:]  # This way the dtype is kept
 
+    @classmethod
+    def from_steps(
+        cls,
+        name: str,
+        steps: Sequence[Sequence[float | complex] | ndarray],
+        whattype: str = "voltage",
+        numerical_type: str = "",
+    ) -> "Trace":
+        """Create a trace of a stepped RAW file from the data of each step.
+
+        The steps are stored one after the other. The step information is set on the
+        RawWrite steps attribute.
+
+        Args:     name (str): Name of the trace being created     steps
+        (Sequence[Union[Sequence[Union[float, complex]], ndarray]]): Data points of each
+        step     whattype (str, optional): Type of trace data. Defaults to "voltage".
+        numerical_type (str, optional): Numerical representation. If empty, will be
+        inferred from the data. Defaults to "".
+
+        Returns:     Trace: The trace with the data of all the steps
+        """
+        return cls(name, concatenate([asarray(step) for step in steps]), whattype, numerical_type)
+
 
 class RawWrite:
     """Represents a RAW data file being generated for SPICE simulation output.
 
     This class allows creation and manipulation of RAW files for SPICE simulation data.
-    Unlike RawRead, this class doesn't support stepped data.
+    Stepped files are written when the steps attribute is set: the data of the steps
+    is stored one after the other, and the step information is written in a .log file
+    with the same name as the RAW file, which is where RawRead looks for it.
 
     Args:     plot_name (Optional[str], optional): Name of the plot. If None, will be
     inferred from first trace. Defaults to None.     fastacces (bool, optional): Whether
@@ -107,6 +157,9 @@ class RawWrite:
     encoding (str, optional): Character encoding for the file. Defaults to "utf_16_le".
     """
 
+    chunk_points: int = 65536
+    """Number of points written at a time when the file isn't in FastAccess format."""
+
     def __init__(
         self,
         plot_name: str | None = None,
@@ -123,8 +176,10 @@ class RawWrite:
         self.plot_name: str | None = plot_name
         self.offset: float = 0.0
         self.encoding: str = encoding
-        self._imported_data: list[TraceRead] = []
-        self._new_axis: list[float] | None = None
+        self._imported_data: list[tuple[TraceRead, int]] = []
+        self._new_axis: ndarray | None = None
+        self.steps: list[dict[str, ValueType]] | None = None
+        """Step information, one dictionary per step. None if the file isn't stepped."""
 
     def _str_flags(self) -> str:
         """Generate a string representation of the RAW file flags.
@@ -190,6 +245,36 @@ class RawWrite:
                 raise IndexError("The trace needs to be the same size as trace 0")
         self._traces.append(trace)
 
+    def _write_header(self, f: BinaryIO, n_points: int) -> int:
+        """Write the header of the RAW file, up to and including the 'Binary:' line.
+
+        Args:     f (BinaryIO): File opened for binary writing     n_points (int): Value
+        of the 'No. Points' field
+
+        Returns:     int: Position in the file of the 'No. Points' value. The value is
+        padded to _POINTS_WIDTH characters, so it can be overwritten later on.
+        """
+        f.write("Title: * kupicelib RawWrite\n".encode(self.encoding))
+        f.write(
+            "Date: {}\n".format(strftime("%a %b %d %H:%M:%S %Y")).encode(self.encoding)
+        )
+        f.write(f"Plotname: {self.plot_name}\n".encode(self.encoding))
+        f.write(f"Flags: {self._str_flags()}\n".encode(self.encoding))
+        f.write(f"No. Variables: {len(self._traces)}\n".encode(self.encoding))
+        f.write("No. Points: ".encode(self.encoding))
+        points_position = f.tell()
+        f.write(f"{n_points:{_POINTS_WIDTH}}\n".encode(self.encoding))
+        f.write(f"Offset:   {self.offset:.16e}\n".encode(self.encoding))
+        f.write(
+            "Command: Linear Technology Corporation LTspice XVII\n".encode(self.encoding)
+        )
+        # f.write("Backannotation: \n".encode(self.encoding))
+        f.write("Variables:\n".encode(self.encoding))
+        for i, trace in enumerate(self._traces):
+            f.write(f"\t{i}\t{trace.name}\t{trace.whattype}\n".encode(self.encoding))
+        f.write("Binary:\n".encode(self.encoding))
+        return points_position
+
     def save(self, filename: str | Path) -> None:
         """Save the RAW file to disk.
 
@@ -200,39 +285,26 @@ class RawWrite:
         The extension should be .RAW
 
         Note:     If there are any imported data that need to be consolidated, this will
-        happen     automatically before saving.
+        happen     automatically before saving. On stepped files, the step information
+        is written to a .log file with the same name.
+
+        Raises:     ValueError: If the axis doesn't have one start per step
         """
         if len(self._imported_data):
             self._consolidate()
-        with open(filename, "wb") as f:
-            f.write("Title: * kupicelib RawWrite\n".encode(self.encoding))
-            f.write(
-                "Date: {}\n".format(strftime("%a %b %d %H:%M:%S %Y")).encode(
-                    self.encoding
-                )
-            )
-            f.write(f"Plotname: {self.plot_name}\n".encode(self.encoding))
-            f.write(f"Flags: {self._str_flags()}\n".encode(self.encoding))
-            f.write(f"No. Variables: {len(self._traces)}\n".encode(self.encoding))
-            f.write(
-                f"No. Points: {len(self._traces[0]):12}\n".encode(self.encoding)
-            )
-            f.write(f"Offset:   {self.offset:.16e}\n".encode(self.encoding))
-            f.write(
-                "Command: Linear Technology Corporation LTspice XVII\n".encode(
-                    self.encoding
-                )
-            )
-            # f.write("Backannotation: \n".encode(self.encoding))
-            f.write("Variables:\n".encode(self.encoding))
-            for i, trace in enumerate(self._traces):
-                f.write(
-                    f"\t{i}\t{trace.name}\t{trace.whattype}\n".encode(
-                        self.encoding
-                    )
+        if self.steps is not None:
+            self.flag_stepped = True
+            axis = self._traces[0].data
+            # This is how RawRead finds where each step starts
+            n_steps = count_nonzero(axis == axis[0])
+            if n_steps != len(self.steps):
+                raise ValueError(
+                    f"The axis has {n_steps} steps, but there is information for "
+                    f"{len(self.steps)} steps"
                 )
-            total_bytes = 0
-            f.write("Binary:\n".encode(self.encoding))
+            self._write_step_log(Path(filename).with_suffix(".log"))
+        with open(filename, "wb") as f:
+            self._write_header(f, len(self._traces[0]))
             if (
                 self.flag_fastaccess and self.flag_numtype != "complex"
             ):  # Don't know why, but complex RAW files aren't
@@ -240,12 +312,27 @@ class RawWrite:
                 for trace in self._traces:
                     f.write(trace.data.tobytes())
             else:
-                fmts: dict[Trace, Callable[[_SupportsToBytes], bytes]] = {
-                    trace: tobytes_for_trace(trace) for trace in self._traces
-                }
-                for i in range(len(self._traces[0])):
-                    for trace in self._traces:
-                        total_bytes += f.write(fmts[trace](trace.data[i]))
+                # The points are interleaved into a structured array, one chunk at a time
+                point = point_dtype(self._traces)
+                n_points = len(self._traces[0])
+                chunk = empty(min(n_points, self.chunk_points), dtype=point)
+                for start in range(0, n_points, self.chunk_points):
+                    block = chunk[: min(self.chunk_points, n_points - start)]
+                    for i, trace in enumerate(self._traces):
+                        block[f"f{i}"] = trace.data[start: start + len(block)]
+                    f.write(block.data)
+
+    def _write_step_log(self, filename: Path) -> None:
+        """Write the .step lines of a stepped file, in the format of the LTspice logs.
+
+        Args:     filename (Path): Path of the .log file
+        """
+        with open(filename, "w", encoding="utf-8") as log:
+            log.write("Circuit: * kupicelib RawWrite\n\n")
+            for step in self.steps or []:
+                log.write(
+                    ".step " + " ".join(f"{key}={value}" for key, value in step.items()) + "\n"
+                )
 
     @staticmethod
     def _rename_netlabel(name: str, **kwargs: object) -> str:
@@ -303,12 +390,19 @@ class RawWrite:
         they don't match         - admissible_error (float): Maximum allowed error when
         syncing axes         - rename_format (str): Format string for renaming traces -
         step (int): Which step to import from multi-step source (default: 0)         -
-        minimum_timestep (float): Minimum time increment to preserve
+        steps (list[int]): Steps to import from a multi-step source. The steps are
+        stored one after the other and this instance becomes stepped. Can't be used
+        together with axis alignment.         -
+        minimum_timestep (float): Minimum time increment to preserve. The merged
+        axis is decimated so that it has at most one point per minimum_timestep
+        interval, plus its last point.
 
         Raises:     ValueError: If the source and destination types or axis types don't
-        match     NotImplementedError: For certain unimplemented features
+        match, or if the steps don't match the steps already imported
 
-        Note:     This feature is partially implemented and may not work in all cases.
+        Note:     When the axes are aligned, the points of the source axis that are
+        within admissible_error of a point of the destination axis are dropped. The
+        traces are interpolated to the merged axis when the file is saved.
         """
         options: dict[str, object] = dict(kwargs)
         force_axis_alignment = bool(options.get("force_axis_alignment", False))
@@ -316,6 +410,7 @@ class RawWrite:
             cast(float | int | str, options.get("admissible_error", 1e-11))
         )
         from_step = int(cast(int | str, options.get("step", 0)))
+        from_steps = cast(list[int] | None, options.get("steps"))
         minimum_timestep = float(
             cast(float | int | str, options.get("minimum_timestep", 0.0))
         )
@@ -324,6 +419,28 @@ class RawWrite:
             [trace_filter] if isinstance(trace_filter, str) else list(trace_filter)
         )
 
+        if from_steps is not None:
+            if force_axis_alignment or minimum_timestep > 0.0:
+                raise ValueError("Stepped traces can't be aligned to another axis")
+            if other.steps is None:
+                raise ValueError("The source RAW file isn't stepped")
+            if len(self._traces) and self.steps is None:
+                raise ValueError("Stepped traces can't be added to a non-stepped file")
+            if self.steps is not None and self.steps != [
+                dict(other.steps[step]) for step in from_steps
+            ]:
+                raise ValueError("The steps don't match the steps already in the file")
+
+        def get_axis() -> ndarray:
+            if from_steps is None:
+                return asarray(other.get_axis(from_step))
+            return concatenate([other.get_axis(step) for step in from_steps])
+
+        def get_wave(trace: TraceRead) -> ndarray:
+            if from_steps is None:
+                return trace.get_wave(from_step)
+            return concatenate([trace.get_wave(step) for step in from_steps])
+
         other_flags = cast(str, other.get_raw_property("Flags")).split(" ")
         for flag in other_flags:
             if flag in ("real", "complex"):
@@ -356,53 +473,48 @@ class RawWrite:
             oaxis = other.get_trace(0)
             new_axis = Trace(
                 oaxis.name,
-                other.get_axis(from_step),
+                get_axis(),
                 oaxis.whattype,
                 oaxis.numerical_type,
             )
             self._traces.append(new_axis)
+            if from_steps is not None and other.steps is not None:
+                self.steps = [dict(other.steps[step]) for step in from_steps]
             force_axis_alignment = False
 
         if force_axis_alignment or minimum_timestep > 0.0:
             my_axis = (
-                self._new_axis or self._traces[0].get_wave().tolist()
+                self._new_axis
+                if self._new_axis is not None
+                else self._traces[0].get_wave().real
             )
-            other_axis = other.get_axis(from_step)
-            new_axis_list: list[float] = []
+            other_axis = asarray(other.get_axis(from_step)).real
+            # Points of the other axis that are within the admissible error of a point of
+            # this axis are dropped, all the others are merged into this axis.
+            pos = searchsorted(my_axis, other_axis)
+            left = my_axis[clip(pos - 1, 0, len(my_axis) - 1)]
+            right = my_axis[clip(pos, 0, len(my_axis) - 1)]
+            distance = minimum(absolute(other_axis - left), absolute(other_axis - right))
+            new_axis = union1d(my_axis, other_axis[distance >= admissible_error])
             if minimum_timestep > 0.0:
-                raise NotImplementedError(
-                    "minimum_timestep feature is not yet implemented"
-                )
-            else:
-                i = 0  # incomming data counter
-                e = 0  # existing data counter
-
-                while e < len(my_axis) - 1 and i < len(other_axis) - 1:
-                    error = other_axis[i] - my_axis[e]
-                    if abs(error) < admissible_error:
-                        new_axis_list.append(float(my_axis[e]))
-                        i += 1
-                        e += 1
-                    elif error < 0:
-                        # Other axis is smaller
-                        new_axis_list.append(float(other_axis[i]))
-                        i += 1
-                    else:
-                        new_axis_list.append(float(my_axis[e]))
-                        e += 1
-                # Creating the New Axis
-                self._new_axis = new_axis_list
-
-                for trace_name in trace_names:
-                    imported_trace = other.get_trace(trace_name)
-                    if not isinstance(imported_trace, TraceRead):
-                        msg = f"Trace '{trace_name}' is not a readable data trace"
-                        raise TypeError(msg)
-                    new_name = self._rename_netlabel(trace_name, **options)
-                    imported_trace.name = new_name
-                    self._imported_data.append(imported_trace)
+                # Keeps the first point of each minimum_timestep interval, and the last
+                slot = floor((new_axis - new_axis[0]) / minimum_timestep)
+                keep = concatenate(([True], diff(slot) > 0))
+                keep[-1] = True
+                new_axis = new_axis[keep]
+            # Creating the New Axis
+            self._new_axis = new_axis
+
+            for trace_name in trace_names:
+                imported_trace = other.get_trace(trace_name)
+                if not isinstance(imported_trace, TraceRead):
+                    msg = f"Trace '{trace_name}' is not a readable data trace"
+                    raise TypeError(msg)
+                new_name = self._rename_netlabel(trace_name, **options)
+                imported_trace.name = new_name
+                self._imported_data.append((imported_trace, from_step))
         else:
-            assert len(self._traces[0]) == len(other.get_axis(from_step)), (
+            assert len(self._traces[0]) == len(get_axis()), (
                 "The two instances should have the same size. "
                 "To avoid this use force_axis_alignment=True option"
             )
@@ -412,7 +524,7 @@ class RawWrite:
                     msg = f"Trace '{trace_name}' is not a readable data trace"
                     raise TypeError(msg)
                 new_name = self._rename_netlabel(trace_name, **options)
-                data = trace.get_wave(from_step)
+                data = get_wave(trace)
                 self._traces.append(
                     Trace(
                         new_name,
@@ -431,59 +543,67 @@ class RawWrite:
 
     @staticmethod
     def _interpolate(
-        trace_data: ndarray, trace_axis: ndarray, new_axis: Sequence[float]
+        traces_data: ndarray, trace_axis: ndarray, new_axis: ndarray
     ) -> ndarray:
-        """Interpolate trace data to align with a new axis.
+        """Interpolate the data of several traces that share the same axis, to align it
+        with a new axis.
 
-        Args:     trace_data (ndarray): The original data values     trace_axis
-        (ndarray): The original axis values     new_axis (Sequence[float]): The new axis
-        values to interpolate to
+        Args:     traces_data (ndarray): The original data values, one trace per row
+        trace_axis (ndarray): The original axis values     new_axis (ndarray): The new
+        axis values to interpolate to
 
-        Returns:     ndarray: Interpolated data aligned with the new axis
+        Returns:     ndarray: Interpolated data aligned with the new axis, one trace per
+        row
 
-        Note:     Uses linear interpolation between data points.
+        Note:     Uses linear interpolation between data points. Outside the range of
+        the original axis, the first or last segment is extrapolated.
         """
-        new_data = zeros(len(new_axis), dtype=trace_data.dtype)
-        new_data[0] = trace_data[0]
-
-        slope = (trace_data[1] - trace_data[0]) / (trace_axis[1] - trace_axis[0])
-        i = 1
-        for j, t in enumerate(new_axis):
-            while i < len(trace_axis) and trace_axis[i] < t:
-                i += 1
-                if i < len(trace_axis):
-                    slope = (trace_data[i] - trace_data[i - 1]) / (
-                        trace_axis[i] - trace_axis[i - 1]
-                    )
-            new_data[j] = trace_data[i - 1] + slope * (t - trace_axis[i - 1])
-        return new_data
+        # Index of the end of the segment of each new point
+        i = clip(searchsorted(trace_axis, new_axis), 1, len(trace_axis) - 1)
+        x0 = trace_axis[i - 1]
+        dx = trace_axis[i] - x0
+        weight = divide(new_axis - x0, dx, out=zeros(len(new_axis)), where=dx != 0)
+        y0 = traces_data[:, i - 1]
+        return y0 + weight * (traces_data[:, i] - y0)
 
     def _consolidate(self) -> None:
         """Consolidate imported data by interpolating to align with a common axis.
 
         This internal method is called before saving to ensure all traces are aligned to
-        the same axis. Traces are interpolated as needed to match the new axis.
+        the same axis. Traces are interpolated as needed to match the new axis. The
+        traces that share the same axis are interpolated together.
         """
-        if self._new_axis and self._imported_data:
+        if self._new_axis is not None and self._imported_data:
             new_axis = self._new_axis
-            axis_length = len(new_axis)
             old_axis = self._traces[0]
-            if axis_length != len(old_axis):
-                my_axis = old_axis.data
-                for trace in self._traces[1:]:
-                    trace.data = self._interpolate(trace.data, my_axis, new_axis)
-            for imported_trace in self._imported_data:
-                new_trace = Trace(
-                    imported_trace.name,
-                    self._interpolate(
-                        imported_trace.get_wave(),
-                        self._ensure_axis(imported_trace).get_wave(),
-                        new_axis,
-                    ),
-                    imported_trace.whattype,
-                    imported_trace.numerical_type,
+            if not array_equal(new_axis, old_axis.data) and len(self._traces) > 1:
+                new_data = self._interpolate(
+                    stack([trace.data for trace in self._traces[1:]]),
+                    old_axis.data.real,
+                    new_axis,
                 )
-                self._traces.append(new_trace)
+                for trace, data in zip(self._traces[1:], new_data, strict=True):
+                    trace.data = data.astype(trace.data.dtype)
+            # Groups the imported traces by axis
+            groups: dict[tuple[int, int], list[TraceRead]] = {}
+            for imported_trace, step in self._imported_data:
+                axis = self._ensure_axis(imported_trace)
+                groups.setdefault((id(axis), step), []).append(imported_trace)
+            for (_, step), imported_traces in groups.items():
+                new_data = self._interpolate(
+                    stack([trace.get_wave(step) for trace in imported_traces]),
+                    self._ensure_axis(imported_traces[0]).get_wave(step).real,
+                    new_axis,
+                )
+                for imported_trace, data in zip(imported_traces, new_data, strict=True):
+                    self._traces.append(
+                        Trace(
+                            imported_trace.name,
+                            data,
+                            imported_trace.whattype,
+                            imported_trace.numerical_type,
+                        )
+                    )
             self._traces[0] = Trace(
                 old_axis.name, new_axis, old_axis.whattype, old_axis.numerical_type
             )  # Replaces with the new axis
@@ -522,6 +642,206 @@ class RawWrite:
         """
         return self.get_trace(item)
 
+    @classmethod
+    def from_parquet(
+        cls, filename: str | Path, step: int | None = None, **kwargs: Any
+    ) -> "RawWrite":
+        """Create a RawWrite from a Parquet file written by RawRead.to_parquet().
+
+        The trace types, the plot name and the flags are restored from the metadata
+        written by RawRead.to_arrow(). When that metadata is missing, the first column
+        is taken as the axis, and the trace types are inferred from the column data.
+        The step parameter columns aren't converted into traces.
+
+        Args:     filename (Union[str, Path]): Path to the Parquet file     step
+        (Optional[int], optional): Step to read. RawRead.to_parquet() writes each step in
+        its own row group. If None, all rows are read. Defaults to None.     **kwargs:
+        Additional arguments passed to the RawWrite constructor.
+
+        Returns:     RawWrite: A RawWrite instance with the traces of the file. When
+        all the steps are read, the step information is restored.
+
+        Raises:     ImportError: If the 'pyarrow' module is not installed
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ImportError(
+                "The 'pyarrow' module is required to use this function.\n"
+                "Use 'pip install pyarrow' to install it."
+            ) from err
+        parquet_file = pq.ParquetFile(filename)
+        table = parquet_file.read() if step is None else parquet_file.read_row_group(step)
+        metadata = table.schema.metadata or {}
+        info = json.loads(metadata[b"kupicelib"]) if b"kupicelib" in metadata else {}
+        traces: dict[str, list[str]] = info.get("traces", {})
+        flags = info.get("flags", "").split()
+        raw = cls(plot_name=info.get("plotname"), **kwargs)
+        raw.flag_log = "log" in flags
+        raw.flag_forward = "forward" in flags
+        step_columns: list[str] = info.get("step_columns", [])
+        if step is None and step_columns:
+            # Each row group is a step, its parameters are repeated along the rows
+            row = 0
+            raw.steps = []
+            for row_group in range(parquet_file.num_row_groups):
+                raw.steps.append(
+                    {name: table.column(name)[row].as_py() for name in step_columns}
+                )
+                row += parquet_file.metadata.row_group(row_group).num_rows
+        for name in table.column_names:
+            if name in step_columns:
+                continue
+            column = table.column(name).combine_chunks()
+            if pa.types.is_struct(column.type):
+                data = column.field("real").to_numpy() + 1j * column.field("imag").to_numpy()
+            else:
+                data = column.to_numpy()
+            if name in traces:
+                whattype, numerical_type = traces[name]
+            else:
+                if raw._traces:
+                    whattype = "voltage"
+                else:
+                    whattype = "frequency" if "freq" in name.lower() else "time"
+                if iscomplexobj(data):
+                    numerical_type = "complex"
+                elif data.dtype == float32:
+                    numerical_type = "real"
+                else:
+                    numerical_type = "double"
+            raw.add_trace(Trace(name, data, whattype, numerical_type))
+        return raw
+
+
+class RawWriter:
+    """Writes a RAW file incrementally, for data that is produced over time or that
+    doesn't fit in memory.
+
+    The file is written in Normal access format: the header is written when the file is
+    opened, then each call to write_points() appends a block of points. The 'No. Points'
+    field of the header is updated by flush() and close(), so the file can be read at
+    any time, up to the last flush.
+
+    Usage: ::
+
+        with RawWriter.open("capture.raw", traces=[
+            Trace("time", [], numerical_type="double"),
+            Trace("V(out)", [], numerical_type="real"),
+        ]) as writer:
+            for t, v in blocks:
+                writer.write_points({"time": t, "V(out)": v})
+
+    Args:     filename (Union[str, Path]): Path where the RAW file will be written
+    traces (Sequence[Trace]): The traces of the file. The first one is the axis. Their
+    data, if any, is written as the first block of points.     plot_name
+    (Optional[str], optional): Name of the plot. If None, will be inferred from the
+    first trace. Defaults to None.     numtype (str, optional): Numerical type for the
+    file. Use "auto" to infer from first trace. Defaults to "auto".     encoding (str,
+    optional): Character encoding for the file. Defaults to "utf_16_le".
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        traces: Sequence[Trace],
+        plot_name: str | None = None,
+        numtype: str = "auto",
+        encoding: str = "utf_16_le",
+    ) -> None:
+        self._raw = RawWrite(plot_name, fastacces=False, numtype=numtype, encoding=encoding)
+        for trace in traces:
+            self._raw.add_trace(trace)
+        self._point = point_dtype(self._raw._traces)
+        self.n_points: int = 0
+        # The file stays open across calls, and is closed by close()
+        self._file: BinaryIO = open(filename, "wb")  # noqa: SIM115
+        self._points_position = self._raw._write_header(self._file, 0)
+        if len(self._raw._traces[0]):
+            self.write_points([trace.data for trace in self._raw._traces])
+
+    @classmethod
+    def open(
+        cls,
+        filename: str | Path,
+        traces: Sequence[Trace],
+        plot_name: str | None = None,
+        numtype: str = "auto",
+        encoding: str = "utf_16_le",
+    ) -> "RawWriter":
+        """Create a RAW file and write its header. See the class documentation for the
+        arguments.
+
+        Returns:     RawWriter: The writer, ready to receive points
+        """
+        return cls(filename, traces, plot_name, numtype, encoding)
+
+    def __enter__(self) -> "RawWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @property
+    def trace_names(self) -> list[str]:
+        """Names of the traces, in the order they are written."""
+        return [trace.name for trace in self._raw._traces]
+
+    def write_points(self, block: Mapping[str, Any] | Sequence[Any]) -> None:
+        """Append a block of points to the file.
+
+        Args:     block (Union[Mapping[str, ArrayLike], Sequence[ArrayLike]]): The values
+        of each trace, either as a dictionary indexed by the trace names, or as a
+        sequence in the order of the traces. All traces must be given and have the same
+        number of points.
+
+        Raises:     ValueError: If the file was already closed     KeyError: If a trace
+        is missing from the block     IndexError: If the traces don't have the same
+        number of points     OverflowError: If the total number of points doesn't fit
+        in the 'No. Points' field of the header. The block is not written.
+        """
+        if self._file.closed:
+            raise ValueError("The RAW file was already closed")
+        if isinstance(block, Mapping):
+            columns = [block[name] for name in self.trace_names]
+        else:
+            columns = list(block)
+            if len(columns) != len(self._raw._traces):
+                raise IndexError(
+                    f"Expected {len(self._raw._traces)} traces, got {len(columns)}"
+                )
+        points = empty(len(columns[0]), dtype=self._point)
+        for i, column in enumerate(columns):
+            if len(column) != len(points):
+                raise IndexError("The trace needs to be the same size as trace 0")
+            points[f"f{i}"] = column
+        if len(str(self.n_points + len(points))) > _POINTS_WIDTH:
+            raise OverflowError(
+                f"{self.n_points + len(points)} points don't fit in the header, "
+                f"which allows at most {_POINTS_WIDTH} digits"
+            )
+        self._file.write(points.data)
+        self.n_points += len(points)
+
+    def flush(self) -> None:
+        """Update the 'No. Points' field of the header with the number of points
+        written so far, and flush the file to disk."""
+        end = self._file.tell()
+        self._file.seek(self._points_position)
+        self._file.write(f"{self.n_points:{_POINTS_WIDTH}}".encode(self._raw.encoding))
+        self._file.seek(end)
+        self._file.flush()
+
+    def close(self) -> None:
+        """Update the header and close the file.
+
+        Calling close() on a closed writer has no effect.
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
 
 def tobytes_for_trace(trace: Trace) -> Callable[[_SupportsToBytes], bytes]:
     """Create a function that converts trace data values to bytes.
@@ -36,6 +36,10 @@ else:  # pragma: no cover - fallbacks for runtime casts
     NDArray = Any
 
 
+MAX_PLOT_POINTS = 4000
+"""Maximum number of points plotted per trace and step, unless --full is given."""
+
+
 def _units_for_whattype(whattype: str) -> str | None:
     """Return a display unit for a LTSpice whattype descriptor."""
 
@@ -59,10 +63,14 @@ def main(argv: Sequence[str] | None = None) -> None:
     from numpy import arange
 
     args = list(argv if argv is not None else sys.argv)
+    full_resolution = "--full" in args
+    if full_resolution:
+        args.remove("--full")
 
     if len(args) <= 1:
-        print("Usage: rawplot.py RAW_FILE TRACE_NAME")
+        print("Usage: rawplot.py [--full] RAW_FILE TRACE_NAME")
         print("TRACE_NAME is the trace to plot or omitted for all traces")
+        print("--full plots all the points, instead of a reduced version of the traces")
         sys.exit(-1)
 
     raw_filename = args[1]
@@ -105,11 +113,15 @@ def main(argv: Sequence[str] | None = None) -> None:
         if "log" in raw_reader.flags:
             ax.set_xscale("log")
         for step_index in steps_data:
-            if raw_reader.axis is not None:
+            if not full_resolution and hasattr(trace, "get_wave_decimated"):
+                # Keeps the envelope of the trace with a few thousand points
+                x_values, y_values = trace.get_wave_decimated(step_index, MAX_PLOT_POINTS)
+            elif raw_reader.axis is not None:
                 x_values = raw_reader.get_axis(step_index)
+                y_values = trace.get_wave(step_index)
             else:
                 x_values = arange(raw_reader.nPoints)
-            y_values = trace.get_wave(step_index)
+                y_values = trace.get_wave(step_index)
             y_array = np.asarray(y_values)
             label = f"{trace.name}:{step_index}"
             if "complex" in raw_reader.flags:
@@ -11,6 +11,7 @@ from typing import cast
 import keyboard
 
 from kupicelib.client_server.sim_server import SimServer
+from kupicelib.sim.concurrency_controller import ConcurrencyController
 from kupicelib.sim.simulator import Simulator
 from kupicelib.simulators.ltspice_simulator import LTspice
 from kupicelib.simulators.ngspice_simulator import NGspiceSimulator
@@ -82,6 +83,13 @@ def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=4,
         help="Maximum number of parallel simulations. Default is 4",
     )
+    parser.add_argument(
+        "-a",
+        "--adaptive",
+        action="store_true",
+        help="Lower the number of parallel simulations when the machine is loaded or "
+        "runs out of memory. The maximum is given by --parallel",
+    )
     parser.add_argument(
         "timeout",
         type=int,
@@ -103,6 +111,7 @@ def main(argv: Sequence[str] | None = None) -> None:
     parallel = max(args.parallel, 1)
 
     simulator_cls = _resolve_simulator(args.simulator)
+    concurrency = ConcurrencyController(max_sims=parallel) if args.adaptive else None
 
     server = SimServer(
         simulator_cls,
@@ -110,6 +119,7 @@ def main(argv: Sequence[str] | None = None) -> None:
         output_folder=args.output,
         port=args.port,
         timeout=args.timeout,
+        concurrency=concurrency,
     )
     print("Server Started. Press and hold 'q' to stop")
     while server.running():
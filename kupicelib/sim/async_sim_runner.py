@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+
+# -------------------------------------------------------------------------------
+#
+#  ███████╗██████╗ ██╗ ██████╗███████╗██╗     ██╗██████╗
+#  ██╔════╝██╔══██╗██║██╔════╝██╔════╝██║     ██║██╔══██╗
+#  ███████╗██████╔╝██║██║     █████╗  ██║     ██║██████╔╝
+#  ╚════██║██╔═══╝ ██║██║     ██╔══╝  ██║     ██║██╔══██╗
+#  ███████║██║     ██║╚██████╗███████╗███████╗██║██████╔╝
+#  ╚══════╝╚═╝     ╚═╝ ╚═════╝╚══════╝╚══════╝╚═╝╚═════╝
+#
+# Name:        async_sim_runner.py
+# Purpose:     Asyncio interface for launching simulations in batch mode.
+#
+# Licence:     refer to the LICENSE file
+# -------------------------------------------------------------------------------
+"""Asyncio version of SimRunner, for applications built on an event loop. The
+simulators are launched with asyncio.create_subprocess_exec(), so no thread is used
+while the simulations are running. ::
+
+    import asyncio
+    from kupicelib import AsyncSimRunner, SpiceEditor
+    from kupicelib.simulators.ngspice_simulator import NGspiceSimulator
+
+    async def main():
+        runner = AsyncSimRunner(simulator=NGspiceSimulator, parallel_sims=16)
+        netlist = SpiceEditor("my_circuit.net")
+        for value in ("1k", "2k", "5k"):
+            netlist.set_component_value("R1", value)
+            await runner.arun(netlist)
+        async for task in runner.as_completed():
+            raw_file, log_file = await task.results()
+
+    asyncio.run(main())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Mapping, Sequence
+from pathlib import Path
+
+from ..editor.base_editor import BaseEditor
+from .result_cache import ResultCache
+from .run_task import RunTask
+from .sim_runner import CallbackType, SimRunner, SimRunnerTimeoutError
+from .simulator import Simulator
+
+__all__ = ["AsyncSimRunner"]
+
+_logger = logging.getLogger("kupicelib.AsyncSimRunner")
+
+
+class AsyncSimRunner(SimRunner):
+    """SimRunner with an asyncio interface. It accepts the same parameters as
+    SimRunner, except the concurrency controller.
+
+    The simulations are started by arun() and awaited by await_completion() or
+    as_completed(). They must be run from the same event loop. The number of
+    simulations running at the same time is limited by `parallel_sims`, the other ones
+    wait for their turn without using any thread. The callbacks are called on worker
+    threads, or on the callback process pool if `callback_executor` is "process".
+
+    The synchronous methods of SimRunner, like run() and wait_completion(), keep
+    working, but they don't see the simulations started by arun().
+    """
+
+    def __init__(
+        self,
+        *,
+        simulator: type[Simulator] | Simulator | None = None,
+        parallel_sims: int = 4,
+        timeout: float | None = 600.0,
+        verbose: bool = False,
+        output_folder: str | None = None,
+        callback_executor: str = "thread",
+        callback_workers: int | None = None,
+        result_cache: str | Path | ResultCache | None = None,
+    ) -> None:
+        self._async_tasks: set[asyncio.Task[RunTask]] = set()
+        super().__init__(
+            simulator=simulator,
+            parallel_sims=parallel_sims,
+            timeout=timeout,
+            verbose=verbose,
+            output_folder=output_folder,
+            callback_executor=callback_executor,
+            callback_workers=callback_workers,
+            result_cache=result_cache,
+        )
+        self._async_slots = asyncio.Semaphore(self.parallel_sims)
+
+    async def arun(
+        self,
+        netlist: str | Path | BaseEditor,
+        *,
+        wait_resource: bool = True,
+        callback: CallbackType | None = None,
+        callback_args: Sequence[object] | Mapping[str, object] | None = None,
+        switches: Sequence[str] | None = None,
+        timeout: float | None = None,
+        run_filename: str | None = None,
+        exe_log: bool = False,
+    ) -> RunTask:
+        """Schedules a simulation run and returns immediately. See SimRunner.run() for
+        the parameters.
+
+        Unlike SimRunner.run(), the caller is never blocked: when there are already
+        `parallel_sims` simulations running, the simulation waits for a free slot on
+        the event loop. If wait_resource is False, it is started right away. The
+        simulator process is killed if it runs longer than the timeout.
+
+        :returns: The task object of type RunTask. Use `await task.results()` to get
+            its results.
+        """
+        callback_kwargs = self.validate_callback_args(callback, callback_args)
+        switch_args = list(switches) if switches is not None else list(
+            self.cmdline_switches
+        )
+        run_netlist_file = self._prepare_sim(netlist, run_filename)
+        task = RunTask(
+            simulator=self.simulator,
+            runno=self.run_count,
+            netlist_file=run_netlist_file,
+            callback=callback,
+            callback_args=callback_kwargs,
+            switches=switch_args,
+            timeout=timeout if timeout is not None else self.timeout,
+            verbose=self.verbose,
+            exe_log=exe_log,
+            callback_executor=self._task_callback_executor(callback),
+        )
+        self._lookup_cache(task)
+        task.async_task = asyncio.create_task(
+            self._run_task(task, wait_resource and not task.cache_hit)
+        )
+        self._async_tasks.add(task.async_task)
+        _logger.debug(
+            "RunTask scheduled: runno=%d, netlist_file=%s",
+            task.runno,
+            task.netlist_file,
+        )
+        return task
+
+    async def _run_task(self, task: RunTask, wait_resource: bool) -> RunTask:
+        """Internal: runs a task, holding a slot while the simulator is running if
+        wait_resource is True, and waits for its callback."""
+        try:
+            if wait_resource:
+                async with self._async_slots:
+                    await task.arun()
+            else:
+                await task.arun()
+            if task.callback_future is not None:
+                await asyncio.wrap_future(task.callback_future)
+        except asyncio.TimeoutError:
+            task.logger.error("Simulation killed after the timeout of %s seconds", task.timeout)
+        except asyncio.CancelledError:
+            task._cancel()
+            raise
+        except Exception:
+            task.logger.exception("Simulation failed")
+        finally:
+            with self._lock:
+                if task.retcode == 0:
+                    self.successful_simulations += 1
+                else:
+                    self.failed_simulations += 1
+                self.completed_tasks.append(task)
+        return task
+
+    async def as_completed(self, timeout: float | None = None) -> AsyncIterator[RunTask]:
+        """Yields the tasks started by arun() as they complete, including the ones that
+        are started while iterating. Each task is only yielded once, so nested
+        iterations are not supported.
+
+        :param timeout: Maximum time to wait for each task, defaults to None
+        :type timeout: float, optional
+        :raises SimRunnerTimeoutError: If no task completes within the timeout
+        """
+        while self._async_tasks:
+            done, _pending = await asyncio.wait(
+                set(self._async_tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise SimRunnerTimeoutError(
+                    f"Exceeded {timeout} seconds waiting for tasks to finish"
+                )
+            self._async_tasks.difference_update(done)
+            for async_task in done:
+                yield async_task.result()
+
+    async def await_completion(
+        self, timeout: float | None = None, abort_all_on_timeout: bool = False
+    ) -> bool:
+        """Asyncio version of wait_completion(). Waits for all the tasks started by
+        arun() to complete.
+
+        :param timeout: Cancels the wait after the number of seconds specified by the
+            timeout, defaults to None
+        :type timeout: float, optional
+        :param abort_all_on_timeout: Cancels the tasks that didn't complete when the
+            timeout expires, killing their simulator process.
+        :type abort_all_on_timeout: bool, optional
+        :returns: True if all simulations were executed successfully
+        :rtype: bool
+        """
+        pending = {async_task for async_task in self._async_tasks if not async_task.done()}
+        if pending:
+            _done, pending = await asyncio.wait(pending, timeout=timeout)
+        if pending:
+            if abort_all_on_timeout:
+                for async_task in pending:
+                    async_task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            return False
+        return self.failed_simulations == 0
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+# -------------------------------------------------------------------------------
+#
+#  ███████╗██████╗ ██╗ ██████╗███████╗██╗     ██╗██████╗
+#  ██╔════╝██╔══██╗██║██╔════╝██╔════╝██║     ██║██╔══██╗
+#  ███████╗██████╔╝██║██║     █████╗  ██║     ██║██████╔╝
+#  ╚════██║██╔═══╝ ██║██║     ██╔══╝  ██║     ██║██╔══██╗
+#  ███████║██║     ██║╚██████╗███████╗███████╗██║██████╔╝
+#  ╚══════╝╚═╝     ╚═╝ ╚═════╝╚══════╝╚══════╝╚═╝╚═════╝
+#
+# Name:        concurrency_controller.py
+# Purpose:     Adapts the number of parallel simulations to the load of the machine
+#
+# Licence:     refer to the LICENSE file
+# -------------------------------------------------------------------------------
+"""Controller that raises or lowers the number of simulations that SimRunner runs in
+parallel, according to the CPU load and the memory available on the machine. ::
+
+    from kupicelib.sim.concurrency_controller import ConcurrencyController
+
+    controller = ConcurrencyController(min_sims=2, max_sims=16)
+    runner = SimRunner(simulator=NGspiceSimulator, concurrency=controller)
+    ...
+    print(controller.metrics)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+
+__all__ = ["ConcurrencyController"]
+
+_logger = logging.getLogger("kupicelib.ConcurrencyController")
+
+
+class ConcurrencyController:
+    """Decides how many simulations can run in parallel.
+
+    The machine is sampled at most every `interval` seconds, when a simulation is about
+    to start or has finished. The limit is lowered by one when the memory available is
+    below `min_free_memory` or when the load average per CPU is above `max_load`. It is
+    raised by one when all the slots are in use, the load is below `max_load` and the
+    memory available would still be above `min_free_memory` after starting another
+    simulation, estimated from the memory used by the running ones. The limit always
+    stays between `min_sims` and `max_sims`.
+
+    The decisions are logged, and the last ones are kept in `decisions`. The last
+    sample and the counters are kept in `metrics`.
+
+    :param min_sims: Minimum number of parallel simulations, defaults to 1
+    :type min_sims: int, optional
+    :param max_sims: Maximum number of parallel simulations. Default is the number of
+        CPUs.
+    :type max_sims: int, optional
+    :param interval: Minimum time between two samples, in seconds, defaults to 5
+    :type interval: float, optional
+    :param max_load: Load average per CPU above which the limit is lowered, defaults to
+        1.0
+    :type max_load: float, optional
+    :param min_free_memory: Memory that must stay available, in bytes, defaults to 1 GiB
+    :type min_free_memory: int, optional
+    :raises ValueError: If the bounds are not valid
+    """
+
+    def __init__(
+        self,
+        min_sims: int = 1,
+        max_sims: int | None = None,
+        interval: float = 5.0,
+        max_load: float = 1.0,
+        min_free_memory: int = 1 << 30,
+    ) -> None:
+        self.cpu_count = os.cpu_count() or 1
+        self.min_sims = min_sims
+        self.max_sims = max_sims if max_sims is not None else max(self.cpu_count, min_sims)
+        if not 1 <= self.min_sims <= self.max_sims:
+            raise ValueError(
+                f"Invalid bounds: min_sims={self.min_sims}, max_sims={self.max_sims}"
+            )
+        self.interval = interval
+        self.max_load = max_load
+        self.min_free_memory = min_free_memory
+        self.metrics: dict[str, float] = {
+            "limit": 0,
+            "running": 0,
+            "load": 0.0,
+            "free_memory": 0,
+            "task_memory": 0,
+            "samples": 0,
+            "increases": 0,
+            "decreases": 0,
+        }
+        # (time, old limit, new limit, reason) of the last changes of the limit
+        self.decisions: deque[tuple[float, int, int, str]] = deque(maxlen=100)
+        self._last_sample: float | None = None
+        self._lock = threading.Lock()
+
+    def clamp(self, limit: int) -> int:
+        """Returns the limit bounded by min_sims and max_sims."""
+        return min(max(limit, self.min_sims), self.max_sims)
+
+    def sample(self, running: int) -> dict[str, float]:
+        """Measures the load average per CPU, the memory available and the memory used
+        by each running simulation, estimated from the resident memory of the child
+        processes.
+
+        :param running: Number of simulations running
+        :type running: int
+        :return: A dictionary with the 'load', 'free_memory' and 'task_memory' values
+        :rtype: dict[str, float]
+        """
+        task_memory = self.metrics["task_memory"]
+        if running > 0:
+            rss = 0
+            for child in psutil.Process().children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:  # The process finished meanwhile
+                    continue
+            task_memory = rss / running
+        return {
+            "load": psutil.getloadavg()[0] / self.cpu_count,
+            "free_memory": psutil.virtual_memory().available,
+            "task_memory": task_memory,
+        }
+
+    def decide(self, limit: int, running: int, sample: dict[str, float]) -> tuple[int, str]:
+        """Computes the new limit from a sample.
+
+        :return: The new limit and the reason of the change, empty if unchanged
+        :rtype: tuple[int, str]
+        """
+        if sample["free_memory"] < self.min_free_memory:
+            return self.clamp(limit - 1), "low memory"
+        if sample["load"] > self.max_load:
+            return self.clamp(limit - 1), "high load"
+        if (
+            running >= limit
+            and sample["free_memory"] - sample["task_memory"] > self.min_free_memory
+        ):
+            return self.clamp(limit + 1), "spare capacity"
+        return self.clamp(limit), ""
+
+    def update(self, limit: int, running: int) -> int:
+        """Samples the machine and returns the new limit, unless the last sample is more
+        recent than `interval`, in which case the limit is returned as it is.
+
+        :param limit: Current limit
+        :type limit: int
+        :param running: Number of simulations running
+        :type running: int
+        :return: The new limit
+        :rtype: int
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._last_sample is not None and now - self._last_sample < self.interval:
+                return limit
+            self._last_sample = now
+            sample = self.sample(running)
+            new_limit, reason = self.decide(limit, running, sample)
+            self.metrics.update(sample)
+            self.metrics["samples"] += 1
+            self.metrics["running"] = running
+            self.metrics["limit"] = new_limit
+            if new_limit != limit:
+                self.metrics["increases" if new_limit > limit else "decreases"] += 1
+                self.decisions.append((time.time(), limit, new_limit, reason))
+                _logger.info(
+                    "Parallel simulations %d -> %d (%s): load=%.2f, free memory=%.0f MB, "
+                    "memory per simulation=%.0f MB",
+                    limit,
+                    new_limit,
+                    reason,
+                    sample["load"],
+                    sample["free_memory"] / 2**20,
+                    sample["task_memory"] / 2**20,
+                )
+            return new_limit
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+# -------------------------------------------------------------------------------
+#
+#  ███████╗██████╗ ██╗ ██████╗███████╗██╗     ██╗██████╗
+#  ██╔════╝██╔══██╗██║██╔════╝██╔════╝██║     ██║██╔══██╗
+#  ███████╗██████╔╝██║██║     █████╗  ██║     ██║██████╔╝
+#  ╚════██║██╔═══╝ ██║██║     ██╔══╝  ██║     ██║██╔══██╗
+#  ███████║██║     ██║╚██████╗███████╗███████╗██║██████╔╝
+#  ╚══════╝╚═╝     ╚═╝ ╚═════╝╚══════╝╚══════╝╚═╝╚═════╝
+#
+# Name:        result_cache.py
+# Purpose:     Cache of simulation results, addressed by the simulation inputs
+#
+# Licence:     refer to the LICENSE file
+# -------------------------------------------------------------------------------
+"""Cache of the RAW and log files of the simulations, so that a netlist that was
+already simulated doesn't need to be simulated again. It is used by SimRunner when it
+is given a `result_cache`. ::
+
+    runner = SimRunner(simulator=LTspice, result_cache="./sim_cache")
+    ...
+    print(runner.result_cache.stats())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from ..utils.detect_encoding import EncodingDetectError, detect_encoding
+from ..utils.file_search import search_file_in_containers
+from .simulator import Simulator
+
+__all__ = ["ResultCache"]
+
+_logger = logging.getLogger("kupicelib.ResultCache")
+
+# .include, .inc and .lib lines, with the file name as first argument
+include_regex = re.compile(r"^\s*\.(?:inc(?:lude)?|lib)\s+(\"[^\"]+\"|'[^']+'|\S+)", re.I)
+
+
+class ResultCache:
+    """A folder where the results of the simulations are stored, one entry per
+    simulation, addressed by a hash of everything that determines the results: the
+    netlist, the command line switches, the simulator and the contents of the files
+    included by the netlist, searched like the simulator would.
+
+    The entries are evicted in least recently used order when the size of the cache
+    exceeds `max_size`. The cache can be shared between runs of the program, but not
+    between processes running at the same time.
+
+    The cached files are copied to the output folder, never linked, so that the RAW
+    and log files of a simulation can be modified, or overwritten by another
+    simulation, without altering the cache.
+
+    :param folder: Folder of the cache. It is created if it doesn't exist.
+    :type folder: str | Path
+    :param max_size: Maximum size of the cache in bytes, defaults to 10 GiB
+    :type max_size: int, optional
+    """
+
+    def __init__(self, folder: str | Path, max_size: int = 10 << 30) -> None:
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # entries by key, in least recently used order, with their size
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        found: list[tuple[float, str, int]] = []
+        for entry in self.folder.iterdir():
+            if entry.name.startswith("."):  # Left over by an interrupted store()
+                shutil.rmtree(entry, ignore_errors=True)
+            elif entry.is_dir():
+                size = sum(file.stat().st_size for file in entry.iterdir())
+                found.append((entry.stat().st_mtime, entry.name, size))
+        for _mtime, key, size in sorted(found):
+            self._entries[key] = size
+        self.size = sum(self._entries.values())
+
+    def key(
+        self,
+        netlist_file: Path,
+        switches: Sequence[str] | None,
+        simulator: type[Simulator],
+    ) -> str:
+        """Returns the key of a simulation.
+
+        :param netlist_file: Netlist that will be simulated
+        :type netlist_file: Path
+        :param switches: Command line switches of the simulation
+        :type switches: Sequence[str] | None
+        :param simulator: Simulator used
+        :type simulator: type[Simulator]
+        :return: The hexadecimal SHA-256 of the simulation inputs
+        :rtype: str
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{simulator.__module__}.{simulator.__qualname__}\0".encode())
+        digest.update("\0".join(simulator.spice_exe).encode() + b"\0\0")
+        digest.update("\0".join(switches or []).encode() + b"\0\0")
+        lib_paths: list[str] = []
+        try:
+            lib_paths = simulator.get_default_library_paths()
+        except Exception:  # The paths are a best effort, the file may be found anyway
+            _logger.debug("Could not get the library paths of the simulator")
+        self._hash_file(digest, netlist_file, lib_paths, set())
+        return digest.hexdigest()
+
+    def _hash_file(
+        self, digest: Any, file: Path, lib_paths: list[str], seen: set[Path]
+    ) -> None:
+        """Hashes a file, followed by the files it includes."""
+        seen.add(file.resolve())
+        digest.update(file.read_bytes())
+        try:
+            encoding = detect_encoding(file)
+        except EncodingDetectError:
+            return
+        with open(file, encoding=encoding, errors="replace") as f:
+            for line in f:
+                match = include_regex.match(line)
+                if match is None:
+                    continue
+                name = match.group(1).strip("\"'")
+                found = search_file_in_containers(
+                    name, str(file.parent), os.path.curdir, *lib_paths
+                )
+                digest.update(f"\0include {name}\0".encode())
+                if found is not None and Path(found).resolve() not in seen:
+                    self._hash_file(digest, Path(found), lib_paths, seen)
+
+    def fetch(self, key: str, raw_file: Path, log_file: Path) -> bool:
+        """Copies the cached files of a simulation to raw_file and log_file. The
+        counters of hits and misses are updated.
+
+        :param key: Key of the simulation, see key()
+        :type key: str
+        :param raw_file: Where the RAW file is expected
+        :type raw_file: Path
+        :param log_file: Where the log file is expected
+        :type log_file: Path
+        :return: True if the results were in the cache
+        :rtype: bool
+        """
+        entry = self.folder / key
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            try:
+                for cached, target in (
+                    (entry / ("result" + raw_file.suffix), raw_file),
+                    (entry / "result.log", log_file),
+                ):
+                    # A new file, in case the old one is linked to another file
+                    target.unlink(missing_ok=True)
+                    shutil.copyfile(cached, target)
+                os.utime(entry)
+            except OSError:
+                _logger.warning(f"Cache entry {key} is damaged. It was removed.")
+                self._remove(key)
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+        _logger.debug(f"Cache hit {key} for {raw_file}")
+        return True
+
+    def store(self, key: str, raw_file: Path, log_file: Path) -> None:
+        """Copies the results of a simulation in the cache, evicting the least
+        recently used entries if the cache gets too large.
+
+        :param key: Key of the simulation, see key()
+        :type key: str
+        :param raw_file: RAW file of the simulation
+        :type raw_file: Path
+        :param log_file: Log file of the simulation
+        :type log_file: Path
+        """
+        entry = self.folder / key
+        temp = self.folder / f".{key}.{threading.get_ident()}.{time.monotonic_ns()}"
+        temp.mkdir()
+        try:
+            shutil.copyfile(raw_file, temp / ("result" + raw_file.suffix))
+            shutil.copyfile(log_file, temp / "result.log")
+            size = sum(file.stat().st_size for file in temp.iterdir())
+            with self._lock:
+                if key in self._entries:  # stored meanwhile by another task
+                    return
+                temp.rename(entry)
+                self._entries[key] = size
+                self.size += size
+                while self.size > self.max_size and self._entries:
+                    oldest = next(iter(self._entries))
+                    self._remove(oldest)
+                    self.evictions += 1
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+        _logger.debug(f"Stored {raw_file} in the cache as {key}")
+
+    def _remove(self, key: str) -> None:
+        """Removes an entry. The lock must be held."""
+        self.size -= self._entries.pop(key, 0)
+        shutil.rmtree(self.folder / key, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Removes all the entries of the cache."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """Returns the counters of the cache.
+
+        :return: A dictionary with the number of 'hits', 'misses', 'evictions' and
+            'entries', and the 'size' of the cache in bytes
+        :rtype: dict[str, int]
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size": self.size,
+            }
@@ -21,15 +21,21 @@
 
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
+import inspect
 import logging
 import sys
+import threading
 import time
 from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import Executor, Future
 from pathlib import Path
 from time import sleep
 from typing import Any
 
 from .process_callback import ProcessCallback
+from .result_cache import ResultCache
 from .simulator import Simulator
 
 __author__ = "Nuno Canto Brum <nuno.brum@gmail.com>"
@@ -93,6 +99,7 @@ class RunTask:
         timeout: float | None = None,
         verbose: bool = False,
         exe_log: bool = False,
+        callback_executor: Executor | None = None,
     ) -> None:
         self.start_time: float | None = None
         self.stop_time: float | None = None
@@ -112,6 +119,18 @@ class RunTask:
         self.raw_file: Path | None = None
         self.log_file: Path | None = None
         self.callback_return: object | None = None
+        # When given, the callback is submitted to this executor instead of being
+        # called on the simulation thread. callback_future tracks its execution.
+        self.callback_executor: Executor | None = callback_executor
+        self.callback_future: Future[Any] | None = None
+        self._finished = threading.Event()  # set when the call to the task returns
+        # The asyncio task running the simulation, when started by AsyncSimRunner
+        self.async_task: asyncio.Task[RunTask] | None = None
+        # When cache_key is set, the results are stored in result_cache. If cache_hit
+        # is True, the results were fetched from it and the simulator isn't called.
+        self.result_cache: ResultCache | None = None
+        self.cache_key: str | None = None
+        self.cache_hit = False
         self.exe_log = exe_log
         # Create a LoggerAdapter to include run number and netlist in logs
         self.logger: logging.LoggerAdapter[logging.Logger] = logging.LoggerAdapter(
@@ -124,9 +143,8 @@ class RunTask:
         if self.verbose:
             print(f"{time.asctime()} {logger_fun.__name__}: {message}{END_LINE_TERM}")
 
-    def run(self) -> None:
-        # Running the Simulation
-
+    def _start(self) -> type[Simulator]:
+        """Marks the start of the simulation and returns the simulator to use."""
         self.start_time = clock_function()
         self.print_info(
             _logger.info,
@@ -139,6 +157,14 @@ class RunTask:
         ):
             simulator_cls = simulator_cls.create_from(path_to_exe=None)
             self.simulator = simulator_cls
+        return simulator_cls
+
+    def run(self) -> None:
+        # Running the Simulation
+        simulator_cls = self._start()
+        if self.cache_hit:
+            self._finish(0)
+            return
         # start execution
         run_result = simulator_cls.run(
             self.netlist_file.absolute().as_posix(),
@@ -146,7 +172,58 @@ class RunTask:
             timeout=self.timeout,
             exe_log=self.exe_log,
         )
-        self.retcode = int(run_result)
+        self._finish(int(run_result))
+
+    async def arun(self) -> None:
+        """Asyncio version of run(). The simulator is launched with Simulator.arun(),
+        and the result files and the callback are handled on a worker thread, so that
+        the event loop isn't blocked.
+
+        On timeout or cancellation the simulation is marked as failed before the
+        exception is propagated.
+        """
+        try:
+            simulator_cls = self._start()
+            if self.cache_hit:
+                await asyncio.to_thread(self._finish, 0)
+                return
+            try:
+                run_result = await simulator_cls.arun(
+                    self.netlist_file.absolute().as_posix(),
+                    cmd_line_switches=self.switches,
+                    timeout=self.timeout,
+                    exe_log=self.exe_log,
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._finish(1)  # The simulator was killed, there are no results
+                raise
+            await asyncio.to_thread(self._finish, int(run_result))
+        finally:
+            self._finished.set()
+
+    def _cancel(self) -> None:
+        """Marks as failed a task that was cancelled before its simulation started."""
+        if self.retcode == -1:
+            self.retcode = 1
+            self._finished.set()
+
+    async def results(self) -> object | tuple[Path | None, Path | None] | None:
+        """Asyncio version of wait_results(). Waits for the completion of the task,
+        including its callback, and returns its results. See get_results().
+        """
+        if self.async_task is not None:
+            await asyncio.shield(self.async_task)
+        else:
+            await asyncio.to_thread(self.wait_results)
+        if self.callback_future is not None:
+            await asyncio.wrap_future(self.callback_future)
+        return self.get_results()
+
+    def _finish(self, retcode: int) -> None:
+        """Processes the outcome of the simulation: looks for the result files and
+        calls the callback."""
+        assert self.start_time is not None
+        self.retcode = retcode
         self.stop_time = clock_function()
         # print simulation time with format HH:MM:SS.mmmmmm
 
@@ -162,9 +239,13 @@ class RunTask:
             self.raw_file = raw_file
             if raw_file.exists() and log_file.exists():
                 # simulation successful
-                self.print_info(
-                    _logger.info, f"Simulation Successful. Time elapsed: {sim_time}"
-                )
+                if self.cache_hit:
+                    self.print_info(_logger.info, "Simulation results taken from the cache")
+                else:
+                    self.print_info(
+                        _logger.info, f"Simulation Successful. Time elapsed: {sim_time}"
+                    )
+                    self._store_in_cache(raw_file, log_file)
 
                 if self.callback:
                     if self.callback_args is not None:
@@ -181,6 +262,9 @@ class RunTask:
                         f"(rawfile, logfile{callback_print})."
                     )
                     self.print_info(_logger.info, message)
+                    if self.callback_executor is not None:
+                        self._submit_callback(raw_file, log_file)
+                        return
                     try:
                         if self.callback_args is not None:
                             return_or_process = self.callback(
@@ -222,6 +306,50 @@ class RunTask:
             if log_file.exists():
                 self.log_file = log_file.replace(log_file.with_suffix(".fail"))
 
+    def _store_in_cache(self, raw_file: Path, log_file: Path) -> None:
+        """Stores the results of the simulation in the result cache, if any. It is done
+        before calling the callback, which may modify or delete the files."""
+        if self.result_cache is None or self.cache_key is None:
+            return
+        try:
+            self.result_cache.store(self.cache_key, raw_file, log_file)
+        except OSError:
+            self.logger.exception("Could not store the results in the cache")
+
+    def _submit_callback(self, raw_file: Path, log_file: Path) -> None:
+        """Submits the callback to the callback executor. A ProcessCallback class isn't
+        started as a new process, its callback() method is submitted instead."""
+        assert self.callback is not None and self.callback_executor is not None
+        callback = self.callback
+        if inspect.isclass(callback) and issubclass(callback, ProcessCallback):
+            callback = callback.callback
+        kwargs = self.callback_args if self.callback_args is not None else {}
+        future = self.callback_executor.submit(callback, raw_file, log_file, **kwargs)
+        self.callback_future = future
+        future.add_done_callback(self._callback_done)
+
+    def _callback_done(self, future: Future[Any]) -> None:
+        """Stores the result of a callback that was submitted to the callback
+        executor."""
+        try:
+            self.callback_return = future.result()
+        except Exception:
+            self.logger.exception("Exception during callback execution")
+        callback_start_time = self.stop_time
+        self.stop_time = clock_function()
+        if callback_start_time is not None:
+            self.print_info(
+                _logger.info,
+                "Callback Finished. Time elapsed: {}".format(format_time_difference(
+                    self.stop_time - callback_start_time
+                )),
+            )
+
+    def callback_pending(self) -> bool:
+        """Returns True while a callback submitted to the callback executor didn't
+        finish."""
+        return self.callback_future is not None and not self.callback_future.done()
+
     def get_results(self) -> object | tuple[Path | None, Path | None] | None:
         """Returns the simulation outputs if the simulation and callback function has
         already finished.
@@ -256,9 +384,17 @@ class RunTask:
         # wait until simulation run() has been executed
         while self.retcode == -1:
             sleep(0.1)
+        if self.callback_executor is not None:
+            # the callback is submitted after retcode is set
+            self._finished.wait()
+            if self.callback_future is not None:
+                concurrent.futures.wait([self.callback_future])
         return self.get_results()
 
     def __call__(self) -> RunTask:
         """Allow this object to be submitted to an Executor."""
-        self.run()
+        try:
+            self.run()
+        finally:
+            self._finished.set()
         return self
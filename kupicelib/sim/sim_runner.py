@@ -99,11 +99,16 @@ import concurrent.futures
 import inspect  # Library used to get the arguments of the callback function
 import logging
 import shutil
+import threading
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from pathlib import Path
-from time import sleep
-from time import thread_time as clock
+from time import monotonic
 from typing import TYPE_CHECKING, Protocol
 
 if TYPE_CHECKING:
@@ -112,14 +117,18 @@ if TYPE_CHECKING:
 from ..editor.base_editor import BaseEditor
 from ..sim.run_task import RunTask, clock_function
 from ..sim.simulator import Simulator
+from .concurrency_controller import ConcurrencyController
 from .process_callback import ProcessCallback
+from .result_cache import ResultCache
 
 __author__ = "Nuno Canto Brum <nuno.brum@gmail.com>"
 __copyright__ = "Copyright 2020, Fribourg Switzerland"
 
 __all__ = [
     "AnyRunner",
+    "ConcurrencyController",
     "ProcessCallback",
+    "ResultCache",
     "RunTask",
     "SimRunner",
     "SimRunnerConfigError",
@@ -143,6 +152,50 @@ class SimRunnerConfigError(Exception):
     """Configuration error for SimRunner."""
 
 
+class _Slots:
+    """Simulation slots, whose number can be changed while they are in use."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(
+        self,
+        timeout: float | None,
+        adapt: Callable[[], None] | None = None,
+        interval: float | None = None,
+    ) -> bool:
+        """Takes a slot, waiting at most timeout seconds for one to be free. The adapt
+        function, which can change the limit, is called before checking for a free
+        slot, and at least every interval seconds while waiting."""
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._condition:
+            while True:
+                if adapt is not None:
+                    adapt()
+                if self.in_use < self.limit:
+                    self.in_use += 1
+                    return True
+                wait = None if deadline is None else deadline - monotonic()
+                if wait is not None and wait <= 0:
+                    return False
+                if interval is not None:
+                    wait = interval if wait is None else min(wait, interval)
+                self._condition.wait(wait)
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_use -= 1
+            self._condition.notify()
+
+    def set_limit(self, limit: int) -> None:
+        with self._condition:
+            if limit > self.limit:
+                self._condition.notify(limit - self.limit)
+            self.limit = limit
+
+
 class AnyRunner(Protocol):
     def run(
         self,
@@ -183,6 +236,28 @@ class SimRunner(AnyRunner):
     :type output_folder: str, optional
     :param simulator: Forcing a given simulator executable.
     :type simulator: Simulator, optional
+    :param callback_executor: Where the callbacks are executed. With "thread", the
+        default, the callback is called on the thread that ran the simulation, which
+        holds the simulation slot until the callback returns. With "process", the
+        callbacks are submitted to a pool of worker processes, separate from the
+        simulation slots, which is better suited to CPU intensive callbacks. The
+        callbacks and their arguments must then be picklable, i.e. defined at module
+        level. A ProcessCallback class runs its callback() method on the pool.
+    :type callback_executor: str, optional
+    :param callback_workers: Number of worker processes of the callback pool. Default
+        is the number of CPUs. Only used when callback_executor is "process".
+    :type callback_workers: int, optional
+    :param concurrency: Controller that adapts the number of parallel simulations to
+        the load of the machine, between its bounds. `parallel_sims` is then the
+        initial number, and is updated with the decisions of the controller.
+    :type concurrency: ConcurrencyController, optional
+    :param result_cache: Folder, or ResultCache instance, where the results of the
+        simulations are cached. A netlist that was already simulated, with the same
+        switches, simulator and included files, isn't simulated again: the cached RAW
+        and log files are copied to the output folder, and the callback is called by
+        run() itself, or submitted to the callback pool, without waiting for the
+        running simulations.
+    :type result_cache: str | Path | ResultCache, optional
     """
 
     def __init__(
@@ -193,6 +268,10 @@ class SimRunner(AnyRunner):
         timeout: float | None = 600.0,
         verbose: bool = False,
         output_folder: str | None = None,
+        callback_executor: str = "thread",
+        callback_workers: int | None = None,
+        concurrency: ConcurrencyController | None = None,
+        result_cache: str | Path | ResultCache | None = None,
     ) -> None:
         # The '*' in the parameter list forces the user to use named parameters for the
         # rest of the parameters.
@@ -210,14 +289,29 @@ class SimRunner(AnyRunner):
             if not self.output_folder.exists():
                 self.output_folder.mkdir()
 
+        self.concurrency = concurrency
+        self.result_cache: ResultCache | None = (
+            ResultCache(result_cache) if isinstance(result_cache, str | Path) else result_cache
+        )
+        if concurrency is not None:
+            parallel_sims = concurrency.clamp(parallel_sims)
         self.parallel_sims: int = parallel_sims
         # Executor for parallel simulations
         self._executor: ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.parallel_sims
+            max_workers=(
+                self.parallel_sims if concurrency is None else concurrency.max_sims
+            )
         )
-        # track pairs of (task, future)
-        self.active_tasks: list[tuple[RunTask, Future[RunTask]]] = []
+        # Slots of the simulations started with wait_resource=True. They are released
+        # by the done callback of the future, as soon as the simulation finishes.
+        self._slots = _Slots(self.parallel_sims)
+        self._lock = threading.Lock()
+        # active tasks, by the future that is done when both the simulation and the
+        # callback are finished
+        self._active: dict[Future[RunTask], RunTask] = {}
         self.completed_tasks: list[RunTask] = []
+        # Pool of the callbacks, created on the first callback
+        self._callback_pool: ProcessPoolExecutor | None = None
         self._iterator_counter = 0  # Note: Nested iterators are not supported
 
         self.run_count: int = 0  # number of total runs
@@ -226,6 +320,14 @@ class SimRunner(AnyRunner):
         # self.failParam = []  # collects for later user investigation of failed
         # parameter sets
 
+        if callback_executor not in ("thread", "process"):
+            raise SimRunnerConfigError(
+                f"Invalid callback_executor '{callback_executor}'; "
+                "expected 'thread' or 'process'"
+            )
+        self.callback_executor = callback_executor
+        self.callback_workers = callback_workers
+
         # Gets a simulator.
         if simulator is None:
             raise SimRunnerConfigError(
@@ -259,6 +361,8 @@ class SimRunner(AnyRunner):
         except TypeError:
             # older Python versions may not support cancel_futures
             self._executor.shutdown(wait=False)
+        if self._callback_pool is not None:
+            self._callback_pool.shutdown(wait=False, cancel_futures=True)
 
     def set_simulator(self, spice_tool: type[Simulator] | Simulator) -> None:
         """Manually overriding the simulator to be used.
@@ -414,20 +518,136 @@ class SimRunner(AnyRunner):
             }
         return {}
 
+    @property
+    def active_tasks(self) -> list[tuple[RunTask, Future[RunTask]]]:
+        """The (task, future) pairs of the simulations that didn't finish yet."""
+        with self._lock:
+            return [(task, future) for future, task in self._active.items()]
+
     def _wait_for_resources(
         self, wait_resource: bool, timeout: float | None
     ) -> bool:
-        """Internal: blocks until a slot is free or timeout expires."""
-        t0 = clock()
-        while True:
-            if not wait_resource or (self.active_threads() < self.parallel_sims):
-                return True
-            if timeout is not None and clock() - t0 >= timeout + 1:
-                break
-            sleep(0.1)
+        """Internal: blocks until a slot is free or timeout expires.
+
+        The slot is taken by the caller, which must release it when the simulation
+        finishes. No slot is taken if wait_resource is False.
+        """
+        if not wait_resource:
+            return True
+        if self.concurrency is None:
+            acquired = self._slots.acquire(None if timeout is None else timeout + 1)
+        else:
+            acquired = self._slots.acquire(
+                None if timeout is None else timeout + 1,
+                adapt=self._adapt_concurrency,
+                interval=self.concurrency.interval,
+            )
+        if acquired:
+            return True
         _logger.error(f"Timeout waiting for resources for simulation {self.run_count}")
         return False
 
+    def _release_slot(self, _future: Future[RunTask]) -> None:
+        """Internal: done callback of the simulations holding a slot."""
+        self._slots.release()
+        if self.concurrency is not None:
+            self._adapt_concurrency()
+
+    def _adapt_concurrency(self) -> None:
+        """Internal: updates the number of slots with the decision of the concurrency
+        controller."""
+        assert self.concurrency is not None
+        limit = self.concurrency.update(self._slots.limit, self._slots.in_use)
+        if limit != self._slots.limit:
+            self._slots.set_limit(limit)
+            self.parallel_sims = limit
+
+    def _task_done(self, future: Future[RunTask]) -> None:
+        """Internal: moves a finished task from the active to the completed tasks. It is
+        called by the done callback of the future, and by the waiting functions, hence
+        it does nothing if the task was already moved.
+        """
+        with self._lock:
+            task = self._active.pop(future, None)
+            if task is None:
+                return
+            if task.retcode == 0:
+                self.successful_simulations += 1
+            else:
+                self.failed_simulations += 1
+            self.completed_tasks.append(task)
+        _logger.debug(
+            "Task %d moved from active to completed (retcode=%d)",
+            task.runno,
+            task.retcode,
+        )
+
+    def _wait_any(self, timeout: float | None) -> bool:
+        """Internal: blocks until at least one active task finishes or the timeout
+        expires.
+
+        :return: True if a task finished, False on timeout.
+        """
+        with self._lock:
+            futures = list(self._active)
+        if not futures:
+            return True
+        done, _pending = concurrent.futures.wait(
+            futures, timeout=timeout, return_when=FIRST_COMPLETED
+        )
+        for future in done:
+            self._task_done(future)
+        return bool(done)
+
+    def _lookup_cache(self, task: RunTask) -> None:
+        """Internal: computes the cache key of a new task and fetches its results from
+        the result cache, if there is one."""
+        if self.result_cache is None:
+            return
+        try:
+            task.cache_key = self.result_cache.key(
+                task.netlist_file, task.switches, task.simulator
+            )
+        except OSError:
+            _logger.exception(f"Could not compute the cache key of {task.netlist_file}")
+            return
+        task.result_cache = self.result_cache
+        task.cache_hit = self.result_cache.fetch(
+            task.cache_key,
+            task.netlist_file.with_suffix(task.simulator.raw_extension),
+            task.netlist_file.with_suffix(".log"),
+        )
+
+    def _task_callback_executor(
+        self, callback: CallbackType | None
+    ) -> ProcessPoolExecutor | None:
+        """Internal: returns the executor of the callback of a new task, creating the
+        pool of the callbacks if needed. None means that the callback is called by the
+        task itself."""
+        if callback is None or self.callback_executor != "process":
+            return None
+        if self._callback_pool is None:
+            self._callback_pool = ProcessPoolExecutor(max_workers=self.callback_workers)
+        return self._callback_pool
+
+    @staticmethod
+    def _chain_callback(task: RunTask, sim_future: Future[RunTask]) -> Future[RunTask]:
+        """Internal: returns a future that is done when the simulation is finished and
+        the callback it submitted to the callback pool, if any, is finished too."""
+        done: Future[RunTask] = Future()
+
+        def simulation_done(future: Future[RunTask]) -> None:
+            exception = future.exception()
+            if exception is not None:
+                done.set_exception(exception)
+            elif task.callback_future is None:  # No callback, or simulation failed
+                done.set_result(task)
+            else:
+                task.callback_future.add_done_callback(lambda _f: done.set_result(task))
+
+        sim_future.add_done_callback(simulation_done)
+        return done
+
     def run(
         self,
         netlist: str | Path | BaseEditor,
@@ -497,15 +717,6 @@ class SimRunner(AnyRunner):
 
         effective_timeout = timeout if timeout is not None else self.timeout
 
-        # Wait for an available resource slot or timeout
-        if not self._wait_for_resources(wait_resource, effective_timeout):
-            if self.verbose:
-                _logger.warning(
-                    "Timeout on launching simulation %d.", self.run_count
-                )
-            return None
-
-        # Launch the simulation task via ThreadPoolExecutor
         task = RunTask(
             simulator=self.simulator,
             runno=self.run_count,
@@ -516,9 +727,50 @@ class SimRunner(AnyRunner):
             timeout=effective_timeout,
             verbose=self.verbose,
             exe_log=exe_log,
+            callback_executor=self._task_callback_executor(callback),
         )
-        future: Future[RunTask] = self._executor.submit(task)
-        self.active_tasks.append((task, future))
+        self._lookup_cache(task)
+
+        # Wait for an available resource slot or timeout. The results taken from the
+        # cache don't need a slot.
+        holds_slot = wait_resource and not task.cache_hit
+        if not self._wait_for_resources(holds_slot, effective_timeout):
+            if self.verbose:
+                _logger.warning(
+                    "Timeout on launching simulation %d.", self.run_count
+                )
+            return None
+
+        if task.cache_hit:
+            # The results are already in place, so the task is completed right away
+            # instead of waiting behind the running simulations.
+            sim_future: Future[RunTask] = Future()
+            try:
+                sim_future.set_result(task())
+            except Exception as exception:
+                sim_future.set_exception(exception)
+        else:
+            # Launch the simulation task via ThreadPoolExecutor
+            try:
+                sim_future = self._executor.submit(task)
+            except BaseException:
+                if holds_slot:
+                    self._slots.release()
+                raise
+        if holds_slot:
+            # The slot is released when the simulation finishes, even if the callback
+            # is still running on the callback pool.
+            sim_future.add_done_callback(self._release_slot)
+        future = (
+            sim_future
+            if task.callback_executor is None
+            else self._chain_callback(task, sim_future)
+        )
+        with self._lock:
+            self._active[future] = task
+        # The bookkeeping is done as soon as the simulation finishes, on the worker
+        # thread. If it already finished, the callback is called right away.
+        future.add_done_callback(self._task_done)
         _logger.debug(
             "RunTask submitted: runno=%d, netlist_file=%s",
             task.runno,
@@ -592,47 +844,38 @@ class SimRunner(AnyRunner):
             "RunTask (run_now) completed: retcode=%d, raw_file=%s, log_file=%s",
             t.retcode, t.raw_file, t.log_file,
         )
-        self.completed_tasks.append(t)
-        if t.retcode == 0:
-            self.successful_simulations += 1
-        else:
-            # simulation failed
-            self.failed_simulations += 1
+        with self._lock:
+            self.completed_tasks.append(t)
+            if t.retcode == 0:
+                self.successful_simulations += 1
+            else:
+                # simulation failed
+                self.failed_simulations += 1
         return t.raw_file, t.log_file  # Returns the raw and log file
 
     def active_threads(self) -> int:
         """Returns the number of active sim_tasks."""
         self.update_completed()
-        return len(self.active_tasks)
+        return len(self._active)
 
     def update_completed(self) -> None:
         """This function updates the active_tasks and completed_tasks lists. It moves
-        the finished task from the active_tasks list to the completed_tasks list. It
-        should be called periodically to update the status of the simulations.
+        the finished task from the active_tasks list to the completed_tasks list.
+
+        The tasks are moved as soon as they finish, so calling this function is no
+        longer needed. It only makes sure that the tasks whose done callback is still
+        running are moved.
 
         :returns: Nothing
         """
         _logger.debug(
             "update_completed: active=%d, completed=%d", len(
-                self.active_tasks), len(
+                self._active), len(
                 self.completed_tasks))
-        i = 0
-        while i < len(self.active_tasks):
-            task, future = self.active_tasks[i]
-            if not future.done():
-                i += 1
-            else:
-                if task.retcode == 0:
-                    self.successful_simulations += 1
-                else:
-                    self.failed_simulations += 1
-                self.active_tasks.pop(i)
-                self.completed_tasks.append(task)
-                _logger.debug(
-                    "Task %d moved from active to completed (retcode=%d)",
-                    task.runno,
-                    task.retcode,
-                )
+        with self._lock:
+            done = [future for future in self._active if future.done()]
+        for future in done:
+            self._task_done(future)
 
     def kill_all_ltspice(self) -> None:
         """.. deprecated:: 1.0 Use `kill_all_spice()` instead.
@@ -709,18 +952,14 @@ class SimRunner(AnyRunner):
             absolute_stop_time: float | None = None
         else:
             absolute_stop_time = clock_function() + timeout
-        while self.active_tasks:
-            sleep(1)
-            self.update_completed()
-            if timeout is None:
-                dynamic_stop_time = self._maximum_stop_time()
-                if dynamic_stop_time is None:
-                    continue
-            else:
-                assert absolute_stop_time is not None
-                dynamic_stop_time = absolute_stop_time
-
-            if clock_function() > dynamic_stop_time:
+        while self._active:
+            stop_time = self._maximum_stop_time() if timeout is None else absolute_stop_time
+            # The tasks that didn't start yet have no stop time. Check again in a
+            # second, as they may have started by then.
+            wait_time = 1.0 if stop_time is None else max(stop_time - clock_function(), 0)
+            if self._wait_any(wait_time) or stop_time is None:
+                continue
+            if clock_function() >= stop_time:
                 if abort_all_on_timeout:
                     self.kill_all_spice()
                 return False
@@ -833,9 +1072,10 @@ class SimRunner(AnyRunner):
                     return ret.get_results()
                 else:
                     _logger.error(f"Skipping {ret.runno} because simulation failed.")
+                    continue
 
             # Then check if there are any active tasks
-            if len(self.active_tasks) == 0:
+            if not self._active:
                 raise StopIteration
 
             # Then go through the active tasks to get the maximum timeout
@@ -848,5 +1088,6 @@ class SimRunner(AnyRunner):
                     f"Exceeded {self.timeout} seconds waiting for tasks to finish"
                 )
 
-            # Wait for the active tasks to finish with a timeout
-            sleep(0.2)  # Go asleep for a while
+            # Wait for one of the active tasks to finish
+            wait_time = 1.0 if stop_time is None else max(stop_time - clock_function(), 0)
+            self._wait_any(wait_time)
@@ -18,6 +18,7 @@
 # Licence:     refer to the LICENSE file
 # -------------------------------------------------------------------------------
 
+import asyncio
 import logging
 import os
 import shlex
@@ -66,6 +67,26 @@ else:
         return subprocess.call(command, timeout=timeout, stdout=stdout, stderr=stderr)
 
 
+async def run_function_async(
+    command: Sequence[str],
+    timeout: float | None = None,
+    stdout: StdStream = None,
+    stderr: StdStream = None,
+) -> int:
+    """Asyncio version of run_function(). The process is killed if it doesn't finish
+    within the timeout, in which case asyncio.TimeoutError is raised, or if the
+    calling task is cancelled.
+    """
+    _logger.debug(f"Running command: {command}, with timeout: {timeout}")
+    process = await asyncio.create_subprocess_exec(*command, stdout=stdout, stderr=stderr)
+    try:
+        return await asyncio.wait_for(process.wait(), timeout)
+    finally:
+        if process.returncode is None:  # On timeout or when cancelled
+            process.kill()
+            await process.wait()
+
+
 class SpiceSimulatorError(Exception):
     """Generic Simulator Error Exceptions."""
 
@@ -250,6 +271,58 @@ class Simulator(ABC):
             "This class should be subclassed and this function should be overridden."
         )
 
+    @classmethod
+    def command_line(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[Any] | str | None = None,
+    ) -> list[str]:
+        """Returns the command line that simulates the netlist file. It is used by
+        arun(), and should be overriden by the subclasses that support it.
+        """
+        raise SpiceSimulatorError(
+            f"{cls.__name__} doesn't provide its command line, and can't be run by arun()."
+        )
+
+    @classmethod
+    def exe_log_file(cls, netlist_file: Path) -> Path:
+        """Returns the file where the console messages of the simulator are written
+        when exe_log is True."""
+        return netlist_file.with_suffix(".exe.log")
+
+    @classmethod
+    async def arun(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[Any] | str | None = None,
+        timeout: float | None = None,
+        exe_log: bool = False,
+    ) -> int:
+        """Asyncio version of run(). The simulator is launched with
+        asyncio.create_subprocess_exec(), using the command line given by
+        command_line().
+
+        :param netlist_file: path to the netlist file
+        :type netlist_file: str | Path
+        :param cmd_line_switches: additional command line options, defaults to None
+        :type cmd_line_switches: list, optional
+        :param timeout: If the process takes longer, it is killed and an
+            asyncio.TimeoutError is raised, defaults to None
+        :type timeout: float, optional
+        :param exe_log: If True, the console messages of the simulator are written to
+            the file given by exe_log_file(), defaults to False
+        :type exe_log: bool, optional
+        :return: return code from the process
+        :rtype: int
+        """
+        cmd_run = cls.command_line(netlist_file, cmd_line_switches)
+        if not exe_log:
+            return await run_function_async(cmd_run, timeout=timeout)
+        with cls.exe_log_file(Path(netlist_file)).open("w", encoding="utf-8") as outfile:
+            return await run_function_async(
+                cmd_run, timeout=timeout, stdout=outfile, stderr=subprocess.STDOUT
+            )
+
     @classmethod
     @abstractmethod
     def valid_switch(
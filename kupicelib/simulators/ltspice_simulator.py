@@ -195,16 +195,19 @@ class LTspice(Simulator):
 
 
     @classmethod
-    def run(
+    def exe_log_file(cls, netlist_file: Path) -> Path:
+        """LTspice writes its console messages to <netlist>.exe.log, keeping the
+        extension of the netlist."""
+        return netlist_file.with_suffix(netlist_file.suffix + ".exe.log")
+
+    @classmethod
+    def command_line(
         cls,
         netlist_file: str | Path,
         cmd_line_switches: Sequence[str] | str | None = None,
-        timeout: float | None = None,
-        stdout: StdStream = None,
-        stderr: StdStream = None,
-        exe_log: bool = False,
-    ) -> int:
-        """Execute a LTspice simulation in batch mode."""
+    ) -> list[str]:
+        """Returns the command line that simulates the netlist file. See run() for
+        the parameters."""
         if not cls.is_available():
             _logger.error("================== ALERT! ====================")
             _logger.error("Unable to find a LTspice executable.")
@@ -251,9 +254,24 @@ class LTspice(Simulator):
             ]
         else:
             raise NotImplementedError("Unsupported Platform for LTspice Simulator")
+        return cmd_run
+
+    @classmethod
+    def run(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[str] | str | None = None,
+        timeout: float | None = None,
+        stdout: StdStream = None,
+        stderr: StdStream = None,
+        exe_log: bool = False,
+    ) -> int:
+        """Execute a LTspice simulation in batch mode."""
+        cmd_run = cls.command_line(netlist_file, cmd_line_switches)
+        netlist_path = Path(netlist_file)
 
         if exe_log:
-            exe_log_file = netlist_path.with_suffix(netlist_path.suffix + '.exe.log')
+            exe_log_file = cls.exe_log_file(netlist_path)
             with exe_log_file.open('w', encoding='utf-8') as exe_log_fd:
                 return run_function(
                     cmd_run,
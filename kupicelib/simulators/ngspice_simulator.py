@@ -189,6 +189,52 @@ class NGspiceSimulator(Simulator):
             raise ValueError(f"Invalid Switch '{switch_clean}'")
         return ret
 
+    @classmethod
+    def command_line(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[str] | str | None = None,
+    ) -> list[str]:
+        """Returns the command line that simulates the netlist file. See run() for
+        the parameters."""
+        if not cls.is_available():
+            _logger.error("================== ALERT! ====================")
+            _logger.error("Unable to find the NGSPICE executable.")
+            _logger.error("A specific location of the NGSPICE can be set")
+            _logger.error("using the create_from(<location>) class method")
+            _logger.error("==============================================")
+            raise SpiceSimulatorError("Simulator executable not found.")
+
+        # note: if you want ascii raw files, use "-D filetype=ascii"
+
+        if cmd_line_switches is None:
+            switches_list: list[str] = []
+        elif isinstance(cmd_line_switches, str):
+            switches_list = [cmd_line_switches]
+        else:
+            switches_list = list(cmd_line_switches)
+        netlist_file = Path(netlist_file)
+
+        logfile = netlist_file.with_suffix(".log").as_posix()
+        rawfile = netlist_file.with_suffix(".raw").as_posix()
+        extra_switches: list[str] = []
+        if cls._compatibility_mode:
+            extra_switches = ["-D", f"ngbehavior={cls._compatibility_mode}"]
+        # TODO: -a seems useless with -b, however it is still defined in the
+        # default switches. Need to check if it is really needed.
+        cmd_run = (
+            cls.spice_exe
+            + switches_list
+            + extra_switches
+            + ["-b"]
+            + ["-o"]
+            + [logfile]
+            + ["-r"]
+            + [rawfile]
+            + [netlist_file.as_posix()]
+        )
+        return cmd_run
+
     @classmethod
     def run(
         cls,
@@ -232,45 +278,12 @@ class NGspiceSimulator(Simulator):
         :return: return code from the process
         :rtype: int
         """
-        if not cls.is_available():
-            _logger.error("================== ALERT! ====================")
-            _logger.error("Unable to find the NGSPICE executable.")
-            _logger.error("A specific location of the NGSPICE can be set")
-            _logger.error("using the create_from(<location>) class method")
-            _logger.error("==============================================")
-            raise SpiceSimulatorError("Simulator executable not found.")
-
-        # note: if you want ascii raw files, use "-D filetype=ascii"
-
-        if cmd_line_switches is None:
-            switches_list: list[str] = []
-        elif isinstance(cmd_line_switches, str):
-            switches_list = [cmd_line_switches]
-        else:
-            switches_list = list(cmd_line_switches)
+        cmd_run = cls.command_line(netlist_file, cmd_line_switches)
         netlist_file = Path(netlist_file)
 
-        logfile = netlist_file.with_suffix(".log").as_posix()
-        rawfile = netlist_file.with_suffix(".raw").as_posix()
-        extra_switches: list[str] = []
-        if cls._compatibility_mode:
-            extra_switches = ["-D", f"ngbehavior={cls._compatibility_mode}"]
-        # TODO: -a seems useless with -b, however it is still defined in the
-        # default switches. Need to check if it is really needed.
-        cmd_run = (
-            cls.spice_exe
-            + switches_list
-            + extra_switches
-            + ["-b"]
-            + ["-o"]
-            + [logfile]
-            + ["-r"]
-            + [rawfile]
-            + [netlist_file.as_posix()]
-        )
         # start execution
         if exe_log:
-            log_exe_file = netlist_file.with_suffix(".exe.log")
+            log_exe_file = cls.exe_log_file(netlist_file)
             with open(log_exe_file, "w") as outfile:
                 error = run_function(
                     cmd_run, timeout=timeout, stdout=outfile, stderr=subprocess.STDOUT
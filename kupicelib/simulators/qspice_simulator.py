@@ -117,17 +117,13 @@ class Qspice(Simulator):
         raise ValueError(f"Invalid Switch '{switch_clean}'")
 
     @classmethod
-    def run(
+    def command_line(
         cls,
         netlist_file: str | Path,
         cmd_line_switches: Sequence[str] | str | None = None,
-        timeout: float | None = None,
-        stdout: StdStream = None,
-        stderr: StdStream = None,
-        exe_log: bool = False,
-    ) -> int:
-        """Execute a QSPICE simulation run."""
-
+    ) -> list[str]:
+        """Returns the command line that simulates the netlist file. See run() for
+        the parameters."""
         if not cls.is_available():
             _logger.error("================== ALERT! ====================")
             _logger.error("Unable to find the QSPICE executable.")
@@ -155,9 +151,25 @@ class Qspice(Simulator):
             + ["-r", rawfile]
             + [netlist_path.as_posix()]
         )
+        return cmd_run
+
+    @classmethod
+    def run(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[str] | str | None = None,
+        timeout: float | None = None,
+        stdout: StdStream = None,
+        stderr: StdStream = None,
+        exe_log: bool = False,
+    ) -> int:
+        """Execute a QSPICE simulation run."""
+
+        cmd_run = cls.command_line(netlist_file, cmd_line_switches)
+        netlist_path = Path(netlist_file)
 
         if exe_log:
-            log_exe_file = netlist_path.with_suffix(".exe.log")
+            log_exe_file = cls.exe_log_file(netlist_path)
             with open(log_exe_file, "w", encoding="utf-8") as outfile:
                 return run_function(
                     cmd_run,
@@ -268,6 +268,44 @@ class XyceSimulator(Simulator):
             raise ValueError(f"Invalid Switch '{switch_clean}'")
         return ret
 
+    @classmethod
+    def command_line(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[str] | str | None = None,
+    ) -> list[str]:
+        """Returns the command line that simulates the netlist file. See run() for
+        the parameters."""
+        if not cls.is_available():
+            _logger.error("================== ALERT! ====================")
+            _logger.error("Unable to find the Xyce executable.")
+            _logger.error("A specific location of the Xyce can be set")
+            _logger.error("using the create_from(<location>) class method")
+            _logger.error("==============================================")
+            raise SpiceSimulatorError("Simulator executable not found.")
+
+        if cmd_line_switches is None:
+            switches_list: list[str] = []
+        elif isinstance(cmd_line_switches, str):
+            switches_list = [cmd_line_switches]
+        else:
+            switches_list = list(cmd_line_switches)
+        netlist_path = Path(netlist_file)
+
+        logfile = netlist_path.with_suffix(".log").as_posix()
+        rawfile = netlist_path.with_suffix(".raw").as_posix()
+
+        cmd_run = (
+            cls.spice_exe
+            + switches_list
+            + ["-l"]
+            + [logfile]
+            + ["-r"]
+            + [rawfile]
+            + [netlist_path.as_posix()]
+        )
+        return cmd_run
+
     @classmethod
     def run(
         cls,
@@ -311,37 +349,12 @@ class XyceSimulator(Simulator):
         :return: return code from the process
         :rtype: int
         """
-        if not cls.is_available():
-            _logger.error("================== ALERT! ====================")
-            _logger.error("Unable to find the Xyce executable.")
-            _logger.error("A specific location of the Xyce can be set")
-            _logger.error("using the create_from(<location>) class method")
-            _logger.error("==============================================")
-            raise SpiceSimulatorError("Simulator executable not found.")
-
-        if cmd_line_switches is None:
-            switches_list: list[str] = []
-        elif isinstance(cmd_line_switches, str):
-            switches_list = [cmd_line_switches]
-        else:
-            switches_list = list(cmd_line_switches)
+        cmd_run = cls.command_line(netlist_file, cmd_line_switches)
         netlist_path = Path(netlist_file)
 
-        logfile = netlist_path.with_suffix(".log").as_posix()
-        rawfile = netlist_path.with_suffix(".raw").as_posix()
-
-        cmd_run = (
-            cls.spice_exe
-            + switches_list
-            + ["-l"]
-            + [logfile]
-            + ["-r"]
-            + [rawfile]
-            + [netlist_path.as_posix()]
-        )
         # start execution
         if exe_log:
-            log_exe_file = netlist_path.with_suffix(".exe.log")
+            log_exe_file = cls.exe_log_file(netlist_path)
             with open(log_exe_file, "w", encoding="utf-8") as outfile:
                 error = run_function(
                     cmd_run, timeout=timeout, stdout=outfile, stderr=subprocess.STDOUT
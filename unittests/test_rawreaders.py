@@ -35,17 +35,36 @@ run ./test/unittests/test_rawreaders
 
 import logging
 import os  # platform independent paths
+import shutil
 
 # ------------------------------------------------------------------------------
 # Python Libs
 import sys  # python path handling
 import unittest  # performs test
 from typing import cast
-
-from numpy import angle, exp, pi
+from unittest.mock import patch
+
+from numpy import (
+    allclose,
+    amax,
+    angle,
+    array,
+    concatenate,
+    cos,
+    diff,
+    exp,
+    interp,
+    linspace,
+    pi,
+    shares_memory,
+    sin,
+)
 
 import kupicelib
-from kupicelib.raw.raw_read import RawRead
+from kupicelib.log.logfile_data import LTComplex
+from kupicelib.raw.raw_dataset import RawDataset
+from kupicelib.raw.raw_read import RawRead, read_raw_header
+from kupicelib.raw.raw_write import RawWrite, RawWriter, Trace
 
 sys.path.append(
     os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + "/../")
@@ -71,6 +90,11 @@ temp_dir = (
 if not os.path.exists(temp_dir):
     os.mkdir(temp_dir)
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
 
 # set the logger to print to console and at info level
 kupicelib.set_log_level(logging.INFO)
@@ -358,6 +382,505 @@ class RawReader_Test(unittest.TestCase):
 
                 fileno += 1
 
+    def test_rawreaders_trace_subset(self):
+        # Reading only some traces must give the same data as reading all of them
+        for file in ("tran_ltspice.bin.raw", "ac_ltspice.bin.raw", "tran_qspice.bin.qraw"):
+            print(f"Testing trace subset with file {file}")
+            raw_all = RawRead(f"{test_dir}{file}")
+            names = [trace.name for trace in raw_all.traces]
+            subset = [names[2], names[-1]]
+            raw_sub = RawRead(f"{test_dir}{file}", traces_to_read=subset)
+            self.assertEqual([trace.name for trace in raw_sub.traces][1:], subset)
+            self.assertTrue((raw_all.get_axis() == raw_sub.get_axis()).all())
+            for name in subset:
+                self.assertTrue(
+                    (raw_all.get_wave(name) == raw_sub.get_wave(name)).all(),
+                    f"Difference in trace {name}",
+                )
+
+    def test_rawreaders_mmap(self):
+        # The memory mapped traces must match the ones read into memory, on both Normal
+        # and Fast Access files
+        tm = linspace(0, 1e-3, 1000)
+        for fastaccess in (False, True):
+            lw = RawWrite(fastacces=fastaccess)
+            lw.add_trace(Trace("time", tm))
+            lw.add_trace(Trace("V(a)", sin(2 * pi * 1e3 * tm), numerical_type="real"))
+            lw.add_trace(Trace("V(b)", cos(2 * pi * 1e3 * tm), numerical_type="real"))
+            filename = f"{temp_dir}mmap_{fastaccess}.raw"
+            lw.save(filename)
+            raw = RawRead(filename)
+            raw_mmap = RawRead(filename, mmap=True)
+            for name in ("time", "V(a)", "V(b)"):
+                self.assertTrue((raw.get_wave(name) == raw_mmap.get_wave(name)).all())
+            # Skipping traces, with and without memory mapping
+            for memory_map in (False, True):
+                raw_sub = RawRead(filename, traces_to_read="V(b)", mmap=memory_map)
+                self.assertTrue((raw.get_wave("V(b)") == raw_sub.get_wave("V(b)")).all())
+                self.assertEqual([trace.name for trace in raw_sub.traces], ["time", "V(b)"])
+        # The steps of a memory mapped file are only located when a step is accessed
+        raw = RawRead(f"{test_dir}TRAN - STEP.raw")
+        raw_mmap = RawRead(f"{test_dir}TRAN - STEP.raw", mmap=True)
+        self.assertIsNone(raw_mmap.axis._step_offsets)
+        for step in raw.get_steps():
+            wave = raw_mmap.get_wave("V(out)", step)
+            self.assertTrue((raw.get_wave("V(out)", step) == wave).all())
+        self.assertTrue((raw_mmap.axis.step_offsets == raw.axis.step_offsets).all())
+
+    def test_rawwrite_chunks(self):
+        # Normal access files are written in chunks, with the points interleaved
+        tm = linspace(0, 1e-3, 1000)
+        freq = linspace(1, 1e3, 1000)
+        for axis, trace, numerical_type in (
+            (Trace("time", tm), sin(2 * pi * 1e3 * tm), "real"),
+            (Trace("frequency", freq, numerical_type="complex"), exp(1j * freq), "complex"),
+        ):
+            lw = RawWrite(fastacces=False)
+            lw.chunk_points = 300
+            lw.add_trace(axis)
+            lw.add_trace(Trace("V(a)", trace, numerical_type=numerical_type))
+            lw.add_trace(Trace("V(b)", -trace, numerical_type=numerical_type))
+            filename = f"{temp_dir}chunks_{numerical_type}.raw"
+            lw.save(filename)
+            expected = b"".join(
+                trace.data[i].tobytes() for i in range(len(tm)) for trace in lw._traces
+            )
+            with open(filename, "rb") as f:
+                self.assertTrue(f.read().endswith("Binary:\n".encode("utf_16_le") + expected))
+            raw = RawRead(filename)
+            self.assertTrue((raw.get_wave("V(b)") == lw.get_trace("V(b)").data).all())
+
+    def test_rawwriter(self):
+        # Points written in blocks must give the same file as RawWrite
+        tm = linspace(0, 1e-3, 1000)
+        va = sin(2 * pi * 1e3 * tm)
+        lw = RawWrite(fastacces=False)
+        lw.add_trace(Trace("time", tm))
+        lw.add_trace(Trace("V(a)", va, numerical_type="real"))
+        lw.save(f"{temp_dir}rawwrite.raw")
+        filename = f"{temp_dir}rawwriter.raw"
+        traces = [Trace("time", tm[:10]), Trace("V(a)", va[:10], numerical_type="real")]
+        with RawWriter.open(filename, traces=traces) as writer:
+            writer.write_points({"time": tm[10:600], "V(a)": va[10:600]})
+            writer.flush()
+            self.assertEqual(len(RawRead(filename).get_axis()), 600)
+            writer.write_points([tm[600:], va[600:]])
+            with self.assertRaises(IndexError):
+                writer.write_points([tm[:2], va[:3]])
+        self.assertEqual(writer.n_points, 1000)
+        plotname = "Plotname:".encode("utf_16_le")
+        with open(f"{temp_dir}rawwrite.raw", "rb") as f1, open(filename, "rb") as f2:
+            data1, data2 = f1.read(), f2.read()
+            # Only the Date line may differ
+            self.assertEqual(data1[data1.index(plotname):], data2[data2.index(plotname):])
+        raw = RawRead(filename)
+        self.assertTrue((raw.get_wave("V(a)") == lw.get_trace("V(a)").data).all())
+
+        # A block that doesn't fit in the 'No. Points' field is refused, and the file
+        # keeps the points written so far
+        with (
+            patch("kupicelib.raw.raw_write._POINTS_WIDTH", 3),
+            RawWriter.open(filename, traces=traces) as writer,
+        ):
+            writer.write_points([tm[10:999], va[10:999]])
+            with self.assertRaises(OverflowError):
+                writer.write_points([tm[999:], va[999:]])
+        raw = RawRead(filename)
+        self.assertEqual(raw.nPoints, 999)
+        self.assertTrue((raw.get_wave("V(a)") == lw.get_trace("V(a)").data[:999]).all())
+
+    def test_rawwrite_axis_alignment(self):
+        # Traces with different axes are interpolated to the union of the axes
+        waves = {}
+        for name, n_points in (("a", 101), ("b", 151)):
+            tm = linspace(0, 1e-3, n_points)
+            lw = RawWrite()
+            lw.add_trace(Trace("time", tm))
+            lw.add_trace(Trace(f"V({name})", sin(2 * pi * 1e3 * tm), numerical_type="real"))
+            lw.save(f"{temp_dir}align_{name}.raw")
+            waves[name] = RawRead(f"{temp_dir}align_{name}.raw")
+        for minimum_timestep in (0.0, 2e-5):
+            lw = RawWrite()
+            lw.add_traces_from_raw(waves["a"], "V(a)")
+            lw.add_traces_from_raw(
+                waves["b"], "V(b)", force_axis_alignment=True, minimum_timestep=minimum_timestep
+            )
+            filename = f"{temp_dir}align_{minimum_timestep}.raw"
+            lw.save(filename)
+            raw = RawRead(filename)
+            axis = raw.get_axis()
+            if minimum_timestep:
+                self.assertTrue((diff(axis) > 1e-5).all())
+                self.assertEqual(len(axis), 51)
+            else:
+                # 0, 10us, 20us, ... are common to both axes
+                self.assertEqual(len(axis), 101 + 151 - 51)
+            for name in ("a", "b"):
+                source = waves[name]
+                expected = interp(axis, source.get_axis(), source.get_wave(f"V({name})"))
+                self.assertTrue(allclose(raw.get_wave(f"V({name})"), expected, atol=1e-6))
+
+        # The merged axis has the same length as the original one, but other values
+        tm = array([0, 0.1, 2, 3])
+        lw = RawWrite()
+        lw.add_trace(Trace("time", tm))
+        lw.add_trace(Trace("V(c)", tm.copy(), numerical_type="real"))
+        tm = array([0, 1.5, 3])
+        lw_d = RawWrite()
+        lw_d.add_trace(Trace("time", tm))
+        lw_d.add_trace(Trace("V(d)", tm.copy(), numerical_type="real"))
+        lw_d.save(f"{temp_dir}align_d.raw")
+        lw.add_traces_from_raw(
+            RawRead(f"{temp_dir}align_d.raw"),
+            "V(d)",
+            force_axis_alignment=True,
+            minimum_timestep=1.0,
+        )
+        lw.save(f"{temp_dir}align_same_length.raw")
+        raw = RawRead(f"{temp_dir}align_same_length.raw")
+        self.assertTrue((raw.get_axis() == [0, 1.5, 2, 3]).all())
+        for name in ("V(c)", "V(d)"):
+            self.assertTrue(allclose(raw.get_wave(name), raw.get_axis()))
+
+    def test_rawwrite_steps(self):
+        # Selected steps are repackaged in a smaller stepped file
+        raw = RawRead(f"{test_dir}TRAN - STEP.raw")
+        lw = RawWrite()
+        lw.add_traces_from_raw(raw, ["V(out)", "I(R1)"], steps=[1, 3])
+        filename = f"{temp_dir}steps.raw"
+        lw.save(filename)
+        raw2 = RawRead(filename)
+        self.assertEqual(raw2.steps, [raw.steps[1], raw.steps[3]])
+        for new_step, step in enumerate([1, 3]):
+            self.assertTrue((raw2.get_axis(new_step) == raw.get_axis(step)).all())
+            wave = raw.get_wave("V(out)", step)
+            self.assertTrue((raw2.get_wave("V(out)", new_step) == wave).all())
+        # More traces of the same steps can be added, but not of other steps
+        lw.add_traces_from_raw(raw, "V(in)", steps=[1, 3])
+        with self.assertRaises(ValueError):
+            lw.add_traces_from_raw(raw, "I(R1)", steps=[0, 3])
+
+        # Stepped traces given step by step
+        tm = linspace(0, 1e-3, 100)
+        lw = RawWrite()
+        lw.add_trace(Trace.from_steps("time", [tm, tm[:50]]))
+        lw.add_trace(Trace.from_steps("V(a)", [sin(tm), cos(tm[:50])], numerical_type="real"))
+        lw.steps = [{"freq": 1e3}, {"freq": 2e3}]
+        lw.save(filename)
+        raw2 = RawRead(filename)
+        self.assertEqual(raw2.steps, lw.steps)
+        self.assertEqual(raw2.get_len(1), 50)
+        self.assertTrue(allclose(raw2.get_wave("V(a)", 1), cos(tm[:50])))
+        lw.steps = [{"freq": 1e3}]
+        with self.assertRaises(ValueError):
+            lw.save(filename)
+
+    def test_rawdataset(self):
+        # Several runs, with a different number of points, seen as one dataset
+        for run in range(4):
+            tm = linspace(0, 1e-3, 100 + run)
+            lw = RawWrite()
+            lw.add_trace(Trace("time", tm))
+            lw.add_trace(Trace("V(a)", (run + 1) * sin(2 * pi * 1e3 * tm), numerical_type="real"))
+            lw.save(f"{temp_dir}dataset_{run}.raw")
+        dataset = RawDataset(f"{temp_dir}dataset_*.raw", max_open_files=2)
+        self.assertEqual(len(dataset), 4)
+        self.assertEqual(dataset.get_trace_names(), ["time", "V(a)"])
+        for run in (3, 0, 1, 2):
+            wave = dataset.get_wave("V(a)", run)
+            self.assertEqual(len(wave), 100 + run)
+            self.assertTrue((wave == RawRead(dataset.files[run]).get_wave("V(a)")).all())
+        self.assertEqual(list(dataset._open), [1, 2])
+        with self.assertRaises(ValueError):
+            dataset.stack("V(a)")
+        tm = linspace(0, 1e-3, 11)
+        stats = dataset.stats("V(a)", axis=tm)
+        expected = [(run + 1) * sin(2 * pi * 1e3 * tm) for run in range(4)]
+        self.assertTrue(allclose(stats["max"], amax(expected, axis=0), atol=1e-2))
+        self.assertTrue(allclose(stats["mean"], 2.5 * sin(2 * pi * 1e3 * tm), atol=1e-2))
+        runs = [(run, step, len(waves["V(a)"])) for run, step, _, waves in dataset.iter_steps()]
+        self.assertEqual(runs, [(run, 0, 100 + run) for run in range(4)])
+        # The traces must match
+        with self.assertRaises(ValueError):
+            RawDataset([dataset.files[0], f"{test_dir}TRAN - STEP.raw"])
+
+    def test_rawreaders_decimated(self):
+        tm = linspace(0, 1, 200000)
+        lw = RawWrite()
+        lw.add_trace(Trace("time", tm))
+        va = sin(2 * pi * 7 * tm) * cos(2 * pi * 1e3 * tm)
+        lw.add_trace(Trace("V(a)", va, numerical_type="real"))
+        lw.save(f"{temp_dir}decimated.raw")
+        trace = RawRead(f"{temp_dir}decimated.raw").get_trace("V(a)")
+        wave = trace.get_wave()
+        for x_range in (None, (0.1, 0.35), (0.5, 0.5005)):
+            start, end = (0, len(tm)) if x_range is None else tm.searchsorted(x_range)
+            for method in ("minmax", "lttb"):
+                x, y = trace.get_wave_decimated(max_points=1000, method=method, x_range=x_range)
+                self.assertLessEqual(len(x), min(end - start, 1010))
+                # Only points of the trace are returned
+                position = tm.searchsorted(x)
+                self.assertTrue((tm[position] == x).all())
+                self.assertTrue((wave[position] == y).all())
+                self.assertEqual((x[0], x[-1]), (tm[start], tm[end - 1]))
+                if method == "minmax":
+                    self.assertEqual(y.max(), wave[start:end].max())
+                    self.assertEqual(y.min(), wave[start:end].min())
+        with self.assertRaises(ValueError):
+            trace.get_wave_decimated(method="average")
+        # The smallest reduction keeps the first and the last point
+        for method in ("minmax", "lttb"):
+            x, _y = trace.get_wave_decimated(max_points=3, method=method)
+            self.assertEqual((x[0], x[-1]), (tm[0], tm[-1]))
+            for max_points in (0, 1, 2):
+                with self.assertRaises(ValueError):
+                    trace.get_wave_decimated(max_points=max_points, method=method)
+
+    def test_rawreaders_header(self):
+        # The header must be found regardless of where the chunk boundaries fall
+        for simulator in testset:
+            for analysis in ("ac", "tran"):
+                for file in testset[simulator][analysis]["files"]:
+                    with open(f"{test_dir}{file}", "rb") as f:
+                        encoding, header, data_start = read_raw_header(f)
+                        self.assertEqual(f.tell(), data_start)
+                    self.assertTrue(header[0].startswith("Title:"))
+                    self.assertIn(header[-1], ("Binary:", "Values:"))
+                    with open(f"{test_dir}{file}", "rb") as f:
+                        self.assertEqual(
+                            read_raw_header(f, chunk_size=7),
+                            (encoding, header, data_start),
+                            f"Difference in header of {file}",
+                        )
+
+    def test_rawreaders_ascii_errors(self):
+        # Corrupted ASCII files must be reported as such
+        with open(f"{test_dir}tran_xyce.ascii.raw", "rb") as f:
+            contents = f.read()
+        for corruption, message in (
+            (contents.replace(b"\n3\t", b"\n4\t", 1), "point is not in sequence (3 != 4)"),
+            (contents[: len(contents) // 2], "end of file encountered too early"),
+        ):
+            filename = f"{temp_dir}corrupted.ascii.raw"
+            with open(filename, "wb") as f:
+                f.write(corruption)
+            with self.assertRaises(RuntimeError) as context:
+                RawRead(filename, dialect="xyce")
+            self.assertIn(message, str(context.exception))
+
+    def test_rawreaders_points_at(self):
+        # The vectorized lookup must match the point by point lookup
+        for file, trace_name in (
+            ("tran_ltspice.bin.raw", "V(out)"),
+            ("ac_ltspice.bin.raw", "V(out)"),
+            ("TRAN - STEP.raw", "V(out)"),
+        ):
+            raw = RawRead(f"{test_dir}{file}")
+            trace = raw.get_trace(trace_name)
+            for step in raw.get_steps():
+                axis = raw.get_axis(step).real
+                points = linspace(axis[0], axis[-1], 37)
+                values = trace.get_points_at(points, step)
+                for point, value in zip(points, values, strict=True):
+                    self.assertAlmostEqual(
+                        complex(trace.get_point_at(point, step)), complex(value), 5
+                    )
+            with self.assertRaises(IndexError):
+                trace.get_points_at([axis[0] - 1])
+
+    def test_rawreaders_iter_steps(self):
+        # Streaming the steps must give the same data as reading the whole file
+        for file in ("TRAN - STEP.raw", "AC - STEP.raw", "QSPICE_TRAN - STEP_1.qraw", "TRAN.raw"):
+            raw = RawRead(f"{test_dir}{file}")
+            names = [trace.name for trace in raw.traces]
+            raw_header = RawRead(f"{test_dir}{file}", headeronly=True)
+            n_steps = 0
+            for step, params, waves in raw_header.iter_steps(names[-1]):
+                self.assertEqual(list(waves), [names[0], names[-1]])
+                self.assertEqual(params, raw.steps[step] if raw.steps else {})
+                for name, wave in waves.items():
+                    self.assertTrue((wave == raw.get_wave(name, step)).all())
+                n_steps += 1
+            self.assertEqual(n_steps, len(raw.get_steps()))
+
+        # A truncated file gives the complete steps, and fails on the last one
+        filename = f"{temp_dir}truncated.raw"
+        for file in ("TRAN - STEP.raw", "QSPICE_TRAN - STEP_1.qraw"):
+            shutil.copy(f"{test_dir}{file}", filename)
+            with open(filename, "r+b") as raw_file:
+                raw_file.truncate(os.path.getsize(filename) - 100)
+            raw_header = RawRead(filename, headeronly=True)
+            steps = raw_header.iter_steps()
+            self.assertEqual(next(steps)[0], 0)
+            with self.assertRaisesRegex(RuntimeError, "end of file"):
+                for _ in steps:
+                    pass
+
+    def test_rawreaders_cache(self):
+        # Work on copies, as the cache is written next to the RAW file
+        filename = f"{temp_dir}cached.raw"
+        shutil.copy(f"{test_dir}TRAN - STEP.raw", filename)
+        shutil.copy(f"{test_dir}TRAN - STEP.log", f"{temp_dir}cached.log")
+        shutil.rmtree(RawRead.cache_path(filename), ignore_errors=True)
+        raw = RawRead(filename, cache=True)
+        self.assertTrue((RawRead.cache_path(filename) / "meta.json").exists())
+        # Without the .log file, the steps can only come from the cache
+        os.remove(f"{temp_dir}cached.log")
+        cached = RawRead(filename, cache=True)
+        self.assertEqual(cached.steps, raw.steps)
+        self.assertEqual(cached.get_trace_names(), raw.get_trace_names())
+        self.assertEqual((cached.block_size, cached.data_size), (raw.block_size, raw.data_size))
+        for name in raw.get_trace_names():
+            for step in raw.get_steps():
+                self.assertTrue((cached.get_wave(name, step) == raw.get_wave(name, step)).all())
+        # Changing the RAW file invalidates the cache
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        reread = RawRead(filename, cache=True)
+        self.assertEqual(reread.steps, [{"run": i + 1} for i in range(len(raw.steps))])
+
+        # The step values keep their types
+        tm = linspace(0, 1, 10)
+        lw = RawWrite()
+        lw.add_trace(Trace.from_steps("time", [tm, tm]))
+        lw.add_trace(Trace.from_steps("V(a)", [tm, tm], numerical_type="real"))
+        lw.steps = [{"gain": LTComplex("(1dB,2°)"), "model": "a"}, {"gain": 2, "model": "b"}]
+        lw.save(filename)
+        shutil.rmtree(RawRead.cache_path(filename), ignore_errors=True)
+        raw = RawRead(filename, cache=True)
+        os.remove(f"{temp_dir}cached.log")
+        cached = RawRead(filename, cache=True)
+        self.assertEqual(cached.steps, raw.steps)
+        self.assertIsInstance(cached.steps[0]["gain"], LTComplex)
+        self.assertEqual([type(step["gain"]) for step in cached.steps], [LTComplex, int])
+
+    def test_rawreaders_workers(self):
+        # Reading with a thread pool must give the same data as reading sequentially
+        tm = linspace(0, 1e-3, 10000)
+        lw = RawWrite(fastacces=True)
+        lw.add_trace(Trace("time", tm))
+        lw.add_trace(Trace("V(a)", sin(2 * pi * 1e3 * tm), numerical_type="real"))
+        lw.add_trace(Trace("V(b)", cos(2 * pi * 1e3 * tm), numerical_type="real"))
+        lw.save(f"{temp_dir}workers_fastaccess.raw")
+        for filename in (
+            f"{temp_dir}workers_fastaccess.raw",
+            f"{test_dir}tran_qspice.bin.qraw",
+            f"{test_dir}ac_ltspice.bin.raw",
+            f"{test_dir}TRAN - STEP.raw",
+        ):
+            raw = RawRead(filename)
+            names = [trace.name for trace in raw.traces]
+            for traces_to_read in ("*", names[-1]):
+                raw_parallel = RawRead(filename, traces_to_read, workers=3)
+                for trace in raw_parallel.traces:
+                    self.assertTrue((trace.data == raw.get_trace(trace.name).data).all())
+
+    def test_rawreaders_aliases(self):
+        # QSPICE aliases are computed from the traces, and only once
+        raw = RawRead(f"{test_dir}ac_qspice.bin.qraw")
+        aliases = raw.materialize_aliases()
+        self.assertEqual(list(aliases), ["I(R1)", "Freq", "Omega"])
+        self.assertIs(raw.get_trace("I(R1)"), aliases["I(R1)"])
+        expected = 0.01 * (raw.get_wave("V(in)") - raw.get_wave("V(out)"))  # 0.01mho
+        self.assertTrue(allclose(raw.get_wave("I(R1)"), expected))
+        self.assertTrue(allclose(raw.get_wave("Omega"), 2 * pi * raw.get_axis()))
+        # Aliases that refer to each other
+        raw.aliases["A"] = "2*B"
+        raw.aliases["B"] = "C+1"
+        raw.aliases["C"] = "A"
+        with self.assertRaisesRegex(ValueError, "A -> B -> C -> A"):
+            raw.get_trace("A")
+
+    def test_rawreaders_step_queries(self):
+        # steps: vin = 1, 10, 1, 10 and r1 = 1000, 1000, 10000, 10000
+        raw = RawRead(f"{test_dir}TRAN - STEP.raw")
+        self.assertEqual(raw.get_steps(), [0, 1, 2, 3])
+        self.assertEqual(raw.get_steps(vin=1), [0, 2])
+        self.assertEqual(raw.get_steps(vin=10, r1=1000.0), [1])
+        self.assertEqual(raw.get_steps(vin=2), [])
+        self.assertEqual(raw.get_steps(temp=25), [])
+        self.assertEqual(raw.get_steps(r1__gt=1000), [2, 3])
+        self.assertEqual(raw.get_steps(r1__ge=1000, vin__lt=10), [0, 2])
+        self.assertEqual(raw.get_steps(vin__le=1, r1__ne=1000), [2])
+        self.assertEqual(raw.get_steps(r1__in=[10000, 5]), [2, 3])
+        self.assertEqual(raw.get_steps(r1__approx=1000.000001), [0, 1])
+        self.assertEqual(raw.get_steps(r1__approx=(1001, 0.5)), [])
+        self.assertEqual(raw.get_steps(r1__approx=(1001, 2)), [0, 1])
+
+    def test_rawreaders_export(self):
+        raw = RawRead(f"{test_dir}TRAN - STEP.raw")
+        for steps in ([0, 1, 2, 3], [1, 2], [3, 0]):
+            data = raw.export(step=steps)
+            self.assertEqual(list(data), [*raw.get_trace_names(), "vin", "r1"])
+            for name in ("time", "V(out)"):
+                expected = concatenate([raw.get_wave(name, step) for step in steps])
+                self.assertTrue((data[name] == expected).all())
+            expected = concatenate(
+                [[raw.steps[step]["r1"]] * raw.axis.get_len(step) for step in steps]
+            )
+            self.assertTrue((data["r1"] == expected).all())
+            # The integer parameters stay integers
+            self.assertEqual(data["r1"].dtype.kind, "i")
+        # Contiguous steps don't copy the trace data
+        data = raw.export(columns=["V(out)"], step=[1, 2])
+        self.assertTrue(shares_memory(data["V(out)"], raw.get_trace("V(out)").data))
+        self.assertEqual(list(raw.export(columns=["V(out)"], vin=10)["r1"][[0, -1]]), [1e3, 1e4])
+        # A query that matches no step gives empty columns
+        data = raw.export(vin=12345)
+        self.assertEqual(list(data), [*raw.get_trace_names(), "vin", "r1"])
+        self.assertEqual({len(column) for column in data.values()}, {0})
+        self.assertEqual(data["V(out)"].dtype, raw.get_trace("V(out)").data.dtype)
+        self.assertEqual(len(raw.to_dataframe(step=[])), 0)
+
+        df = raw.to_dataframe(multi_index=True)
+        self.assertEqual(df.index.names, ["step", "point"])
+        self.assertTrue((df.loc[2]["V(out)"].to_numpy() == raw.get_wave("V(out)", 2)).all())
+        self.assertEqual(list(df.loc[3].index[:3]), [0, 1, 2])
+
+        # Stepped operating point, without axis: each point is a step
+        raw = RawRead(f"{test_dir}DC op point - STEP.raw")
+        data = raw.export(step=[3, 0, 1])
+        self.assertEqual({len(column) for column in data.values()}, {3})
+        self.assertEqual(list(data["run"]), [4, 1, 2])
+        self.assertEqual(list(data["V(in)"]), list(raw.get_trace("V(in)").data[[3, 0, 1]]))
+        self.assertEqual(len(raw.to_dataframe(step=[1, 2])), 2)
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_rawreaders_parquet(self):
+        raw = RawRead(f"{test_dir}TRAN - STEP.raw")
+        filename = f"{temp_dir}tran_step.parquet"
+        raw.to_parquet(filename)
+        parquet_file = pq.ParquetFile(filename)
+        self.assertEqual(parquet_file.num_row_groups, len(raw.get_steps()))
+        self.assertEqual(parquet_file.schema_arrow.names, [*raw.get_trace_names(), "vin", "r1"])
+        step2 = parquet_file.read_row_group(2).to_pydict()
+        self.assertEqual(set(step2["r1"]), {raw.steps[2]["r1"]})
+        self.assertEqual(step2["V(out)"], raw.get_wave("V(out)", 2).tolist())
+
+        self.assertEqual(RawWrite.from_parquet(filename).steps, raw.steps)
+
+        # Without any step, the file only has the schema
+        raw.to_parquet(f"{temp_dir}no_step.parquet", step=[])
+        table = pq.read_table(f"{temp_dir}no_step.parquet")
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.schema.names, [*raw.get_trace_names(), "vin", "r1"])
+        raw_write = RawWrite.from_parquet(filename, step=2)
+        rewritten = f"{temp_dir}tran_step2.raw"
+        raw_write.save(rewritten)
+        raw2 = RawRead(rewritten)
+        self.assertEqual(raw2.get_trace_names(), raw.get_trace_names())
+        for name in raw.get_trace_names():
+            self.assertTrue((raw2.get_wave(name) == raw.get_wave(name, 2)).all())
+
+        # Complex data
+        raw = RawRead(f"{test_dir}ac_ltspice.bin.raw")
+        filename = f"{temp_dir}ac.parquet"
+        raw.to_parquet(filename)
+        raw_write = RawWrite.from_parquet(filename)
+        self.assertEqual(raw_write.plot_name, "AC Analysis")
+        self.assertTrue((raw_write.get_trace("V(out)").data == raw.get_wave("V(out)")).all())
+        self.assertTrue((raw_write.get_trace(0).data == raw.get_axis()).all())
+
 
 # ------------------------------------------------------------------------------
 if __name__ == "__main__":
@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+
+# -------------------------------------------------------------------------------
+#
+#  ███████╗██████╗ ██╗ ██████╗███████╗██╗     ██╗██████╗
+#  ██╔════╝██╔══██╗██║██╔════╝██╔════╝██║     ██║██╔══██╗
+#  ███████╗██████╔╝██║██║     █████╗  ██║     ██║██████╔╝
+#  ╚════██║██╔═══╝ ██║██║     ██╔══╝  ██║     ██║██╔══██╗
+#  ███████║██║     ██║╚██████╗███████╗███████╗██║██████╔╝
+#  ╚══════╝╚═╝     ╚═╝ ╚═════╝╚══════╝╚══════╝╚═╝╚═════╝
+#
+# Name:        test_sim_runner.py
+# Purpose:     Test the scheduling of SimRunner, without a spice simulator
+#
+# Licence:     refer to the LICENSE file
+# -------------------------------------------------------------------------------
+"""SimRunner unit test.
+
+The simulations are done by a fake simulator that sleeps for the time given in the
+netlist and writes empty raw and log files, so that these tests can run anywhere.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, ClassVar
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from kupicelib.sim.async_sim_runner import AsyncSimRunner
+from kupicelib.sim.concurrency_controller import ConcurrencyController
+from kupicelib.sim.result_cache import ResultCache
+from kupicelib.sim.sim_runner import SimRunner, SimRunnerConfigError
+from kupicelib.sim.simulator import Simulator
+
+# Same as FakeSimulator.run(), as a separate process
+FAKE_SPICE = """
+import sys, time
+from pathlib import Path
+netlist = Path(sys.argv[1])
+time.sleep(float(netlist.read_text().split()[0]))
+if "fail" in netlist.stem:
+    sys.exit(1)
+netlist.with_suffix(".raw").write_bytes(netlist.read_bytes())
+netlist.with_suffix(".log").write_text("")
+"""
+
+
+class FakeSimulator(Simulator):
+    """Simulator that waits the number of seconds written in the netlist."""
+
+    spice_exe: ClassVar[list[str]] = ["fake_spice"]
+    process_name = "fake_spice"
+    raw_extension = ".raw"
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    calls = 0
+
+    @classmethod
+    def run(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[Any] | None = None,
+        timeout: float | None = None,
+        stdout: Any = None,
+        stderr: Any = None,
+        exe_log: bool = False,
+    ) -> int:
+        netlist = Path(netlist_file)
+        with cls.lock:
+            cls.calls += 1
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        try:
+            time.sleep(float(netlist.read_text().split()[0]))
+        finally:
+            with cls.lock:
+                cls.running -= 1
+        if "fail" in netlist.stem:
+            return 1
+        netlist.with_suffix(".raw").write_bytes(netlist.read_bytes())
+        netlist.with_suffix(".log").write_text("")
+        return 0
+
+    @classmethod
+    def command_line(
+        cls,
+        netlist_file: str | Path,
+        cmd_line_switches: Sequence[Any] | str | None = None,
+    ) -> list[str]:
+        return [sys.executable, "-c", FAKE_SPICE, str(netlist_file)]
+
+    @classmethod
+    def valid_switch(
+        cls, switch: str, switch_param: str | Sequence[str] | None
+    ) -> list[str]:
+        return [switch]
+
+
+def count_bytes(raw_file: Path, log_file: Path, offset: int = 0) -> tuple[int, int]:
+    """Callback executed on the process pool."""
+    return os.getpid(), log_file.stat().st_size + offset
+
+
+class FixedLoadController(ConcurrencyController):
+    """Controller whose samples are set by the test."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(interval=0, **kwargs)
+        self.load = 0.1
+        self.free_memory = 64 << 30
+
+    def sample(self, running: int) -> dict[str, float]:
+        return {"load": self.load, "free_memory": self.free_memory, "task_memory": 1 << 30}
+
+
+class TestSimRunner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = Path(tempfile.mkdtemp())
+        FakeSimulator.max_running = 0
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def netlist(self, name: str, duration: float, body: str = "") -> Path:
+        netlist = self.folder / f"{name}.net"
+        netlist.write_text(f"{duration}\n{body}")
+        return netlist
+
+    def test_completion_events(self) -> None:
+        """Tasks are moved to the completed list as soon as they finish, without
+        waiting for a polling period."""
+        runner = SimRunner(simulator=FakeSimulator, parallel_sims=4)
+        start = time.perf_counter()
+        slow = runner.run(self.netlist("slow", 0.5))
+        fast = runner.run(self.netlist("fast", 0.02))
+        failed = runner.run(self.netlist("fail", 0.02))
+        first = next(iter(runner))
+        self.assertEqual(first, (fast.raw_file, fast.log_file))
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertIn(slow, [task for task, _future in runner.active_tasks])
+        self.assertFalse(runner.wait_completion())
+        self.assertIn(failed, runner.completed_tasks)
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual(runner.active_threads(), 0)
+        self.assertEqual((runner.okSim, runner.failSim), (2, 1))
+        self.assertEqual(len(list(runner)), 2)
+
+    def test_parallel_limit(self) -> None:
+        """No more than parallel_sims simulations run at the same time, and the next
+        one is started as soon as a slot is released."""
+        runner = SimRunner(simulator=FakeSimulator, parallel_sims=2)
+        start = time.perf_counter()
+        for i in range(6):
+            runner.run(self.netlist(f"sim{i}", 0.1))
+        self.assertTrue(runner.wait_completion())
+        self.assertEqual(FakeSimulator.max_running, 2)
+        self.assertEqual(runner.okSim, 6)
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+    def test_resource_timeout(self) -> None:
+        """run() gives up when no slot is released within the timeout."""
+        runner = SimRunner(simulator=FakeSimulator, parallel_sims=1, timeout=None)
+        runner.run(self.netlist("long", 1.2))
+        self.assertIsNone(runner.run(self.netlist("late", 0), timeout=0))
+        self.assertTrue(runner.wait_completion())
+        self.assertIsNotNone(runner.run(self.netlist("next", 0), timeout=0))
+        self.assertTrue(runner.wait_completion(timeout=5))
+
+    def test_process_callbacks(self) -> None:
+        """Callbacks run on the process pool, and their result is returned through the
+        task, while the simulation slot is released as soon as the simulation ends."""
+        runner = SimRunner(
+            simulator=FakeSimulator,
+            parallel_sims=2,
+            callback_executor="process",
+            callback_workers=2,
+        )
+        tasks = [
+            runner.run(
+                self.netlist(f"sim{i}", 0.02), callback=count_bytes, callback_args=(i,)
+            )
+            for i in range(4)
+        ]
+        self.assertTrue(runner.wait_completion(timeout=30))
+        self.assertEqual(runner.okSim, 4)
+        results = [task.get_results() for task in tasks]
+        self.assertEqual([size for _pid, size in results], [0, 1, 2, 3])
+        self.assertNotIn(os.getpid(), {pid for pid, _size in results})
+        self.assertEqual(tasks[0].wait_results(), results[0])
+
+        with self.assertRaises(SimRunnerConfigError):
+            SimRunner(simulator=FakeSimulator, callback_executor="fork")
+
+    def test_concurrency_controller(self) -> None:
+        """The controller lowers and raises the limit between its bounds."""
+        controller = FixedLoadController(min_sims=2, max_sims=4)
+        self.assertEqual(controller.update(3, running=1), 3)  # slots are free
+        self.assertEqual(controller.update(3, running=3), 4)
+        self.assertEqual(controller.update(4, running=4), 4)  # max_sims
+        controller.load = 2.0
+        self.assertEqual(controller.update(4, running=4), 3)
+        controller.load = 0.1
+        controller.free_memory = 1 << 29
+        self.assertEqual(controller.update(3, running=3), 2)
+        self.assertEqual(controller.update(2, running=2), 2)  # min_sims
+        self.assertEqual(
+            [(old, new, reason) for _time, old, new, reason in controller.decisions],
+            [(3, 4, "spare capacity"), (4, 3, "high load"), (3, 2, "low memory")],
+        )
+        self.assertEqual(controller.metrics["increases"], 1)
+        self.assertEqual(controller.metrics["decreases"], 2)
+        self.assertEqual(controller.metrics["samples"], 6)
+        with self.assertRaises(ValueError):
+            ConcurrencyController(min_sims=3, max_sims=2)
+
+    def test_adaptive_parallel_sims(self) -> None:
+        """SimRunner follows the limit of the controller."""
+        controller = FixedLoadController(min_sims=1, max_sims=3)
+        runner = SimRunner(simulator=FakeSimulator, parallel_sims=1, concurrency=controller)
+        for i in range(8):
+            runner.run(self.netlist(f"sim{i}", 0.1))
+        self.assertTrue(runner.wait_completion())
+        self.assertEqual(FakeSimulator.max_running, 3)
+        self.assertEqual(runner.parallel_sims, 3)
+
+        controller.load = 5.0
+        FakeSimulator.max_running = 0
+        for i in range(4):
+            runner.run(self.netlist(f"loaded{i}", 0.05))
+        self.assertTrue(runner.wait_completion())
+        self.assertEqual(runner.parallel_sims, 1)
+        self.assertEqual(runner.okSim, 12)
+        self.assertGreater(ConcurrencyController().sample(1)["free_memory"], 0)
+
+    def test_result_cache(self) -> None:
+        """Simulations with the same inputs are only done once, and the cache is kept
+        within its size."""
+        cache_folder = self.folder / "cache"
+        models = self.folder / "models.lib"
+        models.write_text(".model D1 D(Is=1e-14)\n")
+        runner = SimRunner(
+            simulator=FakeSimulator, parallel_sims=2, result_cache=cache_folder
+        )
+        calls = FakeSimulator.calls
+        netlist = self.netlist("cached", 0.05, ".include models.lib\n")
+        first = runner.run(netlist, callback=count_bytes, callback_args=(0,))
+        runner.wait_completion()
+        second = runner.run(netlist, callback=count_bytes, callback_args=(0,))
+        third = runner.run(netlist, switches=["-x"])
+        runner.wait_completion()
+        self.assertEqual(FakeSimulator.calls - calls, 2)  # The switches differ
+        self.assertFalse(first.cache_hit)
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(second.get_results(), first.get_results())
+        self.assertEqual(second.raw_file.read_bytes(), first.raw_file.read_bytes())
+        self.assertFalse(third.cache_hit)
+        # The files fetched from the cache can be modified without altering it
+        with open(second.raw_file, "r+b") as f:
+            f.write(b"modified")
+        fourth = runner.run(netlist)
+        runner.wait_completion()
+        self.assertTrue(fourth.cache_hit)
+        self.assertEqual(fourth.raw_file.read_bytes(), first.raw_file.read_bytes())
+
+        models.write_text(".model D1 D(Is=2e-14)\n")
+        self.assertFalse(runner.run(netlist).cache_hit)
+        runner.wait_completion()
+        self.assertEqual(
+            runner.result_cache.stats(),
+            {"hits": 2, "misses": 3, "evictions": 0, "entries": 3,
+             "size": runner.result_cache.size},
+        )
+        self.assertEqual(runner.okSim, 5)
+
+        # A new cache on the same folder finds the entries, and evicts the least
+        # recently used ones to stay within its size.
+        other = self.netlist("other", 0)
+        cache = ResultCache(
+            cache_folder, max_size=len(netlist.read_bytes()) + len(other.read_bytes())
+        )
+        self.assertEqual(len(cache), 3)
+        runner = SimRunner(simulator=FakeSimulator, result_cache=cache)
+        self.assertTrue(runner.run(netlist).cache_hit)
+        self.assertFalse(runner.run(other).cache_hit)
+        runner.wait_completion()
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(runner.run(netlist).cache_hit)
+        runner.wait_completion()
+
+    def test_cache_hit_without_slot(self) -> None:
+        """A cache hit is completed by run(), even when all the slots are in use."""
+        runner = SimRunner(
+            simulator=FakeSimulator, parallel_sims=2, result_cache=self.folder / "cache"
+        )
+        netlist = self.netlist("cached", 0)
+        runner.run(netlist, callback=count_bytes, callback_args=(0,))
+        runner.wait_completion()
+        busy = [runner.run(self.netlist(f"busy{i}", 0.5)) for i in range(2)]
+        hit = runner.run(netlist, callback=count_bytes, callback_args=(0,))
+        self.assertTrue(hit.cache_hit)
+        self.assertIn(hit, runner.completed_tasks)
+        self.assertEqual(hit.get_results(), (os.getpid(), 0))
+        self.assertTrue(all(task.retcode == -1 for task in busy))
+        self.assertTrue(runner.wait_completion())
+
+
+class TestAsyncSimRunner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.folder = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def netlist(self, name: str, duration: float, body: str = "") -> Path:
+        netlist = self.folder / f"{name}.net"
+        netlist.write_text(f"{duration}\n{body}")
+        return netlist
+
+    async def test_as_completed(self) -> None:
+        """The tasks are yielded in their completion order, and at most parallel_sims
+        simulator processes run at the same time."""
+        runner = AsyncSimRunner(simulator=FakeSimulator, parallel_sims=2, timeout=30)
+        durations = {"sim_a": 0.6, "sim_b": 0.1, "sim_c": 0.1, "fail_d": 0.1}
+        tasks = [
+            await runner.arun(self.netlist(name, duration))
+            for name, duration in durations.items()
+        ]
+        order = [task.runno async for task in runner.as_completed()]
+        self.assertEqual(order, [2, 3, 4, 1])
+        self.assertEqual((runner.okSim, runner.failSim), (3, 1))
+        self.assertEqual(await tasks[0].results(), (tasks[0].raw_file, tasks[0].log_file))
+        self.assertFalse(await runner.await_completion())
+
+    async def test_timeout(self) -> None:
+        """The simulator process is killed on timeout, and the callback of the other
+        simulations is called."""
+        runner = AsyncSimRunner(simulator=FakeSimulator, parallel_sims=4)
+        slow = await runner.arun(self.netlist("slow", 30), timeout=0.3)
+        fast = await runner.arun(
+            self.netlist("fast", 0),
+            callback=count_bytes,
+            callback_args={"offset": 7},
+        )
+        start = time.perf_counter()
+        self.assertFalse(await runner.await_completion(timeout=10))
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(slow.retcode, 1)
+        self.assertIsNotNone(slow.stop_time)
+        self.assertEqual(await slow.results(), (None, slow.log_file))
+        self.assertEqual(
+            await asyncio.wait_for(asyncio.to_thread(slow.wait_results), 5),
+            (None, slow.log_file),
+        )
+        self.assertEqual(await fast.results(), (os.getpid(), 7))
+
+    async def test_abort(self) -> None:
+        """Aborting on timeout cancels the tasks and kills their simulator process."""
+        runner = AsyncSimRunner(simulator=FakeSimulator, parallel_sims=1)
+        slow = await runner.arun(self.netlist("slow", 30))
+        queued = await runner.arun(self.netlist("queued", 0))
+        self.assertFalse(await runner.await_completion(0.3, abort_all_on_timeout=True))
+        self.assertEqual(runner.failSim, 2)
+        # The simulation that was running and the one that was waiting for a slot
+        self.assertEqual((slow.retcode, queued.retcode), (1, 1))
+        self.assertIsNotNone(slow.stop_time)
+        self.assertEqual(
+            await asyncio.wait_for(asyncio.to_thread(queued.wait_results), 5), (None, None)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()